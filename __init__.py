@@ -16,6 +16,6 @@ __email__ = ""
 __repository__ = "https://github.com/ktsoaela/venv_manager"
 __license__ = "MIT"
 
-from .venv_manager_core import VenvManager
+from .venv_manager_core import AsyncVenvManager, OperationResult, ProcessResult, VenvManager
 
-__all__ = ["VenvManager"]
+__all__ = ["AsyncVenvManager", "OperationResult", "ProcessResult", "VenvManager"]
@@ -0,0 +1,89 @@
+#!/usr/bin/env python3
+"""
+Lock install benchmark for Python Virtual Environment Manager
+Installs the same hash-pinned lock of synthetic wheels with pip and with
+install --lock, each into a fresh virtual environment
+
+Usage: python benchmarks/lock_install.py [PACKAGES] [JOBS]
+
+Developer: Khotso Tsoaela
+Repository: https://github.com/ktsoaela/venv_manager
+"""
+
+import contextlib
+import hashlib
+import io
+import subprocess
+import sys
+import tempfile
+import time
+import zipfile
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from venv_manager_core import VenvManager
+
+def make_wheel(directory, index, modules=40):
+    """Write a pure-Python wheel with a package of modules and a console script"""
+    name, version = f'bench_pkg_{index:04d}', '1.0'
+    dist_info = f'{name}-{version}.dist-info'
+    body = ''.join(f'def function_{i}(value):\n    return value * {i}\n\n' for i in range(60))
+    contents = {f'{name}/__init__.py': 'def main():\n    return 0\n'}
+    for module in range(modules):
+        contents[f'{name}/module_{module:02d}.py'] = body
+    contents[f'{dist_info}/METADATA'] = f'Metadata-Version: 2.1\nName: {name}\nVersion: {version}\n'
+    contents[f'{dist_info}/WHEEL'] = 'Wheel-Version: 1.0\nRoot-Is-Purelib: true\nTag: py3-none-any\n'
+    contents[f'{dist_info}/entry_points.txt'] = f'[console_scripts]\n{name} = {name}:main\n'
+    wheel = Path(directory) / f'{name}-{version}-py3-none-any.whl'
+    with zipfile.ZipFile(wheel, 'w', zipfile.ZIP_DEFLATED) as archive:
+        for arcname, text in contents.items():
+            archive.writestr(arcname, text)
+        archive.writestr(f'{dist_info}/RECORD', ''.join(f'{arcname},,\n' for arcname in contents)
+                         + f'{dist_info}/RECORD,,\n')
+    digest = hashlib.sha256(wheel.read_bytes()).hexdigest()
+    return f'{name}=={version} --hash=sha256:{digest}\n'
+
+def fresh_venv(path):
+    subprocess.run([sys.executable, '-m', 'venv', str(path)], check=True)
+    return path
+
+def timed(function):
+    start = time.perf_counter()
+    function()
+    return time.perf_counter() - start
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 200
+    jobs = int(sys.argv[2]) if len(sys.argv) > 2 else None
+    with tempfile.TemporaryDirectory() as temp_dir:
+        manager = VenvManager()
+        manager.config_file = Path(temp_dir) / 'venv_manager_config.json'
+        manager.config = manager.load_config()
+        downloads = manager.cache.section('downloads')
+        lock = Path(temp_dir) / 'requirements.lock'
+        lock.write_text(''.join(make_wheel(downloads, i) for i in range(count)))
+
+        rows = []
+        for label, extra in (('pip install', []), ('pip install --no-compile', ['--no-compile'])):
+            python = manager.get_venv_python(fresh_venv(Path(temp_dir) / label.replace(' ', '_')))
+            command = [str(python), '-m', 'pip', 'install', '--no-deps', '--no-index', '--require-hashes',
+                       '--disable-pip-version-check', '--quiet', '--find-links', str(downloads), '-r', str(lock)]
+            rows.append((label, timed(lambda: subprocess.run(command + extra, check=True))))
+
+        venv_path = fresh_venv(Path(temp_dir) / 'lock')
+        manager.register_project('lock', {'tool': 'virtualenv', 'path': str(venv_path), 'created': temp_dir})
+        # Warm the interpreter probe cache like any earlier command on the host would
+        manager.supported_tags(manager.get_venv_python(venv_path))
+        with contextlib.redirect_stdout(io.StringIO()):
+            rows.append(('install --lock', timed(lambda: manager.install_lock('lock', str(lock), jobs=jobs))))
+
+        print(f"\n{count} packages")
+        print("-" * 47)
+        print(f"{'installer':<28}{'time':>10}{'speedup':>9}")
+        baseline = rows[0][1]
+        for label, elapsed in rows:
+            print(f"{label:<28}{elapsed:>8.2f} s{baseline / elapsed:>8.1f}x")
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,94 @@
+#!/usr/bin/env python3
+"""
+Registry memory benchmark for Python Virtual Environment Manager
+Compares the dict registry loaded with json.load against Project records,
+both fully decoded and loaded lazily from the line-based registry file
+
+Usage: python benchmarks/registry_memory.py [COUNT ...]
+
+Developer: Khotso Tsoaela
+Repository: https://github.com/ktsoaela/venv_manager
+"""
+
+import gc
+import json
+import os
+import sys
+import tempfile
+import time
+import tracemalloc
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from venv_manager_core import Project, ProjectStore
+
+def make_projects(count):
+    """Build a registry with a realistic mix of tools, tags and interpreters"""
+    tools = ['virtualenv', 'pipenv', 'poetry']
+    return {
+        f'project-{i:06d}': {
+            'tool': tools[i % 3],
+            'path': f'/home/dev/work/project-{i:06d}',
+            'created': '/home/dev/work',
+            'python': '3.11' if i % 2 else None,
+            'tags': ['api'] if i % 5 == 0 else [],
+        }
+        for i in range(count)
+    }
+
+def measure(load):
+    """Return (result, peak bytes still allocated, seconds) for a loader"""
+    gc.collect()
+    tracemalloc.start()
+    start = time.perf_counter()
+    result = load()
+    elapsed = time.perf_counter() - start
+    current, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return result, current, elapsed
+
+def run(count, temp_dir):
+    projects = make_projects(count)
+    config_file = Path(temp_dir) / f'config-{count}.json'
+    with open(config_file, 'w') as f:
+        json.dump({'default_tool': 'virtualenv', 'projects': projects}, f)
+    projects_file = Path(temp_dir) / f'projects-{count}.tsv'
+    ProjectStore.from_dicts(projects).save(projects_file)
+    del projects
+
+    def load_dicts():
+        with open(config_file) as f:
+            return json.load(f)['projects']
+
+    def load_records():
+        store = ProjectStore.load(projects_file)
+        for name in store:
+            store[name]
+        return store
+
+    def load_lazy():
+        return ProjectStore.load(projects_file)
+
+    rows = []
+    for label, loader in (('dict (json.load)', load_dicts),
+                          ('Project records', load_records),
+                          ('lazy ProjectStore', load_lazy)):
+        result, size, elapsed = measure(loader)
+        rows.append((label, size, elapsed))
+        del result
+
+    print(f"\n{count:,} projects")
+    print("-" * 56)
+    print(f"{'representation':<22}{'memory':>14}{'load time':>14}")
+    for label, size, elapsed in rows:
+        print(f"{label:<22}{size / 1024 / 1024:>11.1f} MB{elapsed * 1000:>11.0f} ms")
+
+def main():
+    counts = [int(arg) for arg in sys.argv[1:]] or [10_000, 100_000]
+    with tempfile.TemporaryDirectory() as temp_dir:
+        for count in counts:
+            run(count, temp_dir)
+
+if __name__ == '__main__':
+    main()
@@ -92,6 +92,8 @@ def demonstrate_configuration_management():
         project_info['description'] = "Advanced Python project with custom features"
         project_info['tags'] = ['python', 'advanced', 'demo']
         project_info['created_by'] = "venv_manager_demo"
+        # Assign the entry back so the registry knows to save it
+        manager.config['projects']['advanced_project'] = project_info
         manager.save_config()
         print("   ✅ Custom metadata added to project")
     
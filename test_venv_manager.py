@@ -9,10 +9,31 @@ Repository: https://github.com/ktsoaela/venv_manager
 
 import os
 import sys
+import io
+import asyncio
+import argparse
+import json
+import base64
+import hashlib
 import tempfile
 import shutil
+import subprocess
+import time
+import zipfile
+import pstats
+import sysconfig
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import redirect_stdout, redirect_stderr
 from pathlib import Path
-from venv_manager import VenvManager
+from venv_manager import VenvManager, Project, OperationMetrics, AsyncVenvManager, OperationResult
+import venv_manager_core
+
+def make_isolated_manager(temp_dir):
+    """Create a core VenvManager whose configuration lives in temp_dir"""
+    manager = venv_manager_core.VenvManager()
+    manager.config_file = Path(temp_dir) / 'venv_manager_config.json'
+    manager.config = manager.load_config()
+    return manager
 
 def test_basic_functionality():
     """Test basic functionality of VenvManager"""
@@ -136,6 +157,1366 @@ def test_error_handling():
         print(f"Error handling test failed: {e}")
         return False
 
+def test_matrix_run():
+    """Test fanning a command out across a matrix project"""
+    print("\nTesting Matrix Run")
+    print("=" * 50)
+    
+    with tempfile.TemporaryDirectory() as temp_dir:
+        manager = make_isolated_manager(temp_dir)
+        root = Path(temp_dir) / 'lib'
+        matrix = {}
+        for version in ('a', 'b'):
+            venv_path = root / f'py{version}'
+            subprocess.run([sys.executable, '-m', 'venv', '--without-pip', str(venv_path)], check=True)
+            matrix[version] = str(venv_path)
+        manager.config['projects']['lib'] = {
+            'tool': 'virtualenv', 'path': str(root), 'created': temp_dir, 'matrix': matrix
+        }
+        
+        assert set(manager.get_project_envs('lib')) == {'pya', 'pyb'}
+        assert manager.run_in_project('lib', ['python', '-c', 'import sys; assert sys.prefix != sys.base_prefix'])
+        assert not manager.run_in_project('lib', ['python', '-c', 'import sys; sys.exit("pyb" in sys.prefix)'])
+        assert not manager.run_in_project('missing', ['python'])
+        
+        # The newest environment is the highest interpreter version, not the last one listed
+        manager.register_project('multi', {'tool': 'virtualenv', 'path': str(Path(temp_dir) / 'multi'),
+                                           'created': temp_dir, 'matrix': {'3.9': '/m/39', '3.12': '/m/312',
+                                                                           '3.10': '/m/310'}})
+        assert manager.get_env_path('multi') == Path('/m/312')
+        
+        # A registered name is refused even when its directory is gone
+        manager.install_tool = lambda tool: True
+        original_cwd = os.getcwd()
+        os.chdir(temp_dir)
+        try:
+            with redirect_stdout(io.StringIO()) as output:
+                assert not manager.create_matrix('multi', ['3.11'])
+        finally:
+            os.chdir(original_cwd)
+        assert 'already registered' in output.getvalue()
+        assert manager.config['projects']['multi'].matrix['3.9'] == '/m/39'
+        
+    print("Matrix run tests passed")
+    return True
+
+def test_project_index():
+    """Test indexed registry lookups and filtering"""
+    print("\nTesting Project Index")
+    print("=" * 50)
+    
+    with tempfile.TemporaryDirectory() as temp_dir:
+        manager = make_isolated_manager(temp_dir)
+        tools = ['virtualenv', 'pipenv', 'poetry']
+        for i in range(30):
+            manager.config['projects'][f'proj{i:02d}'] = {
+                'tool': tools[i % 3], 'path': str(Path(temp_dir) / f'proj{i:02d}'),
+                'created': temp_dir, 'tags': ['api'] if i % 2 == 0 else []
+            }
+        
+        assert list(manager.index.query(prefix='proj1')) == [f'proj1{i}' for i in range(10)]
+        assert list(manager.index.query(filters={'tool': 'pipenv'}, tags=['api'], limit=2)) == ['proj04', 'proj10']
+        assert manager.index.find_by_path(Path(temp_dir) / 'proj07' / 'src') == 'proj07'
+        
+        manager.unregister_project('proj07')
+        assert manager.index.find_by_path(Path(temp_dir) / 'proj07') is None
+        manager.register_project('new', {'tool': 'poetry', 'path': str(Path(temp_dir) / 'new'), 'created': temp_dir})
+        assert 'new' in list(manager.index.query(filters={'tool': 'poetry'}))
+        assert manager.tag_project('new', ['web'])
+        assert list(manager.index.query(tags=['web'])) == ['new']
+        # Repeated values of one filter key match any of them
+        assert list(manager.index.query(filters={'tool': ['pipenv', 'poetry']}, tags=['api'], limit=3)) == \
+            ['proj02', 'proj04', 'proj08']
+        
+        # A create that fails never tags (or slims) the project that already holds the name
+        manager.check_tool_installed = lambda tool: True
+        args = argparse.Namespace(interactive=False, command='create', name='proj02', tool='virtualenv', python=None,
+                                  ephemeral=False, tag=['production'], jobs=None)
+        with redirect_stdout(io.StringIO()):
+            try:
+                venv_manager_core.dispatch(manager, args, None, [])
+            except SystemExit as e:
+                assert e.code == 1
+        assert 'production' not in (manager.config['projects']['proj02'].tags or [])
+        
+    print("Project index tests passed")
+    return True
+
+def test_list_output_formats():
+    """Test streaming, paginated and machine-readable list output"""
+    print("\nTesting List Output Formats")
+    print("=" * 50)
+    
+    with tempfile.TemporaryDirectory() as temp_dir:
+        manager = make_isolated_manager(temp_dir)
+        for i in range(10):
+            manager.config['projects'][f'proj{i}'] = {
+                'tool': 'virtualenv', 'path': str(Path(temp_dir) / f'proj{i}'), 'created': temp_dir
+            }
+        
+        output = io.StringIO()
+        with redirect_stdout(output):
+            manager.list_projects(output_format='jsonl', fields=['name'], limit=3, page=2)
+        assert [json.loads(line) for line in output.getvalue().splitlines()] == [
+            {'name': 'proj3'}, {'name': 'proj4'}, {'name': 'proj5'}
+        ]
+        
+        output = io.StringIO()
+        with redirect_stdout(output):
+            manager.list_projects(output_format='csv', fields=['name', 'tool'], limit=1)
+        assert output.getvalue().splitlines() == ['name,tool', 'proj0,virtualenv']
+        
+        records = manager.iter_projects(fields=['name'])
+        assert next(records) == {'name': 'proj0'}
+        
+    print("List output tests passed")
+    return True
+
+def test_path_index():
+    """Test the on-disk path index used by which and shell hooks"""
+    print("\nTesting Path Index")
+    print("=" * 50)
+    
+    with tempfile.TemporaryDirectory() as temp_dir:
+        manager = make_isolated_manager(temp_dir)
+        base = Path(temp_dir)
+        manager.register_project('app', {'tool': 'virtualenv', 'path': str(base / 'app'), 'created': temp_dir})
+        manager.register_project('app-api', {'tool': 'pipenv', 'path': str(base / 'app' / 'api'), 'created': temp_dir})
+        manager.register_project('zeta', {'tool': 'poetry', 'path': str(base / 'zeta'), 'created': temp_dir})
+        
+        index = manager.path_index
+        assert index.lookup(base / 'app' / 'src' / 'pkg')['name'] == 'app'
+        assert index.lookup(base / 'app' / 'api' / 'tests')['name'] == 'app-api'
+        assert index.lookup(base / 'app')['venv'] == str(base / 'app')
+        assert index.lookup(base / 'zeta')['tool'] == 'poetry'
+        assert index.lookup(base / 'apple') is None
+        
+        manager.unregister_project('zeta')
+        assert index.lookup(base / 'zeta') is None
+        
+        for shell in manager.SHELL_HOOKS:
+            hook = manager.shell_hook(shell)
+            assert 'venv_which.py' in hook and str(index.index_file) in hook
+        assert manager.shell_hook('tcsh') is None
+        
+        # The hooks run the standalone lookup with site disabled
+        which = Path(venv_manager_core.__file__).with_name('venv_which.py')
+        lookup = [sys.executable, '-I', '-S', str(which)]
+        found = subprocess.run(lookup + [str(base / 'app' / 'src'), str(index.index_file)],
+                               capture_output=True, text=True)
+        assert found.returncode == 0 and found.stdout == f"{base / 'app'}\n"
+        missing = subprocess.run(lookup + [str(base / 'zeta'), str(index.index_file)], capture_output=True, text=True)
+        assert missing.returncode == 1 and missing.stdout == ''
+        
+    print("Path index tests passed")
+    return True
+
+def test_project_store():
+    """Test Project records, lazy decoding and migration of inline registries"""
+    print("\nTesting Project Store")
+    print("=" * 50)
+    
+    with tempfile.TemporaryDirectory() as temp_dir:
+        config_file = Path(temp_dir) / 'venv_manager_config.json'
+        with open(config_file, 'w') as f:
+            json.dump({'default_tool': 'pipenv', 'python_path': sys.executable, 'projects': {
+                'old': {'tool': 'pipenv', 'path': '/work/old', 'created': '/work', 'custom': 1}
+            }}, f)
+        
+        manager = make_isolated_manager(temp_dir)
+        project = manager.config['projects']['old']
+        assert isinstance(project, venv_manager_core.Project)
+        assert (project.tool, project['path'], project.get('custom')) == ('pipenv', '/work/old', 1)
+        assert 'custom' in project and 'tool' in project and 'tags' not in project and 'missing' not in project
+        edited = project.copy()
+        edited['tags'], edited['description'] = ['demo'], 'Old project'
+        assert 'tags' in edited and edited.tags == ['demo'] and edited['description'] == 'Old project'
+        assert 'description' not in project
+        manager.register_project('new', {'tool': 'poetry', 'path': '/work/new', 'created': '/work'})
+        
+        with open(config_file) as f:
+            assert 'projects' not in json.load(f)
+        
+        reloaded = make_isolated_manager(temp_dir)
+        store = reloaded.config['projects']
+        assert set(store) == {'old', 'new'} and 'old' in store
+        assert all(isinstance(entry, str) for entry in store._entries.values())
+        assert store['old'].to_dict() == {'tool': 'pipenv', 'path': '/work/old', 'created': '/work', 'custom': 1}
+        assert isinstance(store._entries['new'], str)
+        # The index reads the leading columns of each line, so filtering decodes no entry
+        assert list(reloaded.index.query(filters={'tool': 'poetry'})) == ['new']
+        assert reloaded.index.find_by_path('/work/new/src') == 'new'
+        assert isinstance(store._entries['new'], str)
+        
+        # Lines from schema 2 registries hold only the JSON; they are indexed and gain columns on save
+        projects_file = reloaded.projects_file
+        projects_file.write_text('# venv_manager projects v2\n'
+                                 'legacy\t{"tool": "pipenv", "path": "/work/legacy", "created": "/work", '
+                                 '"tags": ["a,b", "api"]}\n' + projects_file.read_text().split('\n', 1)[1])
+        legacy = make_isolated_manager(temp_dir)
+        assert list(legacy.index.query(tags=['a,b'], filters={'tool': 'pipenv'})) == ['legacy']
+        legacy.tag_project('new', ['api'])
+        assert list(legacy.index.query(tags=['api'])) == ['legacy', 'new']
+        assert all(line.count('\t') == 6 for line in projects_file.read_text().splitlines()[1:])
+        assert list(make_isolated_manager(temp_dir).index.query(filters={'tag': 'a,b'})) == ['legacy']
+        legacy.unregister_project('legacy')
+        
+        # A lost or corrupt config file must not start an empty registry that overwrites projects.tsv
+        config_file.write_text('{"default_tool": ')
+        damaged = make_isolated_manager(temp_dir)
+        assert set(damaged.config['projects']) == {'old', 'new'}
+        damaged.register_project('third', {'tool': 'poetry', 'path': '/work/third', 'created': '/work'})
+        config_file.unlink()
+        assert set(make_isolated_manager(temp_dir).config['projects']) == {'old', 'new', 'third'}
+        assert not list(Path(temp_dir).glob('*.tmp'))
+        
+    print("Project store tests passed")
+    return True
+
+def test_doctor_repair():
+    """Test the integrity checker and in-place interpreter re-linking"""
+    print("\nTesting Doctor")
+    print("=" * 50)
+    
+    if os.name == 'nt':
+        print("Skipped: interpreter symlinks are POSIX-only")
+        return True
+    
+    with tempfile.TemporaryDirectory() as temp_dir:
+        manager = make_isolated_manager(temp_dir)
+        base = Path(temp_dir) / 'base'
+        base.mkdir()
+        version = f'{sys.version_info[0]}.{sys.version_info[1]}'
+        base_python = base / f'python{version}'
+        base_python.symlink_to(os.path.realpath(sys.executable))
+        venv_path = Path(temp_dir) / 'env'
+        subprocess.run([str(base_python), '-m', 'venv', '--without-pip', str(venv_path)], check=True)
+        manager.register_project('env', {'tool': 'virtualenv', 'path': str(venv_path), 'created': temp_dir})
+        
+        check = manager._check_venv(venv_path)
+        assert check['version'].startswith(version) and not check['relink']
+        
+        # Simulate the base interpreter disappearing after a system upgrade
+        base_python.unlink()
+        check = manager._check_venv(venv_path)
+        assert check['relink'] and 'interpreter link does not resolve' in check['problems']
+        
+        manager.doctor(['env'], repair=True)
+        assert manager.get_venv_python(venv_path).exists()
+        assert not manager._check_venv(venv_path)['relink']
+        assert not manager.doctor(['missing'])
+        
+    print("Doctor tests passed")
+    return True
+
+def test_gc():
+    """Test garbage collection of stale entries, orphaned venvs and partial creations"""
+    print("\nTesting Garbage Collection")
+    print("=" * 50)
+    
+    with tempfile.TemporaryDirectory() as temp_dir:
+        manager = make_isolated_manager(temp_dir)
+        root = Path(temp_dir) / 'work'
+        for directory in ('kept', 'orphan', 'nested/deep/orphan2', 'partial'):
+            (root / directory).mkdir(parents=True)
+        for directory in ('kept', 'orphan', 'nested/deep/orphan2'):
+            (root / directory / 'pyvenv.cfg').write_text('home = /usr/bin\n')
+        (root / 'partial' / manager.PARTIAL_MARKER).write_text(json.dumps({'pid': 2 ** 22 + 1, 'started': 0}))
+        manager.register_project('kept', {'tool': 'virtualenv', 'path': str(root / 'kept'), 'created': temp_dir})
+        manager.register_project('stale', {'tool': 'pipenv', 'path': str(root / 'deleted'), 'created': temp_dir})
+        # Central poetry/pipenv envs of projects without a cached env: one resolvable, one not
+        envs = Path(temp_dir) / 'envs'
+        for name in ('poetry-app', 'pipenv-app'):
+            (root / name).mkdir()
+        for env in ('poetry-app-Xy12-py3.11', 'Pipenv-App-ab12cd'):
+            (envs / env).mkdir(parents=True)
+            (envs / env / 'pyvenv.cfg').write_text('home = /usr/bin\n')
+        manager.register_project('poetry-app', {'tool': 'poetry', 'path': str(root / 'poetry-app'), 'created': temp_dir})
+        manager.register_project('pipenv-app', {'tool': 'pipenv', 'path': str(root / 'pipenv-app'), 'created': temp_dir})
+        manager._resolve_env_path = lambda project: envs / 'poetry-app-Xy12-py3.11' if project.tool == 'poetry' else None
+        
+        assert manager._process_alive(os.getpid()) and not manager._process_alive(2 ** 22 + 1)
+        assert manager.gc([str(root), str(envs)], dry_run=True)
+        assert (root / 'orphan').exists() and 'stale' in manager.config['projects']
+        
+        assert manager.gc([str(root), str(envs)], assume_yes=True)
+        assert not (root / 'orphan').exists() and not (root / 'nested' / 'deep' / 'orphan2').exists()
+        assert not (root / 'partial').exists()
+        assert (root / 'kept').exists()
+        assert (envs / 'poetry-app-Xy12-py3.11').exists() and (envs / 'Pipenv-App-ab12cd').exists()
+        assert manager.config['projects']['poetry-app'].env == str(envs / 'poetry-app-Xy12-py3.11')
+        assert set(manager.config['projects']) == {'kept', 'poetry-app', 'pipenv-app'}
+        
+        # The manager's own tool environments are never orphans, and creations in progress stay registered
+        tool_env = manager.tool_env('virtualenv', '1.0')
+        tool_env.mkdir(parents=True)
+        (tool_env / 'pyvenv.cfg').write_text('home = /usr/bin\n')
+        manager.register_project('busy', {'tool': 'virtualenv', 'path': str(root / 'busy'), 'created': temp_dir,
+                                          'status': 'creating', 'steps': []})
+        assert manager.gc([temp_dir], assume_yes=True)
+        assert manager.gc([str(manager.data_dir)], assume_yes=True)
+        assert (tool_env / 'pyvenv.cfg').exists() and 'busy' in manager.config['projects']
+        
+    print("Garbage collection tests passed")
+    return True
+
+def test_resumable_creation():
+    """Test checkpointed creation resuming from the last completed step"""
+    print("\nTesting Resumable Creation")
+    print("=" * 50)
+    
+    with tempfile.TemporaryDirectory() as temp_dir:
+        manager = make_isolated_manager(temp_dir)
+        path = Path(temp_dir) / 'app'
+        calls = []
+        
+        def failing_seed():
+            calls.append('seed')
+            raise OSError("network unreachable")
+        
+        project = manager._start_create('app', 'virtualenv', path, Path(temp_dir), None)
+        assert not manager._run_create_pipeline('app', project, {
+            'directory': lambda: manager._create_directory(path),
+            'interpreter': lambda: calls.append('interpreter'),
+            'seed': failing_seed,
+        })
+        stored = manager.config['projects']['app']
+        assert stored.status == 'creating' and stored.steps == ['directory', 'interpreter']
+        assert (path / manager.PARTIAL_MARKER).exists()
+        
+        # A fresh manager resumes from the registry checkpoint
+        manager = make_isolated_manager(temp_dir)
+        assert manager._start_create('app', 'pipenv', path, Path(temp_dir), None) is None
+        project = manager._start_create('app', 'virtualenv', path, Path(temp_dir), None)
+        assert manager._run_create_pipeline('app', project, {
+            'directory': lambda: calls.append('directory'),
+            'interpreter': lambda: calls.append('interpreter'),
+            'seed': lambda: calls.append('seed'),
+        })
+        assert calls == ['interpreter', 'seed', 'seed']
+        stored = manager.config['projects']['app']
+        assert stored.status is None and stored.steps is None
+        assert not (path / manager.PARTIAL_MARKER).exists()
+        assert manager._start_create('app', 'virtualenv', path, Path(temp_dir), None) is None
+        
+        # Resumed steps only do their own work: seeding reruns virtualenv over the existing
+        # interpreter and the poetry scaffold runs again inside the directory it left behind
+        commands = []
+        
+        def fake_run(cmd, **kwargs):
+            commands.append((cmd, kwargs.get('cwd')))
+            if cmd[:2] == ['poetry', 'init'] and len(commands) == 1:
+                raise subprocess.CalledProcessError(1, cmd)
+            if cmd[:2] == ['poetry', 'init']:
+                (kwargs['cwd'] / 'pyproject.toml').write_text('[tool.poetry]\n')
+            return subprocess.CompletedProcess(cmd, 0)
+        
+        manager = make_isolated_manager(temp_dir)
+        manager.install_tool = lambda tool: True
+        manager.tool_command = lambda tool: [tool]
+        manager.get_env_path = lambda name, refresh=False: None
+        manager._run = fake_run
+        original_cwd = os.getcwd()
+        with redirect_stdout(io.StringIO()):
+            os.chdir(temp_dir)
+            try:
+                assert not manager.create_poetry('my-lib')
+                assert (Path(temp_dir) / 'my-lib').is_dir()
+                # Resuming from another directory finishes the registered one
+                (Path(temp_dir) / 'elsewhere').mkdir()
+                os.chdir(Path(temp_dir) / 'elsewhere')
+                assert manager.create_poetry('my-lib')
+                assert not (Path(temp_dir) / 'elsewhere' / 'my-lib').exists()
+                assert manager.create_virtualenv('env', base_dir=Path(temp_dir))
+            finally:
+                os.chdir(original_cwd)
+        library = Path(temp_dir) / 'my-lib'
+        assert [cmd for cmd, cwd in commands[:2]] == [['poetry', 'init', '--no-interaction', '--name', 'my-lib']] * 2
+        assert commands[1][1] == library and (library / 'my_lib' / '__init__.py').exists()
+        assert manager.config['projects']['my-lib'].status is None
+        seed = ['virtualenv', str(Path(temp_dir) / 'env')]
+        assert [cmd for cmd, cwd in commands[2:]] == [seed + ['--no-seed'], seed]
+        
+    print("Resumable creation tests passed")
+    return True
+
+def test_migration_export():
+    """Test exporting an installed set and repacking it into installable wheels"""
+    print("\nTesting Migration Export")
+    print("=" * 50)
+    
+    with tempfile.TemporaryDirectory() as temp_dir:
+        manager = make_isolated_manager(temp_dir)
+        prefix = Path(temp_dir) / 'source'
+        site_packages = prefix / 'lib' / 'python3.11' / 'site-packages'
+        dist_info = site_packages / 'demo_pkg-1.0.dist-info'
+        dist_info.mkdir(parents=True)
+        (site_packages / 'demo_pkg.py').write_text("VALUE = 42\n")
+        (prefix / 'bin').mkdir()
+        (prefix / 'bin' / 'demo-cli').write_text("#!/old/python\nprint('cli')\n")
+        (prefix / 'bin' / 'demo-tool').write_text("#!/old/python\nprint('tool')\n")
+        (dist_info / 'METADATA').write_text("Metadata-Version: 2.1\nName: demo-pkg\nVersion: 1.0\n\nBody: ignored\n")
+        (dist_info / 'WHEEL').write_text("Wheel-Version: 1.0\nTag: py3-none-any\n")
+        (dist_info / 'entry_points.txt').write_text("[console_scripts]\ndemo-cli = demo_pkg:main\n")
+        (dist_info / 'RECORD').write_text("\n".join([
+            "demo_pkg.py,,", "../../../bin/demo-cli,,", "../../../bin/demo-tool,,",
+            "demo_pkg-1.0.dist-info/METADATA,,", "demo_pkg-1.0.dist-info/WHEEL,,",
+            "demo_pkg-1.0.dist-info/entry_points.txt,,", "demo_pkg-1.0.dist-info/INSTALLER,,",
+            "demo_pkg-1.0.dist-info/RECORD,,",
+        ]) + "\n")
+        pip_info = site_packages / 'pip-23.0.dist-info'
+        pip_info.mkdir()
+        (pip_info / 'METADATA').write_text("Name: pip\nVersion: 23.0\n")
+        
+        dists = manager.export_installed(site_packages)
+        assert [(dist['name'], dist['version']) for dist in dists] == [('demo-pkg', '1.0')]
+        
+        wheel_dir = Path(temp_dir) / 'wheels'
+        wheel = manager.repack_wheel(prefix, site_packages, dists[0], wheel_dir)
+        assert wheel.name == 'demo_pkg-1.0-py3-none-any.whl'
+        with zipfile.ZipFile(wheel) as archive:
+            names = archive.namelist()
+            assert 'demo_pkg.py' in names and 'demo_pkg-1.0.data/scripts/demo-tool' in names
+            assert 'demo_pkg-1.0.data/scripts/demo-cli' not in names
+            assert 'demo_pkg-1.0.dist-info/INSTALLER' not in names
+            assert names[-1] == 'demo_pkg-1.0.dist-info/RECORD'
+            assert archive.read('demo_pkg-1.0.data/scripts/demo-tool').startswith(b'#!python\n')
+        assert manager.repack_wheel(prefix, site_packages, dists[0], wheel_dir) == wheel
+        
+        # The repacked wheel installs offline
+        target = Path(temp_dir) / 'target'
+        subprocess.run([sys.executable, '-m', 'pip', 'install', '--no-index', '--no-deps', '--quiet',
+                        '--disable-pip-version-check', '--find-links', str(wheel_dir),
+                        '--target', str(target), 'demo-pkg==1.0'], check=True)
+        assert (target / 'demo_pkg.py').read_text() == "VALUE = 42\n"
+        
+        venv_dir = Path(temp_dir) / 'venv'
+        venv_dir.mkdir()
+        manifest = manager.write_manifest(Project('virtualenv', str(venv_dir)), dists)
+        assert manifest.read_text() == "demo-pkg==1.0\n"
+        
+        poetry_dir = Path(temp_dir) / 'poetry'
+        poetry_dir.mkdir()
+        (poetry_dir / 'pyproject.toml').write_text(
+            '[tool.poetry.dependencies]\npython = "^3.11"\n\n[build-system]\nrequires = ["poetry-core"]\n')
+        text = manager.write_manifest(Project('poetry', str(poetry_dir)), dists).read_text()
+        assert 'python = "^3.11"\ndemo-pkg = "1.0"\n\n[build-system]' in text
+        (poetry_dir / 'pyproject.toml').write_text('[project]\nname = "poetry"\ndependencies = [\n]\n')
+        text = manager.write_manifest(Project('poetry', str(poetry_dir)), dists).read_text()
+        assert 'dependencies = [\n    "demo-pkg==1.0",\n]' in text
+        
+        pipenv_dir = Path(temp_dir) / 'pipenv'
+        pipenv_dir.mkdir()
+        text = manager.write_manifest(Project('pipenv', str(pipenv_dir)), dists, '3.11').read_text()
+        assert '[packages]\ndemo-pkg = "==1.0"\n' in text and 'python_version = "3.11"' in text
+        
+    print("Migration export tests passed")
+    return True
+
+def test_bulk_migration():
+    """Test concurrent migration with a report and rollback of failures"""
+    print("\nTesting Bulk Migration")
+    print("=" * 50)
+    
+    with tempfile.TemporaryDirectory() as temp_dir:
+        manager = make_isolated_manager(temp_dir)
+        for name, tool in [('api', 'pipenv'), ('web', 'pipenv'), ('done', 'poetry'), ('other', 'pipenv')]:
+            manager.register_project(name, {'tool': tool, 'path': str(Path(temp_dir) / 'old' / name),
+                                            'created': temp_dir, 'tags': ['team'] if name != 'other' else []})
+        
+        def fake_migrate(name, new_tool, new_name, jobs=None):
+            new_path = Path.cwd() / new_name
+            new_path.mkdir()
+            manager.register_project(new_name, {'tool': new_tool, 'path': str(new_path), 'created': str(new_path)})
+            return "pip install failed" if name == 'web' else None
+        
+        manager._migrate = fake_migrate
+        report_file = Path(temp_dir) / 'report.json'
+        cwd = os.getcwd()
+        os.chdir(temp_dir)
+        try:
+            with redirect_stdout(io.StringIO()):
+                assert not manager.migrate_projects('poetry', tags=['team'], jobs=2, report_file=str(report_file))
+        finally:
+            os.chdir(cwd)
+        
+        report = json.loads(report_file.read_text())
+        statuses = {entry['name']: entry['status'] for entry in report['projects']}
+        assert statuses == {'api': 'migrated', 'web': 'rolled_back', 'done': 'skipped'}
+        assert report['migrated'] == 1 and report['rolled_back'] == 1 and report['skipped'] == 1
+        projects = manager.config['projects']
+        # Sources keep their registrations; migrated projects get their own names
+        assert {entry['new_name'] for entry in report['projects']} >= {'api-poetry', 'web-poetry'}
+        assert projects['api'].tool == 'pipenv' and projects['api-poetry'].tool == 'poetry'
+        assert projects['web'].tool == 'pipenv' and 'web-poetry' not in projects
+        assert (Path(temp_dir) / 'api-poetry').exists() and not (Path(temp_dir) / 'web-poetry').exists()
+        assert projects['other'].tool == 'pipenv'
+        with redirect_stdout(io.StringIO()):
+            assert manager._migration_name('api', 'poetry') == 'api-poetry-2'
+            assert manager._start_create('api', 'pipenv', Path(temp_dir) / 'elsewhere', Path(temp_dir), None) is None
+            assert not manager.migrate_project('api', 'poetry', assume_yes=True, new_name='api')
+            assert not manager.migrate_project('api', 'poetry', assume_yes=True, new_name='other')
+        assert projects['api'].tool == 'pipenv' and projects['other'].tool == 'pipenv'
+        
+    print("Bulk migration tests passed")
+    return True
+
+def test_env_cache():
+    """Test cached pipenv/poetry environment locations and their stat revalidation"""
+    print("\nTesting Environment Cache")
+    print("=" * 50)
+    
+    with tempfile.TemporaryDirectory() as temp_dir:
+        manager = make_isolated_manager(temp_dir)
+        envs = {}
+        for name in ('api', 'web'):
+            envs[name] = Path(temp_dir) / 'central' / f'{name}-abc123'
+            python = manager.get_venv_python(envs[name])
+            python.parent.mkdir(parents=True)
+            python.write_text('')
+            (envs[name] / 'pyvenv.cfg').write_text('home = /usr/bin\n')
+            manager.register_project(name, {'tool': 'pipenv', 'path': str(Path(temp_dir) / name), 'created': temp_dir})
+        
+        resolved = []
+        def fake_resolve(project):
+            resolved.append(project.path)
+            return envs[Path(project.path).name]
+        manager._resolve_env_path = fake_resolve
+        
+        with redirect_stdout(io.StringIO()):
+            assert manager.refresh_envs(jobs=2)
+        assert len(resolved) == 2
+        reloaded = make_isolated_manager(temp_dir)
+        assert reloaded.config['projects']['api'].env == str(envs['api'])
+        assert reloaded.config['projects']['api'].interpreter == str(manager.get_venv_python(envs['api']))
+        
+        # Cached locations are trusted while they still exist on disk
+        reloaded._resolve_env_path = fake_resolve
+        assert reloaded.get_env_path('api') == envs['api'] and len(resolved) == 2
+        assert reloaded._is_owned_venv(envs['web'])
+        assert reloaded.path_index.lookup(Path(temp_dir) / 'api')['venv'] == str(envs['api'])
+        
+        manager.get_venv_python(envs['api']).unlink()
+        assert reloaded.get_env_path('api') == envs['api'] and len(resolved) == 3
+        
+    print("Environment cache tests passed")
+    return True
+
+def test_tool_bootstrap():
+    """Test pinned, side-by-side tool installation from a local wheelhouse"""
+    print("\nTesting Tool Bootstrap")
+    print("=" * 50)
+    
+    with tempfile.TemporaryDirectory() as temp_dir:
+        manager = make_isolated_manager(temp_dir)
+        wheelhouse = Path(temp_dir) / 'wheelhouse'
+        wheelhouse.mkdir()
+        # Stand-in virtualenv distributions whose console script only reports a version
+        for version in ('98.0', '99.0'):
+            info = f'virtualenv-{version}.dist-info'
+            with zipfile.ZipFile(wheelhouse / f'virtualenv-{version}-py3-none-any.whl', 'w') as wheel:
+                wheel.writestr('fake_virtualenv.py', f"def main():\n    print('virtualenv {version}')\n")
+                wheel.writestr(f'{info}/METADATA', f"Metadata-Version: 2.1\nName: virtualenv\nVersion: {version}\n")
+                wheel.writestr(f'{info}/WHEEL', "Wheel-Version: 1.0\nRoot-Is-Purelib: true\nTag: py3-none-any\n")
+                wheel.writestr(f'{info}/entry_points.txt', "[console_scripts]\nvirtualenv = fake_virtualenv:main\n")
+                wheel.writestr(f'{info}/RECORD', "")
+        
+        with redirect_stdout(io.StringIO()):
+            assert not manager.bootstrap_tools(['virtualenv'], wheelhouse=str(Path(temp_dir) / 'missing'))
+            assert manager.bootstrap_tools(['virtualenv==98.0'], wheelhouse=str(wheelhouse))
+            assert manager.bootstrap_tools(['virtualenv==99.0'], wheelhouse=str(wheelhouse))
+        
+        assert manager.installed_tool_versions('virtualenv') == ['98.0', '99.0']
+        command = manager.tool_command('virtualenv')
+        assert command == [str(manager.tool_executable('virtualenv', '99.0'))]
+        assert subprocess.run(command + ['--version'], capture_output=True, text=True).stdout.strip() == 'virtualenv 99.0'
+        assert manager.check_tool_installed('virtualenv')
+        
+        # Switching the pin back selects the other installation without reinstalling
+        manager.pin_tool('virtualenv', '98.0')
+        assert make_isolated_manager(temp_dir).tool_command('virtualenv') == [str(manager.tool_executable('virtualenv', '98.0'))]
+        
+        # A version that fails to install is never pinned
+        with redirect_stdout(io.StringIO()):
+            assert not manager.bootstrap_tools(['virtualenv==9.9.9'], wheelhouse=str(wheelhouse))
+        assert manager.tool_version('virtualenv') == '98.0'
+        assert make_isolated_manager(temp_dir).tool_version('virtualenv') == '98.0'
+        # A pinned version must be installed in isolation; a tool on PATH does not satisfy it
+        manager.config.setdefault('tool_paths', {})['virtualenv'] = sys.executable
+        manager.pin_tool('virtualenv', '97.0')
+        assert not manager.check_tool_installed('virtualenv')
+        manager.pin_tool('virtualenv', '98.0')
+        assert manager.check_tool_installed('virtualenv')
+        
+        if not manager.is_windows:
+            # Tools found on PATH are probed once and then run through a cached absolute path
+            bin_dir = Path(temp_dir) / 'bin'
+            bin_dir.mkdir()
+            (bin_dir / 'pipenv').write_text("#!/bin/sh\necho 'pipenv, version 1.0'\n")
+            (bin_dir / 'pipenv').chmod(0o755)
+            old_path = os.environ['PATH']
+            os.environ['PATH'] = f"{bin_dir}{os.pathsep}{old_path}"
+            try:
+                assert manager.check_tool_installed('pipenv')
+            finally:
+                os.environ['PATH'] = old_path
+            assert make_isolated_manager(temp_dir).tool_command('pipenv') == [str(bin_dir / 'pipenv')]
+        
+    print("Tool bootstrap tests passed")
+    return True
+
+def test_ephemeral_envs():
+    """Test ephemeral venvs cloned from a template, run-and-destroy and TTL expiry"""
+    print("\nTesting Ephemeral Environments")
+    print("=" * 50)
+    
+    with tempfile.TemporaryDirectory() as temp_dir:
+        manager = make_isolated_manager(temp_dir)
+        manager.config['ephemeral_root'] = str(Path(temp_dir) / 'shm')
+        template = Path(temp_dir) / 'base'
+        subprocess.run([sys.executable, '-m', 'venv', '--without-pip', str(template)], check=True)
+        manager.register_project('base', {'tool': 'virtualenv', 'path': str(template), 'created': temp_dir})
+        
+        with redirect_stdout(io.StringIO()):
+            assert manager.create_ephemeral('ci', template='base', ttl=-1)
+        clone = Path(temp_dir) / 'shm' / 'ci'
+        if hasattr(os, 'getuid'):
+            # The root is private, and the default one is per user
+            assert (Path(temp_dir) / 'shm').stat().st_mode & 0o777 == 0o700
+            default = make_isolated_manager(temp_dir)
+            del default.config['ephemeral_root']
+            assert default.ephemeral_root.name == f'venv_manager-{os.getuid()}'
+        activate = clone / ('Scripts/activate.bat' if manager.is_windows else 'bin/activate')
+        assert str(clone) in activate.read_text() and str(template) not in activate.read_text()
+        assert manager.config['projects']['ci'].expires < time.time()
+        
+        with redirect_stdout(io.StringIO()):
+            assert manager.gc([], assume_yes=True)
+        assert 'ci' not in manager.config['projects'] and not clone.exists()
+        assert 'base' in manager.config['projects']
+        
+        output = io.StringIO()
+        with redirect_stdout(output):
+            assert manager.run_ephemeral(['python', '-c', 'import sys; print(sys.prefix)'], template='base', name='job')
+            assert not manager.run_ephemeral(['python', '-c', 'raise SystemExit(3)'], template='base', name='job')
+        assert str(Path(temp_dir) / 'shm' / 'job') in output.getvalue()
+        assert 'job' not in manager.config['projects'] and not (Path(temp_dir) / 'shm' / 'job').exists()
+        
+        # A failed run never destroys a live ephemeral environment that happens to share its name
+        with redirect_stdout(io.StringIO()):
+            assert manager.create_ephemeral('shared', template='base')
+            assert not manager.run_ephemeral(['python', '-V'], template='base', name='shared')
+            assert not manager.run_ephemeral(['python', '-V'], template='missing', name='shared')
+        assert 'shared' in manager.config['projects'] and (Path(temp_dir) / 'shm' / 'shared').exists()
+        
+        # Sibling paths that merely start with the source path are not rewritten
+        sibling = f"{template}2/lib\n{template}/lib\n"
+        scripts = 'Scripts' if manager.is_windows else 'bin'
+        (template / scripts / 'paths.txt').write_text(sibling)
+        with redirect_stdout(io.StringIO()):
+            assert manager.create_ephemeral('copy', template='base')
+        clone = Path(temp_dir) / 'shm' / 'copy'
+        assert (clone / scripts / 'paths.txt').read_text() == f"{template}2/lib\n{clone}/lib\n"
+        
+    print("Ephemeral environment tests passed")
+    return True
+
+def test_profile_command():
+    """Test the profiler's pstats output and per-method child process attribution"""
+    print("\nTesting Command Profiler")
+    print("=" * 50)
+    
+    with tempfile.TemporaryDirectory() as temp_dir:
+        manager = make_isolated_manager(temp_dir)
+        stats_file = Path(temp_dir) / 'profile.pstats'
+        
+        def command():
+            manager._run([sys.executable, '-c', 'import time; time.sleep(0.2)'])
+            manager._probe_interpreters([Path(sys.executable)], jobs=2)
+        
+        with redirect_stdout(io.StringIO()):
+            venv_manager_core.profile_command(command, 'test', str(stats_file))
+        assert venv_manager_core.VenvManager.child_wait is None
+        assert pstats.Stats(str(stats_file)).total_calls > 0
+        
+        rows = {}
+        for line in stats_file.with_suffix('.txt').read_text().splitlines():
+            parts = line.split()
+            if len(parts) == 5 and parts[0] in ('_run', '_probe_interpreters'):
+                rows[parts[0]] = parts
+        # The pool worker's subprocess counts towards the method the main thread waits in
+        assert float(rows['_run'][3]) >= 0.2
+        assert float(rows['_probe_interpreters'][3]) > 0
+        
+    print("Command profiler tests passed")
+    return True
+
+def test_operation_metrics():
+    """Test operation metrics and the cumulative Prometheus textfile"""
+    print("\nTesting Operation Metrics")
+    print("=" * 50)
+    
+    with tempfile.TemporaryDirectory() as temp_dir:
+        metrics_file = Path(temp_dir) / 'textfile' / 'venv_manager.prom'
+        template = Path(temp_dir) / 'base'
+        subprocess.run([sys.executable, '-m', 'venv', '--without-pip', str(template)], check=True)
+        
+        for run in range(2):
+            manager = make_isolated_manager(temp_dir)
+            manager.config['ephemeral_root'] = str(Path(temp_dir) / 'shm')
+            manager.register_project('base', {'tool': 'virtualenv', 'path': str(template), 'created': temp_dir})
+            manager.metrics = OperationMetrics()
+            with redirect_stdout(io.StringIO()):
+                assert manager.create_ephemeral(f'ci{run}', template='base')
+                assert not manager.update_dependencies('missing')
+            manager.metrics.write(metrics_file)
+        
+        samples = {}
+        for line in metrics_file.read_text().splitlines():
+            if not line.startswith('#'):
+                key, value = line.rsplit(' ', 1)
+                samples[key] = float(value)
+        # Counters accumulate across runs through the persisted state
+        assert samples['venv_manager_operations_total{operation="create_ephemeral"}'] == 2
+        assert samples['venv_manager_operation_failures_total{operation="create_ephemeral"}'] == 0
+        assert samples['venv_manager_operation_failures_total{operation="update"}'] == 2
+        assert samples['venv_manager_operation_bytes_written_total{operation="create_ephemeral"}'] > 0
+        assert samples['venv_manager_operation_duration_seconds_bucket{operation="update",le="+Inf"}'] == 2
+        assert samples['venv_manager_operation_duration_seconds_count{operation="create_ephemeral"}'] == 2
+        assert '# TYPE venv_manager_operation_duration_seconds histogram' in metrics_file.read_text()
+        
+        # Only what an operation adds counts as written, not what the directory already held
+        grown = Path(temp_dir) / 'grown'
+        grown.mkdir()
+        (grown / 'old.bin').write_bytes(b'x' * 4096)
+        
+        class Writer:
+            _dir_size = staticmethod(VenvManager._dir_size)
+            metrics = OperationMetrics()
+            
+            @venv_manager_core.operation('append', target=lambda self, arguments: [arguments['path']])
+            def append(self, path):
+                (path / 'new.bin').write_bytes(b'y' * 100)
+                return True
+        
+        assert Writer().append(grown)
+        assert Writer.metrics.operations['append']['bytes'] == 100
+        
+        # An update counts what it installed into the project's environment
+        upgraded = Path(temp_dir) / 'upgraded'
+        subprocess.run([sys.executable, '-m', 'venv', '--without-pip', str(upgraded)], check=True)
+        manager = make_isolated_manager(temp_dir)
+        manager.register_project('upgraded', {'tool': 'virtualenv', 'path': str(upgraded), 'created': temp_dir})
+        manager.metrics = OperationMetrics()
+        
+        def install(cmd, **kwargs):
+            (upgraded / 'installed.bin').write_bytes(b'z' * 2048)
+            return subprocess.CompletedProcess(cmd, 0)
+        
+        manager._run = install
+        with redirect_stdout(io.StringIO()):
+            assert manager.update_dependencies('upgraded')
+        assert manager.metrics.operations['update']['bytes'] == 2048
+        
+        # Concurrent writers serialize their merges, so no run's observations are lost
+        def record(_):
+            metrics = OperationMetrics()
+            metrics.observe('parallel', 0.01, True)
+            metrics.write(metrics_file)
+        
+        with ThreadPoolExecutor(max_workers=8) as pool:
+            list(pool.map(record, range(16)))
+        state = json.loads(metrics_file.with_name(f'{metrics_file.name}.state.json').read_text())
+        assert state['parallel']['count'] == 16
+        
+    print("Operation metrics tests passed")
+    return True
+
+def test_history_log():
+    """Test the rotated operation history and its indexed queries"""
+    print("\nTesting History Log")
+    print("=" * 50)
+    
+    with tempfile.TemporaryDirectory() as temp_dir:
+        manager = make_isolated_manager(temp_dir)
+        manager.config['history_segment_bytes'] = 1024
+        manager.config['history_segments'] = 3
+        for i in range(60):
+            project = 'api' if i % 2 else 'web'
+            manager.record_history('update', project, float(i), i % 5)
+        
+        history = manager.history
+        segments = history.segments()
+        # Old segments are dropped once the limit is reached
+        assert len(segments) == 3 and segments[0] > 1
+        for number in segments:
+            assert history._segment_file(number, '.idx').exists()
+        
+        slowest = history.query('api', slowest=3)
+        assert [record['duration'] for record in slowest] == [59.0, 57.0, 55.0]
+        assert all(record['project'] == 'api' for record in slowest)
+        recent = history.query('web', limit=2)
+        assert [record['duration'] for record in recent] == [56.0, 58.0]
+        assert recent[-1]['command'] == 'update' and recent[-1]['subprocesses'] == 0
+        assert history.query('missing') == []
+        
+        output = io.StringIO()
+        with redirect_stdout(output):
+            assert manager.show_history('api', slowest=2, output_format='jsonl')
+        assert [json.loads(line)['duration'] for line in output.getvalue().splitlines()] == [59.0, 57.0]
+        
+        # Failed operations exit non-zero, which is also what the history records
+        (Path(temp_dir) / 'app').mkdir()
+        manager.check_tool_installed = lambda tool: True
+        args = argparse.Namespace(interactive=False, command='create', name='app', tool='virtualenv', python=None,
+                                  ephemeral=False, tag=[], jobs=None)
+        cwd = os.getcwd()
+        os.chdir(temp_dir)
+        try:
+            with redirect_stdout(io.StringIO()):
+                try:
+                    venv_manager_core.dispatch(manager, args, None, [])
+                    assert False, "create of an existing directory should exit 1"
+                except SystemExit as e:
+                    assert e.code == 1
+                args.command = 'update'
+                try:
+                    venv_manager_core.dispatch(manager, args, None, [])
+                    assert False, "update of an unknown project should exit 1"
+                except SystemExit as e:
+                    assert e.code == 1
+        finally:
+            os.chdir(cwd)
+        
+    print("History log tests passed")
+    return True
+
+def test_output_streaming():
+    """Test prefixed streaming, bounded output tails and per-job logs"""
+    print("\nTesting Output Streaming")
+    print("=" * 50)
+    
+    with tempfile.TemporaryDirectory() as temp_dir:
+        manager = make_isolated_manager(temp_dir)
+        manager.config['output_tail_bytes'] = 1024
+        script = "import sys\nfor i in range(2000): print(f'line {i:05d}', file=sys.stderr if i % 2 else sys.stdout)"
+        
+        output = io.StringIO()
+        with redirect_stdout(output):
+            with manager.job('alpha'):
+                proc = manager._run([sys.executable, '-c', script], check=True)
+                captured = manager._run([sys.executable, '-c', 'print("quiet")'], capture_output=True, text=True)
+        echoed = output.getvalue().splitlines()
+        assert len(echoed) == 2000 and all(line.startswith('[alpha] line ') for line in echoed)
+        # Only the tail stays in memory, the full output is in the job log
+        assert len(proc.stdout) <= 1024 and proc.stdout.endswith('line 01999\n')
+        log = (manager.log_dir / 'alpha.log').read_text()
+        assert sum(1 for line in log.splitlines() if line.startswith('line ')) == 2000
+        assert captured.stdout == 'quiet\n' and 'quiet' not in log
+        
+        with redirect_stdout(io.StringIO()):
+            with manager.job('beta'):
+                try:
+                    manager._run([sys.executable, '-c', 'print("boom"); raise SystemExit(3)'], check=True)
+                    assert False, "check=True should raise"
+                except subprocess.CalledProcessError as e:
+                    assert e.returncode == 3 and e.output == 'boom\n'
+            results = manager._run_matrix({
+                'ok': [sys.executable, '-c', 'print("fine")'],
+                'bad': [sys.executable, '-c', 'raise SystemExit(2)'],
+            })
+        assert results['ok']['returncode'] == 0 and results['ok']['output'] == 'fine\n'
+        assert results['bad']['returncode'] == 2
+        assert {path.name for path in manager.log_dir.iterdir()} == {'alpha.log', 'beta.log', 'ok.log', 'bad.log'}
+        
+    print("Output streaming tests passed")
+    return True
+
+def test_async_manager():
+    """Test AsyncVenvManager results, concurrency and cancellation"""
+    print("\nTesting Async Manager")
+    print("=" * 50)
+    
+    with tempfile.TemporaryDirectory() as temp_dir:
+        manager = make_isolated_manager(temp_dir)
+        # A stand-in virtualenv that creates a bare venv, and sleeps first for names starting with 'slow'
+        fake = Path(temp_dir) / 'fake-virtualenv'
+        fake.write_text(f"#!{sys.executable}\n"
+                        "import subprocess, sys, time\nfrom pathlib import Path\n"
+                        "if Path(sys.argv[1]).name.startswith('slow'):\n"
+                        "    Path(sys.argv[1]).mkdir()\n    time.sleep(30)\n"
+                        "print('creating', sys.argv[1])\n"
+                        "subprocess.run([sys.executable, '-m', 'venv', '--without-pip', sys.argv[1]], check=True)\n")
+        fake.chmod(0o755)
+        manager.config['tool_paths'] = {'virtualenv': str(fake)}
+        base = Path(temp_dir) / 'projects'
+        base.mkdir()
+        service = AsyncVenvManager(manager, concurrency=4)
+        
+        async def scenario():
+            results = await asyncio.gather(*(
+                service.create(f'env{i}', 'virtualenv', base_dir=base, tags=['svc']) for i in range(6)))
+            duplicate = await service.create('env0', 'virtualenv', base_dir=base)
+            # pip is missing from the bare venvs, so the update fails with a structured error
+            update = await service.update('env0')
+            missing = await service.update('missing')
+            
+            task = asyncio.ensure_future(service.create('slow', 'virtualenv', base_dir=base))
+            while not (base / 'slow').exists():
+                await asyncio.sleep(0.05)
+            task.cancel()
+            started = time.perf_counter()
+            try:
+                await task
+                assert False, "the cancelled creation should raise"
+            except asyncio.CancelledError:
+                pass
+            return results, duplicate, update, missing, time.perf_counter() - started
+        
+        async def naming():
+            manager.register_project('matrix', {'tool': 'virtualenv', 'path': str(base / 'matrix'), 'created': temp_dir,
+                                                'matrix': {'3.10': str(base / 'm310'), '3.11': str(base / 'm311')}})
+            taken = await service.migrate('env0', 'pipenv', new_name='env1')
+            return taken, await service._resolve_env('matrix')
+        
+        results, duplicate, update, missing, cancel_time = asyncio.run(scenario())
+        taken, matrix_env = asyncio.run(naming())
+        assert not taken.ok and 'already registered' in taken.error
+        # Refused operations are timed and recorded too, so history sees every operation
+        records = manager.history.query(None, limit=100)
+        assert {'create', 'update', 'migrate'} <= {record['command'] for record in records if record['status'] == 1}
+        assert taken.duration > 0 and duplicate.duration > 0
+        assert manager.config['projects']['env1'].tool == 'virtualenv'
+        assert manager._migration_name('env0', 'pipenv') == 'env0-pipenv'
+        assert matrix_env == base / 'm311'
+        assert all(isinstance(result, OperationResult) and result.ok for result in results)
+        assert results[0].processes[0].returncode == 0 and 'creating' in results[0].output
+        assert sorted(manager.index.query(tags=['svc'])) == [f'env{i}' for i in range(6)]
+        assert (base / 'env3' / 'pyvenv.cfg').exists()
+        assert not duplicate.ok and 'already exists' in duplicate.error
+        assert not update.ok and 'pip' in update.output and update.error.startswith('python')
+        assert not missing.ok and missing.processes == []
+        # Cancelling killed the sleeping child and removed its directory
+        assert cancel_time < 5
+        assert not (base / 'slow').exists() and 'slow' not in manager.config['projects']
+        
+    print("Async manager tests passed")
+    return True
+
+def test_shared_cache():
+    """Test the shared cache's locking, atomic publishing, permissions and users"""
+    print("\nTesting Shared Cache")
+    print("=" * 50)
+    
+    with tempfile.TemporaryDirectory() as temp_dir:
+        manager = make_isolated_manager(temp_dir)
+        manager.config['shared_cache'] = str(Path(temp_dir) / 'shared')
+        manager.config['ephemeral_root'] = str(Path(temp_dir) / 'shm')
+        cache = manager.cache
+        assert cache.shared and cache.root == Path(temp_dir) / 'shared'
+        wheels = cache.section('wheels')
+        assert wheels.stat().st_mode & 0o7777 == 0o2775
+        
+        # Concurrent writers of one entry build it once and readers never see a partial file
+        builds = []
+        entry = wheels / 'demo-1.0-py3-none-any.whl'
+        
+        def populate(_):
+            with cache.lock(entry):
+                if not entry.exists():
+                    builds.append(1)
+                    cache.publish_file(entry, lambda f: (time.sleep(0.05), f.write(b'x' * 4096)))
+            return entry.read_bytes()
+        
+        with ThreadPoolExecutor(max_workers=8) as pool:
+            contents = list(pool.map(populate, range(16)))
+        assert len(builds) == 1 and all(content == b'x' * 4096 for content in contents)
+        assert entry.stat().st_mode & 0o777 == 0o664
+        assert [path.name for path in wheels.iterdir()] == [entry.name]
+        
+        # Interpreter probes are shared and reused while the binary is unchanged
+        first = manager._probe_interpreters([Path(sys.executable)])
+        count = manager.subprocess_count
+        other = make_isolated_manager(temp_dir)
+        other.config['shared_cache'] = manager.config['shared_cache']
+        assert other._probe_interpreters([Path(sys.executable)]) == first
+        assert first[Path(sys.executable)] == '.'.join(map(str, sys.version_info[:3]))
+        assert other.subprocess_count == 0 and count == 1
+        
+        template = Path(temp_dir) / 'base'
+        subprocess.run([sys.executable, '-m', 'venv', '--without-pip', str(template)], check=True)
+        manager.register_project('base', {'tool': 'virtualenv', 'path': str(template), 'created': temp_dir})
+        with redirect_stdout(io.StringIO()):
+            assert manager.publish_template('base')
+            # Publishing again swaps the entry atomically
+            assert manager.publish_template('base')
+            manager.unregister_project('base')
+            other.config['ephemeral_root'] = manager.config['ephemeral_root']
+            assert other.create_ephemeral('tmp1', template='base')
+        published = cache.root / 'templates' / 'base'
+        assert str(published) in (published / 'bin' / 'activate').read_text()
+        clone = Path(temp_dir) / 'shm' / 'tmp1'
+        activate = (clone / 'bin' / 'activate').read_text()
+        assert str(clone) in activate and str(published) not in activate
+        assert not [path for path in published.parent.iterdir() if path.name.startswith('.')]
+        
+        # A shared root that cannot be created falls back to the per-user data directory
+        (Path(temp_dir) / 'file').write_text('')
+        fallback = make_isolated_manager(temp_dir)
+        fallback.config['shared_cache'] = str(Path(temp_dir) / 'file' / 'cache')
+        with redirect_stderr(io.StringIO()):
+            assert not fallback.cache.shared and fallback.cache.root == fallback.data_dir
+        
+    print("Shared cache tests passed")
+    return True
+
+def test_wheel_build_cache():
+    """Test the wheel build cache keyed by interpreter ABI and platform"""
+    print("\nTesting Wheel Build Cache")
+    print("=" * 50)
+    
+    with tempfile.TemporaryDirectory() as temp_dir:
+        # A stand-in interpreter: probes run for real, 'pip wheel' writes a dummy wheel and logs the build
+        builds = Path(temp_dir) / 'builds.log'
+        python = Path(temp_dir) / 'python'
+        python.write_text(f"#!{sys.executable}\n"
+                          "import sys, time\nfrom pathlib import Path\n"
+                          "if sys.argv[1] == '-c':\n    exec(sys.argv[2])\n    sys.exit(0)\n"
+                          "args = sys.argv[1:]\nname, version = args[-1].split('==')\n"
+                          "if name == 'broken':\n    print('error: no sdist'); sys.exit(1)\n"
+                          f"with open({str(builds)!r}, 'a') as f:\n    f.write(args[-1] + '\\n')\n"
+                          "time.sleep(0.2)\n"
+                          "wheel_dir = Path(args[args.index('--wheel-dir') + 1])\n"
+                          "(wheel_dir / f\"{name.replace('-', '_')}-{version}-cp3-cp3-linux_x86_64.whl\").write_bytes(b'w')\n")
+        python.chmod(0o755)
+        
+        requirements = VenvManager.pinned_requirements([
+            'Foo-Bar==1.0  # pinned', 'baz == 2.0', 'broken==1', 'ranged>=1', '-r other.txt', 'marker==1; python_version<"3"'])
+        assert requirements == ['Foo-Bar==1.0', 'baz==2.0', 'broken==1']
+        
+        manager = make_isolated_manager(temp_dir)
+        with redirect_stdout(io.StringIO()):
+            wheels = manager.build_wheels(python, requirements, jobs=3)
+        wheel_dir = manager.wheel_cache_dir(python)
+        assert wheel_dir.parent == manager.cache.root / 'built'
+        assert sysconfig.get_platform().replace('-', '_') in wheel_dir.name.replace('-', '_')
+        assert wheels['Foo-Bar==1.0'] == wheel_dir / 'Foo_Bar-1.0-cp3-cp3-linux_x86_64.whl'
+        assert wheels['baz==2.0'].exists() and wheels['broken==1'] is None
+        assert not [path for path in wheel_dir.iterdir() if path.name.startswith('.')]
+        assert str(wheel_dir) in manager.pip_environ(python, {'PIP_FIND_LINKS': '/srv/wheels'})['PIP_FIND_LINKS']
+        
+        # Cached wheels are reused, and concurrent managers build a new wheel once
+        others = [make_isolated_manager(temp_dir) for _ in range(4)]
+        with redirect_stdout(io.StringIO()):
+            with ThreadPoolExecutor(max_workers=4) as pool:
+                results = list(pool.map(lambda other: other.build_wheels(python, ['foo_bar==1.0', 'qux==3']), others))
+        assert all(result['qux==3'] == wheel_dir / 'qux-3-cp3-cp3-linux_x86_64.whl' for result in results)
+        assert sorted(builds.read_text().split()) == ['Foo-Bar==1.0', 'baz==2.0', 'qux==3']
+        
+    print("Wheel build cache tests passed")
+    return True
+
+def make_wheel(directory, name, version, files, entry_points=''):
+    """Write a minimal pure-Python wheel and return its path and sha256"""
+    dist_info = f'{name}-{version}.dist-info'
+    contents = dict(files)
+    contents[f'{dist_info}/METADATA'] = f'Metadata-Version: 2.1\nName: {name}\nVersion: {version}\n'
+    contents[f'{dist_info}/WHEEL'] = 'Wheel-Version: 1.0\nRoot-Is-Purelib: true\nTag: py3-none-any\n'
+    if entry_points:
+        contents[f'{dist_info}/entry_points.txt'] = entry_points
+    wheel = Path(directory) / f'{name}-{version}-py3-none-any.whl'
+    with zipfile.ZipFile(wheel, 'w') as archive:
+        for arcname, text in contents.items():
+            archive.writestr(arcname, text)
+        archive.writestr(f'{dist_info}/RECORD', ''.join(f'{arcname},,\n' for arcname in contents)
+                         + f'{dist_info}/RECORD,,\n')
+    return wheel, hashlib.sha256(wheel.read_bytes()).hexdigest()
+
+def test_lock_install():
+    """Test hash-verified parallel wheel unpacking for install --lock"""
+    print("\nTesting Lock Install")
+    print("=" * 50)
+    
+    with tempfile.TemporaryDirectory() as temp_dir:
+        manager = make_isolated_manager(temp_dir)
+        venv_path = Path(temp_dir) / 'app'
+        subprocess.run([sys.executable, '-m', 'venv', str(venv_path)], check=True)
+        manager.register_project('app', {'tool': 'virtualenv', 'path': str(venv_path), 'created': temp_dir})
+        downloads = manager.cache.section('downloads')
+        old, old_hash = make_wheel(downloads, 'demo', '0.9', {'demo/__init__.py': 'VERSION = "0.9"\n',
+                                                             'demo/legacy.py': ''})
+        demo, demo_hash = make_wheel(downloads, 'demo', '1.0', {
+            'demo/__init__.py': 'def main():\n    print("demo 1.0")\n',
+            'demo-1.0.data/scripts/demo-tool': '#!python\nprint("tool")\n',
+        }, entry_points='[console_scripts]\ndemo = demo:main\n')
+        other, other_hash = make_wheel(downloads, 'other_pkg', '2.0', {'other_pkg.py': 'X = 1\n'})
+        
+        lock = Path(temp_dir) / 'requirements.lock'
+        lock.write_text(f"demo==0.9 \\\n    --hash=sha256:{old_hash}\n")
+        with redirect_stdout(io.StringIO()):
+            assert manager.install_lock('app', str(lock))
+        lock.write_text(
+            "# generated\n"
+            f"demo==1.0 \\\n    --hash=sha256:{'0' * 64} \\\n    --hash=sha256:{demo_hash}\n"
+            f"Other-Pkg==2.0 --hash=sha256:{other_hash}  # via demo\n"
+            f"skipped==1.0 ; python_version < '3' --hash=sha256:{'1' * 64}\n")
+        output = io.StringIO()
+        with redirect_stdout(output):
+            assert manager.install_lock('app', str(lock), jobs=4)
+        assert '2 wheels unpacked' in output.getvalue() and '1 via pip' in output.getvalue()
+        
+        python = manager.get_venv_python(venv_path)
+        site_packages = Path(subprocess.run([str(python), '-c', 'import sysconfig; print(sysconfig.get_path("purelib"))'],
+                                            capture_output=True, text=True, check=True).stdout.strip())
+        # The upgrade removed the files of 0.9
+        assert not (site_packages / 'demo' / 'legacy.py').exists()
+        assert not (site_packages / 'demo-0.9.dist-info').exists()
+        assert subprocess.run([str(venv_path / 'bin' / 'demo')], capture_output=True, text=True).stdout == 'demo 1.0\n'
+        assert (venv_path / 'bin' / 'demo-tool').read_text().startswith(f'#!{python}')
+        dist_info = site_packages / 'demo-1.0.dist-info'
+        assert (dist_info / 'INSTALLER').read_text() == 'venv_manager\n'
+        for row in (dist_info / 'RECORD').read_text().splitlines():
+            path, digest, size = row.split(',')
+            if digest:
+                data = Path(os.path.normpath(site_packages / path)).read_bytes()
+                expected = base64.urlsafe_b64encode(hashlib.sha256(data).digest()).rstrip(b'=').decode()
+                assert digest == f'sha256={expected}' and int(size) == len(data)
+        
+        # pip sees the unpacked distributions and can uninstall them from their RECORD
+        listed = subprocess.run([str(python), '-m', 'pip', 'list', '--format=json', '--disable-pip-version-check'],
+                                capture_output=True, text=True, check=True).stdout
+        assert {'name': 'other_pkg', 'version': '2.0'} in json.loads(listed) or \
+               {'name': 'other-pkg', 'version': '2.0'} in json.loads(listed)
+        subprocess.run([str(python), '-m', 'pip', 'uninstall', '-y', 'demo'], capture_output=True, check=True)
+        assert not (site_packages / 'demo').exists() and not (venv_path / 'bin' / 'demo').exists()
+        
+        # A wheel whose hash the lock does not allow is never unpacked
+        entry = manager.parse_lock(f"other_pkg==2.0 --hash=sha256:{'2' * 64}\n")[0]
+        assert manager._verified_wheel(entry, manager._lock_candidates(python)) is None
+        for invalid in ("demo>=1.0 --hash=sha256:00\n", "demo==1.0\n"):
+            try:
+                manager.parse_lock(invalid)
+                assert False, "invalid locks should be rejected"
+            except ValueError:
+                pass
+        
+    print("Lock install tests passed")
+    return True
+
+def test_slim():
+    """Test slim profiles, RECORD rewriting and automatic slimming of production projects"""
+    print("\nTesting Slim")
+    print("=" * 50)
+    
+    with tempfile.TemporaryDirectory() as temp_dir:
+        manager = make_isolated_manager(temp_dir)
+        venv_path = Path(temp_dir) / 'svc'
+        subprocess.run([sys.executable, '-m', 'venv', str(venv_path)], check=True)
+        manager.register_project('svc', {'tool': 'virtualenv', 'path': str(venv_path), 'created': temp_dir,
+                                         'tags': ['production']})
+        wheel, digest = make_wheel(manager.cache.section('downloads'), 'fat', '1.0', {
+            'fat/__init__.py': 'VALUE = 1\n',
+            'fat/tests/__init__.py': '',
+            'fat/tests/test_big.py': 'x = 1\n' * 1000,
+            'fat/docs/guide.txt': 'doc\n' * 500,
+            'fat/_speedups.c': 'int x;\n' * 100,
+            # A public test-support subpackage and a tests package the package itself imports
+            'fat/test/__init__.py': 'class TestCase:\n    pass\n',
+            'fat/client.py': 'from fat.test import TestCase\n',
+            'fat/api/__init__.py': 'from .tests import helpers\n',
+            'fat/api/tests/__init__.py': '',
+            'fat/api/tests/helpers.py': 'HELP = 1\n',
+            'fat/examples/demo.py': 'print(1)\n',
+        })
+        lock = Path(temp_dir) / 'requirements.lock'
+        lock.write_text(f"fat==1.0 --hash=sha256:{digest}\n")
+        python = manager.get_venv_python(venv_path)
+        manager.config['slim_profile'] = 'safe'
+        output = io.StringIO()
+        with redirect_stdout(output):
+            # The production tag slims the environment right after the install
+            assert manager.install_lock('svc', str(lock))
+        assert '[SLIM]' in output.getvalue() and '(safe)' in output.getvalue()
+        assert not (venv_path / 'include').exists()
+        
+        cfg = manager.read_pyvenv_cfg(venv_path)
+        site_packages = manager._site_packages(venv_path, cfg)
+        env = dict(os.environ)
+        env.pop('PYTHONDONTWRITEBYTECODE', None)
+        subprocess.run([str(python), '-O', '-c', 'import fat.tests.test_big'], cwd=temp_dir, env=env, check=True)
+        assert list((site_packages / 'fat' / 'tests' / '__pycache__').glob('*.opt-1.pyc'))
+        
+        output = io.StringIO()
+        with redirect_stdout(output):
+            assert manager.slim_project('svc', 'standard', dry_run=True)
+        assert (site_packages / 'fat' / 'tests').exists() and 'Would remove' in output.getvalue()
+        with redirect_stdout(io.StringIO()):
+            assert not manager.slim_project('svc', 'unknown')
+            assert manager.slim_project('svc', 'standard')
+        assert not (site_packages / 'fat' / 'tests').exists() and not (site_packages / 'fat' / 'docs').exists()
+        assert (site_packages / 'fat' / '_speedups.c').exists() and (site_packages / 'fat' / '__init__.py').exists()
+        assert (site_packages / 'fat' / 'test').exists() and (site_packages / 'fat' / 'examples').exists()
+        assert (site_packages / 'fat' / 'api' / 'tests' / 'helpers.py').exists()
+        # pip itself keeps working and RECORD lists only files that still exist
+        record = (site_packages / 'fat-1.0.dist-info' / 'RECORD').read_text()
+        assert 'fat/tests' not in record and 'fat/docs' not in record and 'fat/__init__.py' in record
+        for pip_record in site_packages.glob('pip-*.dist-info/RECORD'):
+            for line in pip_record.read_text().splitlines():
+                path = line.split(',')[0]
+                assert path.startswith('..') or os.path.lexists(os.path.normpath(site_packages / path)), path
+        shown = subprocess.run([str(python), '-m', 'pip', 'show', '-f', 'fat', '--disable-pip-version-check'],
+                               capture_output=True, text=True, check=True).stdout
+        assert 'fat/__init__.py' in shown and 'fat/tests' not in shown and 'fat/api/tests/helpers.py' in shown
+        
+        with redirect_stdout(io.StringIO()):
+            assert manager.slim_project('svc', 'aggressive')
+        assert not (site_packages / 'fat' / '_speedups.c').exists()
+        assert not (site_packages / 'fat' / 'examples').exists()
+        # Imported by the package's own modules, so kept even by the aggressive profile
+        assert (site_packages / 'fat' / 'test').exists() and (site_packages / 'fat' / 'api' / 'tests').exists()
+        subprocess.run([str(python), '-c', 'import fat.client, fat.api'], cwd=temp_dir, check=True)
+        assert not list(site_packages.rglob('__pycache__'))
+        subprocess.run([str(python), '-m', 'pip', 'uninstall', '-y', 'fat'], capture_output=True, check=True)
+        assert not (site_packages / 'fat').exists()
+        
+    print("Slim tests passed")
+    return True
+
+def test_startup_profile():
+    """Test import-time measurement, registry baselines and regression flags after a sync"""
+    print("\nTesting Startup Profile")
+    print("=" * 50)
+    
+    sample = ("import time: self [us] | cumulative | imported package\n"
+              "import time:       120 |        120 | _io\n"
+              f"{venv_manager_core.VenvManager.STARTUP_MARKER}\n"
+              "import time:       300 |        300 |   slowdep\n"
+              "import time:       200 |        500 | app\n")
+    assert venv_manager_core.VenvManager.parse_importtime(sample) == [('slowdep', 1, 300, 300), ('app', 0, 200, 500)]
+    
+    with tempfile.TemporaryDirectory() as temp_dir:
+        manager = make_isolated_manager(temp_dir)
+        venv_path = Path(temp_dir) / 'svc'
+        subprocess.run([sys.executable, '-m', 'venv', '--without-pip', str(venv_path)], check=True)
+        manager.register_project('svc', {'tool': 'virtualenv', 'path': str(venv_path), 'created': temp_dir})
+        (venv_path / 'app.py').write_text('import slowdep, otherdep\n')
+        site_packages = manager._site_packages(venv_path, manager.read_pyvenv_cfg(venv_path))
+        (site_packages / 'slowdep.py').write_text('import time\ntime.sleep(0.01)\n')
+        (site_packages / 'otherdep.py').write_text('import time\ntime.sleep(0.03)\n')
+        # Timings are kept for the two slowest modules; slowdep is stored by name under the cutoff
+        manager.STARTUP_BASELINE_MODULES = 2
+        
+        output = io.StringIO()
+        with redirect_stdout(output):
+            assert not manager.startup_profile('svc', 'app; import os')
+            assert not manager.startup_profile('svc', 'missing_module', runs=1)
+            # The first measurement becomes the baseline, stored with the project
+            assert manager.startup_profile('svc', 'app', runs=3)
+        assert 'baseline for app saved' in output.getvalue() and 'slowdep' in output.getvalue()
+        baseline = make_isolated_manager(temp_dir).config['projects']['svc']['startup']['app']
+        assert baseline['import'] >= 40000 and set(baseline['modules']) == {'app', 'otherdep'}
+        assert 'slowdep' in baseline['imported'] and baseline['cutoff'] >= 10000
+        with redirect_stdout(io.StringIO()):
+            assert manager.startup_profile('svc', 'app', runs=3)
+        
+        # A dependency bump that adds import time is flagged by the next sync
+        (site_packages / 'slowdep.py').write_text('import time\nimport extradep\ntime.sleep(0.01)\n')
+        (site_packages / 'extradep.py').write_text('import time\ntime.sleep(0.1)\n')
+        output = io.StringIO()
+        with redirect_stdout(output):
+            manager._check_startup('svc')
+            assert not manager.startup_profile('svc', 'app', runs=1)
+        assert '[REGRESSION] app: total import' in output.getvalue()
+        assert 'extradep newly imported' in output.getvalue() and 'slowdep under' in output.getvalue()
+        
+        with redirect_stdout(io.StringIO()):
+            assert manager.startup_profile('svc', 'app', runs=3, baseline=True)
+            assert manager.startup_profile('svc', 'app', runs=3)
+        
+    print("Startup profile tests passed")
+    return True
+
+def test_audit():
+    """Test offline advisory scans: feed formats, version ranges, fix versions and output"""
+    print("\nTesting Audit")
+    print("=" * 50)
+    
+    key = venv_manager_core.VenvManager.version_key
+    assert key('1.0.dev1') < key('1.0a1') < key('1.0rc1') < key('1.0') == key('1.0.0') < key('1.0.post1') < key('1.1')
+    assert key('not a version') is None
+    
+    with tempfile.TemporaryDirectory() as temp_dir:
+        manager = make_isolated_manager(temp_dir)
+        installed = {'api': {'Requests': '2.25.0', 'urllib3': '1.26.5', 'flask': '2.3.3'},
+                     'worker': {'requests': '2.31.0', 'PyYAML': '5.3'}}
+        for name, packages in installed.items():
+            venv_path = Path(temp_dir) / name
+            subprocess.run([sys.executable, '-m', 'venv', '--without-pip', str(venv_path)], check=True)
+            site_packages = manager._site_packages(venv_path, manager.read_pyvenv_cfg(venv_path))
+            for package, version in packages.items():
+                (site_packages / f'{package}-{version}.dist-info').mkdir()
+            manager.register_project(name, {'tool': 'virtualenv', 'path': str(venv_path), 'created': temp_dir,
+                                            'tags': ['web'] if name == 'api' else None})
+        
+        feed = Path(temp_dir) / 'feed.json'
+        feed.write_text(json.dumps({'vulns': [
+            {'id': 'OSV-1', 'summary': 'Header leak', 'affected': [{'package': {'name': 'requests', 'ecosystem': 'PyPI'},
+             'ranges': [{'type': 'ECOSYSTEM', 'events': [{'introduced': '0'}, {'fixed': '2.31.0'}]}]}]},
+            {'id': 'OSV-2', 'details': 'Unsafe load\nmore', 'affected': [{'package': {'name': 'pyyaml'},
+             'ranges': [{'type': 'ECOSYSTEM', 'events': [{'introduced': '5.1'}, {'fixed': '5.4'}]}]}]},
+            {'id': 'OSV-3', 'affected': [{'package': {'name': 'requests', 'ecosystem': 'npm'}, 'versions': ['2.31.0']}]},
+            {'id': 'SIMPLE-1', 'package': 'urllib3', 'affected': ['<1.26.5', '>=2.0,<2.0.7'], 'fixed': ['1.26.5', '2.0.7']},
+            {'id': 'SIMPLE-2', 'package': 'flask', 'versions': ['2.3.3']},
+        ]}))
+        index = manager.load_advisories(str(feed))
+        assert sorted(index) == ['flask', 'pyyaml', 'requests', 'urllib3'] and len(index['requests']) == 1
+        
+        output = io.StringIO()
+        with redirect_stdout(output):
+            assert not manager.audit_projects(str(feed), jobs=2)
+        text = output.getvalue()
+        assert '[VULNERABLE] api' in text and '[VULNERABLE] worker' in text
+        assert 'requests 2.25.0  OSV-1  fix: 2.31.0  Header leak' in text
+        assert 'pyyaml 5.3  OSV-2  fix: 5.4  Unsafe load' in text
+        assert 'flask 2.3.3  SIMPLE-2  no fix' in text and 'urllib3' not in text and 'OSV-3' not in text
+        
+        output = io.StringIO()
+        with redirect_stdout(output):
+            assert not manager.audit_projects(str(feed), tags=['web'], output_format='jsonl')
+        findings = [json.loads(line) for line in output.getvalue().splitlines()]
+        assert {finding['id'] for finding in findings} == {'OSV-1', 'SIMPLE-2'}
+        assert all(finding['project'] == 'api' for finding in findings)
+        
+        feed.write_text(json.dumps([{'id': 'OSV-1', 'affected': [{'package': {'name': 'requests'},
+                        'ranges': [{'type': 'ECOSYSTEM', 'events': [{'introduced': '2.0'}, {'last_affected': '2.30'}]}]}]}]))
+        with redirect_stdout(io.StringIO()):
+            assert manager.audit_projects(str(feed), names=['worker'])
+            assert not manager.audit_projects(str(feed), names=['api'])
+            assert not manager.audit_projects(str(feed), names=['missing'])
+            assert not manager.audit_projects(str(Path(temp_dir) / 'absent.json'))
+        
+        # Compatible-release and prefix specifiers are understood; one bad advisory is skipped, not the feed
+        parse = manager._parse_specifiers
+        assert manager._affects({'versions': set(), 'clauses': [parse('~=2.2')]}, key('2.9.1'))
+        assert not manager._affects({'versions': set(), 'clauses': [parse('~=2.2')]}, key('3.0rc1'))
+        assert manager._affects({'versions': set(), 'clauses': [parse('==1.26.*')]}, key('1.26.0rc1'))
+        assert not manager._affects({'versions': set(), 'clauses': [parse('==1.26.*')]}, key('1.27.dev1'))
+        feed.write_text(json.dumps({'advisories': [
+            {'id': 'X', 'package': 'a', 'affected': '<<1'},
+            {'id': 'Y', 'package': 'pyyaml', 'affected': '!=5.*'},
+            {'id': 'NULL-DETAILS', 'details': None, 'package': 'pyyaml', 'affected': '~=5.1'},
+            {'id': 'PREFIX', 'package': 'urllib3', 'affected': ['==1.26.*']},
+        ]}))
+        output, errors = io.StringIO(), io.StringIO()
+        with redirect_stdout(output), redirect_stderr(errors):
+            assert not manager.audit_projects(str(feed))
+        assert 'pyyaml 5.3  NULL-DETAILS  no fix' in output.getvalue()
+        assert 'urllib3 1.26.5  PREFIX' in output.getvalue()
+        assert 'Skipping advisory X' in errors.getvalue() and 'Skipping advisory Y' in errors.getvalue()
+        
+    print("Audit tests passed")
+    return True
+
 def main():
     """Run all tests"""
     print("Python Virtual Environment Manager - Test Suite")
@@ -144,7 +1525,31 @@ def main():
     tests = [
         ("Basic Functionality", test_basic_functionality),
         ("Configuration Management", test_configuration_management),
-        ("Error Handling", test_error_handling)
+        ("Error Handling", test_error_handling),
+        ("Matrix Run", test_matrix_run),
+        ("Project Index", test_project_index),
+        ("List Output Formats", test_list_output_formats),
+        ("Path Index", test_path_index),
+        ("Project Store", test_project_store),
+        ("Doctor", test_doctor_repair),
+        ("Garbage Collection", test_gc),
+        ("Resumable Creation", test_resumable_creation),
+        ("Migration Export", test_migration_export),
+        ("Bulk Migration", test_bulk_migration),
+        ("Environment Cache", test_env_cache),
+        ("Tool Bootstrap", test_tool_bootstrap),
+        ("Ephemeral Environments", test_ephemeral_envs),
+        ("Command Profiler", test_profile_command),
+        ("Operation Metrics", test_operation_metrics),
+        ("History Log", test_history_log),
+        ("Output Streaming", test_output_streaming),
+        ("Async Manager", test_async_manager),
+        ("Shared Cache", test_shared_cache),
+        ("Wheel Build Cache", test_wheel_build_cache),
+        ("Lock Install", test_lock_install),
+        ("Slim", test_slim),
+        ("Startup Profile", test_startup_profile),
+        ("Audit", test_audit)
     ]
     
     passed = 0
@@ -13,83 +13,1424 @@ import sys
 import subprocess
 import platform
 import json
+import shutil
+import time
+import bisect
+import csv
+import heapq
+import statistics
+import mmap
+import shlex
+import functools
+import inspect
+import importlib.util
+import io
+import cProfile
+import pstats
+import atexit
+import getpass
+import tempfile
+import base64
+import hashlib
+import re
+import threading
+import contextlib
+import zipfile
+from concurrent.futures import ThreadPoolExecutor
+from itertools import islice
+from collections import deque
+from dataclasses import dataclass, field
+from collections.abc import MutableMapping
 from pathlib import Path
-from typing import Optional, Dict, List
+from typing import Optional, Dict, List, Set, Iterator, Iterable, Tuple, Union
 import argparse
+import asyncio
+
+try:
+    from . import venv_which
+except ImportError:  # run as a script or imported as a top-level module
+    import venv_which
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+    import msvcrt
+
+DEFAULT_CONFIG_FILE = Path.home() / '.venv_manager_config.json'
+REGISTRY_SCHEMA_VERSION = 3
+
+class Project:
+    """A registered project.
+
+    Slots keep registries with many entries compact. Keys this version does not
+    know about are carried in ``extra`` so they survive a load/save round trip.
+    """
+
+    __slots__ = ('tool', 'path', 'created', 'python', 'tags', 'matrix', 'status', 'steps',
+                 'env', 'interpreter', 'expires', 'extra')
+    REQUIRED = ('tool', 'path', 'created')
+
+    def __init__(self, tool: str, path: str, created: str = '', python: Optional[str] = None,
+                 tags: Optional[List[str]] = None, matrix: Optional[Dict[str, str]] = None,
+                 status: Optional[str] = None, steps: Optional[List[str]] = None,
+                 env: Optional[str] = None, interpreter: Optional[str] = None,
+                 expires: Optional[float] = None, extra: Optional[Dict] = None):
+        # Values repeated across most entries are interned, and empty
+        # collections stay None so they cost nothing per record
+        self.tool = sys.intern(tool)
+        self.path = path
+        self.created = sys.intern(created)
+        self.python = sys.intern(python) if python else None
+        self.tags = tags or None
+        self.matrix = matrix or None
+        # status is 'creating' while a resumable creation has completed only some steps
+        self.status = status or None
+        self.steps = steps or None
+        # Resolved environment of a pipenv/poetry project and the interpreter inside it
+        self.env = env or None
+        self.interpreter = interpreter or None
+        # Ephemeral projects carry the time after which gc may remove them
+        self.expires = expires or None
+        self.extra = extra or None
+
+    @classmethod
+    def from_dict(cls, data: Dict) -> 'Project':
+        data = dict(data)
+        fields = {slot: data.pop(slot) for slot in cls.__slots__ if slot != 'extra' and slot in data}
+        return cls(extra=data, **fields)
+
+    def to_dict(self) -> Dict:
+        data = {}
+        for slot in self.__slots__:
+            value = getattr(self, slot)
+            if slot == 'extra':
+                data.update(value or {})
+            elif slot in self.REQUIRED or value:
+                data[slot] = value
+        return data
+
+    def newest_env(self) -> str:
+        """Get the environment of a matrix project's highest interpreter version, or the project path"""
+        if not self.matrix:
+            return self.path
+        return self.matrix[max(self.matrix, key=lambda version: [int(part) for part in re.findall(r'\d+', version)])]
+
+    def copy(self) -> 'Project':
+        return Project.from_dict(self.to_dict())
+
+    # Dict-style access keeps scripts written against the old dict entries working
+    def __getitem__(self, key: str):
+        if key != 'extra' and key in self.__slots__:
+            return getattr(self, key)
+        return (self.extra or {})[key]
+
+    def __setitem__(self, key: str, value):
+        if key != 'extra' and key in self.__slots__:
+            setattr(self, key, value)
+        else:
+            self.extra = dict(self.extra or {})
+            self.extra[key] = value
+
+    def __contains__(self, key) -> bool:
+        if key != 'extra' and key in self.__slots__:
+            return key in self.REQUIRED or bool(getattr(self, key))
+        return key in (self.extra or {})
+
+    def get(self, key: str, default=None):
+        try:
+            return self[key]
+        except KeyError:
+            return default
+
+    def __repr__(self) -> str:
+        return f"Project({self.to_dict()!r})"
+
+class ProjectStore(MutableMapping):
+    """Project registry that keeps entries as undecoded text until first use.
+
+    The registry file holds one ``<name>\t<tool>\t<interpreters>\t<tags>\t<path>\t<env>\t<json>``
+    line per project, so loading it only splits lines; a command that touches
+    one project decodes one entry, and the index is built from the leading
+    columns without decoding any. Lists are joined with ``LIST_SEPARATOR`` and
+    paths are stored normalized. Assign a project back (``store[name] = project``)
+    after changing it so the change is saved.
+    """
+
+    HEADER = f'# venv_manager projects v{REGISTRY_SCHEMA_VERSION}\n'
+    LIST_SEPARATOR = '\x1f'
+
+    def __init__(self, entries: Optional[Dict[str, Union[str, Project]]] = None):
+        self._entries: Dict[str, Union[str, Project]] = entries or {}
+        self.changed: Set[str] = set()
+
+    @classmethod
+    def load(cls, projects_file: Path) -> 'ProjectStore':
+        entries = {}
+        try:
+            with open(projects_file, 'r', encoding='utf-8') as f:
+                for line in f:
+                    name, sep, raw = line.rstrip('\n').partition('\t')
+                    if sep and not name.startswith('#'):
+                        entries[name] = raw
+        except FileNotFoundError:
+            pass
+        return cls(entries)
+
+    @classmethod
+    def from_dicts(cls, projects: Dict[str, Dict]) -> 'ProjectStore':
+        store = cls({name: Project.from_dict(info) for name, info in projects.items()})
+        store.changed.update(store._entries)
+        return store
+
+    @classmethod
+    def columns(cls, project: Project) -> Tuple[str, List[str], List[str], str, str]:
+        """Get the indexed fields of a project: tool, interpreters, tags and normalized path and env"""
+        return (project.tool, ProjectIndex.interpreters(project), list(project.tags or ()),
+                ProjectIndex.normalize_path(project.path),
+                ProjectIndex.normalize_path(project.env) if project.env else '')
+
+    def _line(self, entry: Union[str, Project]) -> str:
+        if isinstance(entry, str):
+            if '\t' in entry:
+                return entry
+            # Lines from schema 2 registries carry only the JSON and gain their columns here
+            entry = Project.from_dict(json.loads(entry))
+        tool, interpreters, tags, path, env = self.columns(entry)
+        return '\t'.join((tool, self.LIST_SEPARATOR.join(interpreters), self.LIST_SEPARATOR.join(tags), path, env,
+                          json.dumps(entry.to_dict())))
+
+    def save(self, projects_file: Path):
+        """Write the registry atomically, copying undecoded entries through unchanged"""
+        projects_file.parent.mkdir(parents=True, exist_ok=True)
+        temp_file = projects_file.with_name(f'{projects_file.name}.{os.getpid()}.tmp')
+        with open(temp_file, 'w', encoding='utf-8') as f:
+            f.write(self.HEADER)
+            for name, entry in self._entries.items():
+                f.write(f'{name}\t{self._line(entry)}\n')
+        os.replace(temp_file, projects_file)
+        self.changed.clear()
+
+    def index_rows(self) -> List[Tuple[str, str, str, str, str, str]]:
+        """Get each project's name and indexed columns as stored, decoding only entries saved without them"""
+        separator = self.LIST_SEPARATOR
+        rows = []
+        for name, entry in self._entries.items():
+            if isinstance(entry, str) and '\t' in entry:
+                rows.append((name, *entry.split('\t', 5)[:5]))
+            else:
+                tool, interpreters, tags, path, env = self.columns(self[name])
+                rows.append((name, tool, separator.join(interpreters), separator.join(tags), path, env))
+        return rows
+
+    def __getitem__(self, name: str) -> Project:
+        entry = self._entries[name]
+        if isinstance(entry, str):
+            # JSON escapes tabs, so the document is whatever follows the last one
+            entry = self._entries[name] = Project.from_dict(json.loads(entry.rpartition('\t')[2]))
+        return entry
+
+    def __setitem__(self, name: str, project: Union[Project, Dict]):
+        if '\t' in name or '\n' in name:
+            raise ValueError("Project names cannot contain tabs or newlines")
+        self._entries[name] = project if isinstance(project, Project) else Project.from_dict(project)
+        self.changed.add(name)
+
+    def __delitem__(self, name: str):
+        del self._entries[name]
+        self.changed.add(name)
+
+    def __contains__(self, name) -> bool:
+        return name in self._entries
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self._entries)
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+class ProjectIndex:
+    """In-memory indexes over the project registry for fast lookups and filtering"""
+
+    FACETS = ('tool', 'interpreter')
+    # Positions of the indexed fields in ProjectStore.index_rows()
+    COLUMNS = {'tool': 1, 'interpreter': 2, 'tag': 3, 'path': 4, 'env': 5}
+
+    def __init__(self, projects: 'ProjectStore'):
+        self.projects = projects
+        self.names: List[str] = sorted(projects)
+        self._rows: Optional[List[Tuple[str, str, str, str, str, str]]] = None
+        self._tags: Optional[Dict[str, Set[str]]] = None
+        self._paths: Optional[Dict[str, str]] = None
+        self._envs: Optional[Dict[str, str]] = None
+        self._facets: Optional[Dict[str, Dict[str, Set[str]]]] = None
+
+    # Each index is built from the registry columns the first time a lookup needs it,
+    # so listing by name prefix builds none and a tool filter builds only the facets
+    def _columns(self) -> List[Tuple[str, str, str, str, str, str]]:
+        if self._rows is None:
+            self._rows = self.projects.index_rows()
+        return self._rows
+
+    def _group(self, column: int) -> Dict[str, Set[str]]:
+        """Group names by each value of a column; list columns hold several joined values"""
+        groups: Dict[str, Set[str]] = {}
+        separator = ProjectStore.LIST_SEPARATOR
+        for row in self._columns():
+            if row[column]:
+                for value in row[column].split(separator):
+                    groups.setdefault(value, set()).add(row[0])
+        return groups
+
+    def _lookup(self, index: Optional[Dict[str, Set[str]]], column: int, value: str) -> Set[str]:
+        """Names with value in a column, from its index once built; a single query scans instead of building it"""
+        if index is not None:
+            return index.get(value, set())
+        separator = ProjectStore.LIST_SEPARATOR
+        return {row[0] for row in self._columns() if row[column] and value in row[column].split(separator)}
+
+    @property
+    def tags(self) -> Dict[str, Set[str]]:
+        if self._tags is None:
+            self._tags = self._group(self.COLUMNS['tag'])
+        return self._tags
+
+    @property
+    def paths(self) -> Dict[str, str]:
+        if self._paths is None:
+            column = self.COLUMNS['path']
+            self._paths = {row[column]: row[0] for row in self._columns()}
+        return self._paths
+
+    @property
+    def envs(self) -> Dict[str, str]:
+        if self._envs is None:
+            column = self.COLUMNS['env']
+            self._envs = {row[column]: row[0] for row in self._columns() if row[column]}
+        return self._envs
+
+    @property
+    def facets(self) -> Dict[str, Dict[str, Set[str]]]:
+        if self._facets is None:
+            self._facets = {facet: self._group(self.COLUMNS[facet]) for facet in self.FACETS}
+        return self._facets
+
+    @staticmethod
+    def normalize_path(path) -> str:
+        """Normalize a path for reverse lookups without touching the filesystem"""
+        return venv_which.normalize_path(path)
+
+    @staticmethod
+    def interpreters(project: Project) -> List[str]:
+        """Get the interpreter facet values of a project"""
+        if project.matrix:
+            return list(project.matrix)
+        return [project.python or 'default']
+
+    @staticmethod
+    def _discard(index: Dict[str, Set[str]], key: str, name: str):
+        names = index.get(key)
+        if names is not None:
+            names.discard(name)
+            if not names:
+                del index[key]
+
+    def add(self, name: str, project: Project):
+        """Index a new project"""
+        bisect.insort(self.names, name)
+        self._rows = None
+        tool, interpreters, tags, path, env = ProjectStore.columns(project)
+        if self._tags is not None:
+            for tag in tags:
+                self._tags.setdefault(tag, set()).add(name)
+        if self._paths is not None:
+            self._paths[path] = name
+        if self._envs is not None and env:
+            self._envs[env] = name
+        if self._facets is not None:
+            self._facets['tool'].setdefault(tool, set()).add(name)
+            for interpreter in interpreters:
+                self._facets['interpreter'].setdefault(interpreter, set()).add(name)
+
+    def remove(self, name: str, project: Project):
+        """Remove a project from every index"""
+        position = bisect.bisect_left(self.names, name)
+        if position < len(self.names) and self.names[position] == name:
+            del self.names[position]
+        self._rows = None
+        tool, interpreters, tags, path, env = ProjectStore.columns(project)
+        if self._tags is not None:
+            for tag in tags:
+                self._discard(self._tags, tag, name)
+        if self._paths is not None and self._paths.get(path) == name:
+            del self._paths[path]
+        if self._envs is not None and env and self._envs.get(env) == name:
+            del self._envs[env]
+        if self._facets is not None:
+            self._discard(self._facets['tool'], tool, name)
+            for interpreter in interpreters:
+                self._discard(self._facets['interpreter'], interpreter, name)
+
+    def with_prefix(self, prefix: str) -> Iterator[str]:
+        """Yield project names starting with prefix, in sorted order"""
+        for name in islice(self.names, bisect.bisect_left(self.names, prefix), None):
+            if not name.startswith(prefix):
+                break
+            yield name
+
+    def find_by_path(self, path) -> Optional[str]:
+        """Find the project that owns path or one of its parent directories"""
+        current = self.normalize_path(path)
+        while True:
+            if current in self.paths:
+                return self.paths[current]
+            parent = os.path.dirname(current)
+            if parent == current:
+                return None
+            current = parent
+
+    def query(self, prefix: Optional[str] = None, filters: Optional[Dict[str, Union[str, List[str]]]] = None,
+              tags: Optional[List[str]] = None, limit: Optional[int] = None,
+              offset: int = 0) -> Iterator[str]:
+        """Yield project names matching every filter and tag, in sorted order.
+
+        A filter given a list of values matches any of them.
+        """
+        candidates: Optional[Set[str]] = None
+        for facet, values in (filters or {}).items():
+            matches: Set[str] = set()
+            for value in [values] if isinstance(values, str) else values:
+                if facet == 'tag':
+                    matches |= self._lookup(self._tags, self.COLUMNS['tag'], value)
+                elif facet == 'path':
+                    owner = self.find_by_path(value)
+                    matches |= {owner} if owner else set()
+                elif facet in self.FACETS:
+                    matches |= self._lookup(self._facets and self._facets[facet], self.COLUMNS[facet], value)
+                else:
+                    raise ValueError(f"Unknown filter: {facet}")
+            candidates = matches if candidates is None else candidates & matches
+        for tag in tags or []:
+            matches = self._lookup(self._tags, self.COLUMNS['tag'], tag)
+            candidates = matches if candidates is None else candidates & matches
+
+        if candidates is None:
+            names = self.with_prefix(prefix) if prefix else iter(self.names)
+        else:
+            if prefix:
+                candidates = {name for name in candidates if name.startswith(prefix)}
+            names = iter(heapq.nsmallest(offset + limit, candidates) if limit is not None else sorted(candidates))
+        return islice(names, offset, None if limit is None else offset + limit)
+
+class PathIndex:
+    """Sorted on-disk index from project directories to projects.
+
+    Each line is ``<normalized path>\t<name>\t<tool>\t<venv>``. Lines are sorted
+    so a lookup is a handful of binary searches over a memory map instead of
+    loading the registry and stat-ing every project path.
+    """
+
+    FIELDS = ('path', 'name', 'tool', 'venv')
+
+    def __init__(self, index_file: Path):
+        self.index_file = index_file
+
+    @staticmethod
+    def _encode(row: Tuple[str, str, str, str]) -> bytes:
+        path, name, tool, venv = row
+        return '\t'.join([ProjectIndex.normalize_path(path), name, tool, venv]).encode('utf-8') + b'\n'
+
+    def _write_lines(self, lines: List[bytes]):
+        lines.sort()
+        self.index_file.parent.mkdir(parents=True, exist_ok=True)
+        temp_file = self.index_file.with_name(f'{self.index_file.name}.{os.getpid()}.tmp')
+        with open(temp_file, 'wb') as f:
+            f.writelines(lines)
+        os.replace(temp_file, self.index_file)
+
+    def write(self, rows: Iterable[Tuple[str, str, str, str]]):
+        """Replace the index atomically with the given (path, name, tool, venv) rows"""
+        self._write_lines([self._encode(row) for row in rows])
+
+    def update(self, rows: Iterable[Tuple[str, str, str, str]], names: Set[str]):
+        """Replace the rows of the given project names, keeping every other line as is"""
+        with open(self.index_file, 'rb') as f:
+            existing = f.read().splitlines(keepends=True)
+        stale = {name.encode('utf-8') for name in names}
+        kept = [line for line in existing if line.split(b'\t', 2)[1] not in stale]
+        self._write_lines(kept + [self._encode(row) for row in rows])
+
+    def lookup(self, path) -> Optional[Dict[str, str]]:
+        """Find the project owning path or its nearest registered parent directory"""
+        # Shared with venv_which, the dependency-free lookup the shell hooks run
+        return venv_which.lookup(self.index_file, path)
+
+class HistoryLog:
+    """Append-only operation log split into size-rotated segments.
+
+    Each record is a JSON line in ``NNNNNN.jsonl``. A matching ``NNNNNN.idx``
+    holds one short ``<project>\t<duration>\t<offset>`` line per record, so
+    queries scan the small indexes and seek straight to the records they return.
+    """
+
+    def __init__(self, directory: Path, segment_bytes: int = 1024 * 1024, max_segments: int = 8):
+        self.directory = directory
+        self.segment_bytes = segment_bytes
+        self.max_segments = max_segments
+
+    def segments(self) -> List[int]:
+        try:
+            return sorted(int(path.stem) for path in self.directory.glob('*.jsonl') if path.stem.isdigit())
+        except OSError:
+            return []
+
+    def _segment_file(self, number: int, suffix: str) -> Path:
+        return self.directory / f'{number:06d}{suffix}'
+
+    def append(self, record: Dict):
+        """Append a record, starting a new segment once the current one is full"""
+        self.directory.mkdir(parents=True, exist_ok=True)
+        segments = self.segments()
+        number = segments[-1] if segments else 1
+        segment = self._segment_file(number, '.jsonl')
+        if segment.exists() and segment.stat().st_size >= self.segment_bytes:
+            number += 1
+            segment = self._segment_file(number, '.jsonl')
+            for old in (segments + [number])[:-self.max_segments]:
+                for suffix in ('.jsonl', '.idx'):
+                    self._segment_file(old, suffix).unlink(missing_ok=True)
+
+        line = (json.dumps(record, separators=(',', ':')) + '\n').encode('utf-8')
+        # O_APPEND keeps concurrent writers' lines whole; the offset is read back after the write
+        fd = os.open(segment, os.O_WRONLY | os.O_APPEND | os.O_CREAT, 0o644)
+        try:
+            os.write(fd, line)
+            offset = os.lseek(fd, 0, os.SEEK_CUR) - len(line)
+        finally:
+            os.close(fd)
+        project = str(record.get('project') or '').replace('\t', ' ')
+        entry = f"{project}\t{record['duration']:.6f}\t{offset}\n".encode('utf-8')
+        fd = os.open(self._segment_file(number, '.idx'), os.O_WRONLY | os.O_APPEND | os.O_CREAT, 0o644)
+        try:
+            os.write(fd, entry)
+        finally:
+            os.close(fd)
+
+    def _entries(self, project: Optional[str] = None) -> Iterator[Tuple[float, int, int]]:
+        """Yield (duration, segment, offset) from the indexes, oldest first"""
+        for number in self.segments():
+            try:
+                with open(self._segment_file(number, '.idx'), encoding='utf-8') as f:
+                    for line in f:
+                        name, duration, offset = line.rstrip('\n').split('\t')
+                        if project is None or name == project:
+                            yield float(duration), number, int(offset)
+            except (OSError, ValueError):
+                continue
+
+    def _read(self, entries: Iterable[Tuple[float, int, int]]) -> List[Dict]:
+        records = []
+        for _, number, offset in entries:
+            try:
+                with open(self._segment_file(number, '.jsonl'), 'rb') as f:
+                    f.seek(offset)
+                    records.append(json.loads(f.readline()))
+            except (OSError, ValueError):
+                continue
+        return records
+
+    def query(self, project: Optional[str] = None, slowest: Optional[int] = None, limit: int = 20) -> List[Dict]:
+        """Get the slowest records, or the most recent ones, optionally for one project"""
+        if slowest is not None:
+            return self._read(heapq.nlargest(slowest, self._entries(project)))
+        return self._read(deque(self._entries(project), maxlen=limit))
+
+@contextlib.contextmanager
+def lock_file_path(lock_file: Path, shared: bool = False, mode: int = 0o644):
+    """Hold an exclusive (or shared) lock on lock_file across processes"""
+    fd = os.open(lock_file, os.O_RDWR | os.O_CREAT, mode)
+    try:
+        if fcntl is not None:
+            fcntl.flock(fd, fcntl.LOCK_SH if shared else fcntl.LOCK_EX)
+        else:
+            # msvcrt has no shared locks, so Windows readers lock exclusively
+            while True:
+                try:
+                    msvcrt.locking(fd, msvcrt.LK_LOCK, 1)
+                    break
+                except OSError:
+                    continue
+        yield
+    finally:
+        if fcntl is not None:
+            fcntl.flock(fd, fcntl.LOCK_UN)
+        else:
+            os.lseek(fd, 0, os.SEEK_SET)
+            try:
+                msvcrt.locking(fd, msvcrt.LK_UNLCK, 1)
+            except OSError:
+                pass
+        os.close(fd)
+
+class SharedCache:
+    """Cache root that several users and processes read and populate concurrently.
+
+    Entries are built under a private temporary name next to their final path
+    and published with an atomic rename, so readers see a whole entry or none.
+    Writers of an entry hold an exclusive lock file, so each entry is built
+    once; readers of replaceable entries hold a shared lock. A shared root gets
+    setgid, group-writable directories and group-readable files whatever the
+    umask, so every member of the root's group can populate it.
+    """
+
+    def __init__(self, root: Path, shared: bool = False):
+        self.root = root
+        self.shared = shared
+        self.dir_mode = 0o2775 if shared else 0o755
+        self.file_mode = 0o664 if shared else 0o644
+
+    def usable(self) -> bool:
+        """Whether the root exists or can be created, and is writable"""
+        try:
+            self.makedirs(self.root)
+        except OSError:
+            return False
+        return os.access(self.root, os.W_OK | os.X_OK)
+
+    def makedirs(self, path: Path):
+        """Create a directory inside the cache with the cache's permissions"""
+        missing = []
+        while not path.is_dir() and path != path.parent:
+            missing.append(path)
+            path = path.parent
+        for directory in reversed(missing):
+            try:
+                directory.mkdir()
+            except FileExistsError:
+                continue
+            self._chmod(directory, self.dir_mode)
+
+    def section(self, name: str) -> Path:
+        path = self.root / name
+        self.makedirs(path)
+        return path
+
+    def _chmod(self, path: Path, mode: int):
+        if not self.shared:
+            return
+        try:
+            os.chmod(path, mode)
+        except OSError:
+            # Entries created by another user keep the modes that user gave them
+            pass
+
+    @contextlib.contextmanager
+    def lock(self, path: Path, shared: bool = False):
+        """Hold an exclusive (or shared) lock for a cache path across processes"""
+        locks = self.section('locks')
+        lock_file = locks / (hashlib.sha1(str(path).encode('utf-8')).hexdigest() + '.lock')
+        with lock_file_path(lock_file, shared, self.file_mode):
+            self._chmod(lock_file, self.file_mode)
+            yield
+
+    def publish_file(self, path: Path, write) -> Path:
+        """Write a file through write(binary file object) under a temporary name and rename it into place"""
+        self.makedirs(path.parent)
+        fd, temp = tempfile.mkstemp(dir=path.parent, prefix=f'.{path.name}.', suffix='.tmp')
+        try:
+            with os.fdopen(fd, 'wb') as f:
+                write(f)
+            os.chmod(temp, self.file_mode)
+            os.replace(temp, path)
+        except BaseException:
+            Path(temp).unlink(missing_ok=True)
+            raise
+        return path
+
+    def publish_dir(self, path: Path, build) -> Path:
+        """Build a directory through build(empty temporary directory) and rename it into place.
+
+        An existing entry is swapped out and removed; callers hold lock(path).
+        """
+        self.makedirs(path.parent)
+        temp = Path(tempfile.mkdtemp(dir=path.parent, prefix=f'.{path.name}.', suffix='.tmp'))
+        try:
+            build(temp)
+            os.chmod(temp, self.dir_mode)
+            if self.shared:
+                for directory, dirs, files in os.walk(temp):
+                    self._chmod(Path(directory), self.dir_mode)
+                    for name in files:
+                        file = Path(directory) / name
+                        if not file.is_symlink():
+                            self._chmod(file, self.file_mode | (file.stat().st_mode & 0o111))
+            old = None
+            if path.exists():
+                old = path.with_name(f'.{path.name}.{os.getpid()}.old')
+                os.rename(path, old)
+            os.rename(temp, path)
+        except BaseException:
+            shutil.rmtree(temp, ignore_errors=True)
+            raise
+        if old is not None:
+            shutil.rmtree(old, ignore_errors=True)
+        return path
+
+    def read_json(self, path: Path) -> Optional[Dict]:
+        try:
+            with open(path, encoding='utf-8') as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return None
+
+    def write_json(self, path: Path, data: Dict) -> Path:
+        return self.publish_file(path, lambda f: f.write(json.dumps(data).encode('utf-8')))
+
+class OutputTail:
+    """The last ``limit`` bytes of a child process's output, kept as whole lines"""
+
+    def __init__(self, limit: int):
+        self.limit = limit
+        self.lines: deque = deque()
+        self.size = 0
+
+    def add(self, line: bytes):
+        line = line[-self.limit:]
+        self.lines.append(line)
+        self.size += len(line)
+        while self.size > self.limit:
+            self.size -= len(self.lines.popleft())
+
+    def text(self) -> str:
+        return b''.join(self.lines).decode('utf-8', 'replace')
+
+class OperationMetrics:
+    """Duration histograms, counts, failures and bytes written per operation.
+
+    Each run's observations are added to totals persisted next to the metrics
+    file, so the exported counters keep growing across runs as Prometheus expects.
+    """
+
+    BUCKETS = (0.1, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 120.0, 300.0, 600.0)
+    PREFIX = 'venv_manager'
+
+    def __init__(self):
+        self.operations: Dict[str, Dict] = {}
+        self._lock = threading.Lock()
+
+    @classmethod
+    def _empty(cls) -> Dict:
+        return {'count': 0, 'failures': 0, 'bytes': 0, 'sum': 0.0, 'buckets': [0] * len(cls.BUCKETS), 'last': 0.0}
+
+    def observe(self, operation: str, duration: float, ok: bool, written: int = 0):
+        """Record one finished operation"""
+        with self._lock:
+            totals = self.operations.setdefault(operation, self._empty())
+            totals['count'] += 1
+            totals['failures'] += 0 if ok else 1
+            totals['bytes'] += written
+            totals['sum'] += duration
+            totals['last'] = duration
+            for position, bound in enumerate(self.BUCKETS):
+                if duration <= bound:
+                    totals['buckets'][position] += 1
+
+    def merge(self, persisted: Dict[str, Dict]) -> Dict[str, Dict]:
+        """Add this run's observations to totals from earlier runs"""
+        merged = {operation: dict(totals, buckets=list(totals['buckets'])) for operation, totals in persisted.items()}
+        for operation, totals in self.operations.items():
+            target = merged.setdefault(operation, self._empty())
+            for key in ('count', 'failures', 'bytes', 'sum'):
+                target[key] += totals[key]
+            target['buckets'] = [old + new for old, new in zip(target['buckets'], totals['buckets'])]
+            target['last'] = totals['last']
+        return merged
+
+    @classmethod
+    def render(cls, operations: Dict[str, Dict]) -> str:
+        """Format totals in the Prometheus text exposition format"""
+        prefix = cls.PREFIX
+        lines = []
+
+        def family(name: str, kind: str, help_text: str):
+            lines.append(f'# HELP {prefix}_{name} {help_text}')
+            lines.append(f'# TYPE {prefix}_{name} {kind}')
+
+        names = sorted(operations)
+        family('operations_total', 'counter', 'Operations run.')
+        lines.extend(f'{prefix}_operations_total{{operation="{name}"}} {operations[name]["count"]}' for name in names)
+        family('operation_failures_total', 'counter', 'Operations that failed.')
+        lines.extend(f'{prefix}_operation_failures_total{{operation="{name}"}} {operations[name]["failures"]}'
+                     for name in names)
+        family('operation_bytes_written_total', 'counter', 'Bytes operations added to the directories they created or changed.')
+        lines.extend(f'{prefix}_operation_bytes_written_total{{operation="{name}"}} {operations[name]["bytes"]}'
+                     for name in names)
+        family('operation_duration_seconds', 'histogram', 'Operation wall time.')
+        for name in names:
+            totals = operations[name]
+            for bound, count in zip(cls.BUCKETS, totals['buckets']):
+                lines.append(f'{prefix}_operation_duration_seconds_bucket{{operation="{name}",le="{bound}"}} {count}')
+            lines.append(f'{prefix}_operation_duration_seconds_bucket{{operation="{name}",le="+Inf"}} {totals["count"]}')
+            lines.append(f'{prefix}_operation_duration_seconds_sum{{operation="{name}"}} {totals["sum"]:.6f}')
+            lines.append(f'{prefix}_operation_duration_seconds_count{{operation="{name}"}} {totals["count"]}')
+        family('last_operation_duration_seconds', 'gauge', 'Wall time of the most recent run of each operation.')
+        lines.extend(f'{prefix}_last_operation_duration_seconds{{operation="{name}"}} {operations[name]["last"]:.6f}'
+                     for name in names)
+        family('metrics_updated_timestamp_seconds', 'gauge', 'When this file was last written.')
+        lines.append(f'{prefix}_metrics_updated_timestamp_seconds {time.time():.3f}')
+        return '\n'.join(lines) + '\n'
+
+    def write(self, metrics_file: Path):
+        """Merge with the persisted totals and atomically replace the textfile and its state"""
+        state_file = metrics_file.with_name(f'{metrics_file.name}.state.json')
+        metrics_file.parent.mkdir(parents=True, exist_ok=True)
+        # Concurrent runs serialize the merge so neither loses the other's observations
+        with lock_file_path(metrics_file.with_name(f'.{metrics_file.name}.lock')):
+            try:
+                persisted = json.loads(state_file.read_text(encoding='utf-8'))
+            except (OSError, ValueError):
+                persisted = {}
+            operations = self.merge(persisted)
+            # The textfile collector may read at any moment, so both files are replaced atomically
+            for path, content in ((state_file, json.dumps(operations, indent=2)),
+                                  (metrics_file, self.render(operations))):
+                temp_file = path.with_name(f'.{path.name}.{os.getpid()}.tmp')
+                temp_file.write_text(content, encoding='utf-8')
+                os.replace(temp_file, path)
+
+def operation(name: str, target=None, succeeded=bool):
+    """Record a VenvManager method's duration, outcome and bytes written in the manager's metrics.
+
+    target maps the method's bound arguments to the directories it writes, whose
+    growth over a successful run is counted as written; succeeded judges the return value.
+    """
+    def decorate(method):
+        signature = inspect.signature(method)
+
+        @functools.wraps(method)
+        def wrapper(self, *args, **kwargs):
+            if self.metrics is None:
+                return method(self, *args, **kwargs)
+            sizes = {}
+            if target is not None:
+                bound = signature.bind(self, *args, **kwargs)
+                bound.apply_defaults()
+                sizes = {path: self._dir_size(path) for path in target(self, bound.arguments)}
+            started = time.perf_counter()
+            ok = False
+            try:
+                result = method(self, *args, **kwargs)
+                ok = bool(succeeded(result))
+                return result
+            finally:
+                duration = time.perf_counter() - started
+                written = 0
+                if ok and target is not None:
+                    # Only growth counts, so re-running over an existing directory adds its changes, not its size
+                    written = sum(max(0, self._dir_size(path) - sizes.get(path, 0))
+                                  for path in target(self, bound.arguments))
+                self.metrics.observe(name, duration, ok, written)
+        return wrapper
+    return decorate
+
+def _project_dirs(manager: 'VenvManager', name: str) -> List[Path]:
+    """Directories that belong to a registered project: its path and an environment kept elsewhere"""
+    project = manager.config['projects'].get(name)
+    if project is None:
+        return []
+    dirs = [Path(project.path)]
+    if project.env and Path(project.path) not in Path(project.env).parents:
+        dirs.append(Path(project.env))
+    return dirs
+
+def _created_project(manager: 'VenvManager', arguments: Dict) -> List[Path]:
+    return _project_dirs(manager, arguments['name'])
+
+def _updated_project(manager: 'VenvManager', arguments: Dict) -> List[Path]:
+    # The environment is resolved before the update runs, so both measurements cover the same directories
+    if arguments['name'] in manager.config['projects']:
+        manager.get_env_path(arguments['name'])
+    return _project_dirs(manager, arguments['name'])
 
 class VenvManager:
+    SELECT_LIMIT = 50
+    SHELL_HOOKS = ('bash', 'zsh', 'fish')
+    # Seconds spent waiting on child processes per method, collected while a command is profiled
+    child_wait: Optional[Dict[str, float]] = None
+
     def __init__(self):
         self.system = platform.system().lower()
         self.is_windows = self.system == 'windows'
         self.is_linux = self.system == 'linux'
         self.is_macos = self.system == 'darwin'
-        self.config_file = Path.home() / '.venv_manager_config.json'
+        self.config_file = DEFAULT_CONFIG_FILE
         self.config = self.load_config()
-        
+        self._index: Optional[ProjectIndex] = None
+        self._registry_changed = False
+        # Serializes registry writes when projects are created or migrated concurrently
+        self._lock = threading.RLock()
+        # Operation metrics, collected only when a metrics file is configured
+        self.metrics: Optional[OperationMetrics] = None
+        self.subprocess_count = 0
+        # Label of the job each thread is running; set by job() to stream child output
+        self._jobs = threading.local()
+        self._output_lock = threading.Lock()
+        self._log_dir: Optional[Path] = None
+        self._cache: Optional[SharedCache] = None
+
     def load_config(self) -> Dict:
         """Load configuration from file"""
+        config = None
         if self.config_file.exists():
             try:
                 with open(self.config_file, 'r') as f:
-                    return json.load(f)
+                    config = json.load(f)
             except (json.JSONDecodeError, FileNotFoundError):
                 pass
-        return {
-            'default_tool': 'virtualenv',
-            'python_path': sys.executable,
-            'projects': {}
-        }
+        if config is None:
+            config = {
+                'default_tool': 'virtualenv',
+                'python_path': sys.executable
+            }
+        # The registry file is the source of truth whenever it exists, so a missing
+        # or unreadable config file never starts an empty registry that overwrites it
+        projects = ProjectStore.load(self.projects_file)
+        inline = config.get('projects') if config.get('schema_version', 1) < REGISTRY_SCHEMA_VERSION else None
+        if inline:
+            # Older registries kept every project inline in the config file
+            for name, info in inline.items():
+                if name not in projects:
+                    projects[name] = info
+        config['schema_version'] = REGISTRY_SCHEMA_VERSION
+        config['projects'] = projects
+        return config
     
     def save_config(self):
         """Save configuration to file"""
-        with open(self.config_file, 'w') as f:
-            json.dump(self.config, f, indent=2)
+        projects = self.config['projects']
+        with self._lock:
+            settings = {key: value for key, value in self.config.items() if key != 'projects'}
+            temp_file = self.config_file.with_name(f'{self.config_file.name}.{os.getpid()}.tmp')
+            with open(temp_file, 'w') as f:
+                json.dump(settings, f, indent=2)
+            os.replace(temp_file, self.config_file)
+            if self._registry_changed or projects.changed:
+                changed = None if self._registry_changed else set(projects.changed)
+                projects.save(self.projects_file)
+                self.refresh_path_index(changed)
+
+    @staticmethod
+    def data_dir_for(config_file: Path) -> Path:
+        """Get the data directory that belongs to a configuration file"""
+        return config_file.with_name('.venv_manager')
+
+    @property
+    def data_dir(self) -> Path:
+        """Directory for indexes and other data kept next to the configuration file"""
+        return self.data_dir_for(self.config_file)
+
+    @property
+    def cache(self) -> SharedCache:
+        """Cache for wheels, templates and interpreter probes.
+
+        shared_cache in the config (or VENV_MANAGER_SHARED_CACHE) points it at a
+        root shared between users; otherwise, or when that root is not
+        writable, the per-user data directory is used.
+        """
+        if self._cache is None:
+            configured = self.config.get('shared_cache') or os.environ.get('VENV_MANAGER_SHARED_CACHE')
+            cache = SharedCache(Path(configured).expanduser(), shared=True) if configured else None
+            if cache is not None and not cache.usable():
+                print(f"[WARNING] Shared cache {cache.root} is not writable; using {self.data_dir}", file=sys.stderr)
+                cache = None
+            self._cache = cache or SharedCache(self.data_dir)
+        return self._cache
+
+    @property
+    def projects_file(self) -> Path:
+        return self.data_dir / 'projects.tsv'
+
+    @property
+    def path_index(self) -> PathIndex:
+        return PathIndex(self.data_dir / 'paths.tsv')
+
+    @staticmethod
+    def _path_index_row(name: str, project: Project) -> Tuple[str, str, str, str]:
+        venv = project.env or ''
+        if project.tool == 'virtualenv':
+            venv = project.newest_env()
+        return (project.path, name, project.tool, venv)
+
+    def refresh_path_index(self, names: Optional[Set[str]] = None):
+        """Update the on-disk path index for the given projects, or rebuild it entirely"""
+        projects = self.config['projects']
+        if names is None or not self.path_index.index_file.exists():
+            self.path_index.write(self._path_index_row(name, project) for name, project in projects.items())
+        else:
+            rows = [self._path_index_row(name, projects[name]) for name in names if name in projects]
+            self.path_index.update(rows, names)
+        self._registry_changed = False
+
+    @classmethod
+    def which(cls, path: str, fields: Optional[List[str]] = None, output_format: str = 'text') -> bool:
+        """Print the project owning path, resolved from the path index without loading the registry"""
+        index = PathIndex(cls.data_dir_for(DEFAULT_CONFIG_FILE) / 'paths.tsv')
+        if not index.index_file.exists():
+            cls().refresh_path_index()
+        record = index.lookup(path)
+        if record is None:
+            if output_format == 'text' and not fields:
+                print(f"No project found for {path}")
+            return False
+
+        is_windows = platform.system().lower() == 'windows'
+        record['interpreter'] = ''
+        if record['venv']:
+            bin_dir = 'Scripts' if is_windows else 'bin'
+            record['interpreter'] = os.path.join(record['venv'], bin_dir, 'python.exe' if is_windows else 'python')
+        if fields:
+            unknown = [field for field in fields if field not in record]
+            if unknown:
+                print(f"[ERROR] Unknown field: {', '.join(unknown)}")
+                return False
+            record = {field: record[field] for field in fields}
+
+        if output_format == 'jsonl':
+            print(json.dumps(record))
+        elif fields:
+            print('\t'.join(record.values()))
+        else:
+            print(f"[TOOL] {record['name']} ({record['tool']})")
+            print(f"   [FOLDER] {record['path']}")
+            if record['interpreter']:
+                print(f"   [PYTHON] {record['interpreter']}")
+        return True
+
+    @property
+    def history(self) -> HistoryLog:
+        return HistoryLog(self.data_dir / 'history',
+                          segment_bytes=self.config.get('history_segment_bytes', 1024 * 1024),
+                          max_segments=self.config.get('history_segments', 8))
+
+    def record_history(self, command: str, project: Optional[str], duration: float, status: int,
+                       subprocesses: Optional[int] = None):
+        """Append a finished command to the operation history"""
+        try:
+            with self._lock:
+                self.history.append({
+                    'ts': round(time.time(), 3), 'command': command, 'project': project or '',
+                    'duration': round(duration, 6), 'status': status,
+                    'subprocesses': self.subprocess_count if subprocesses is None else subprocesses,
+                })
+        except OSError as e:
+            print(f"[WARNING] Could not write history: {e}", file=sys.stderr)
+
+    def show_history(self, project: Optional[str] = None, slowest: Optional[int] = None,
+                     limit: Optional[int] = None, output_format: str = 'text') -> bool:
+        """Show the most recent or slowest recorded commands"""
+        records = self.history.query(project, slowest=slowest, limit=limit or 20)
+        if output_format == 'jsonl':
+            for record in records:
+                sys.stdout.write(json.dumps(record) + '\n')
+            return True
+        if not records:
+            print("No history recorded.")
+            return True
+        scope = f" for '{project}'" if project else ''
+        print(f"\n[LIST] {'Slowest' if slowest is not None else 'Recent'} commands{scope}:")
+        print("-" * 50)
+        for record in records:
+            when = time.strftime('%Y-%m-%d %H:%M:%S', time.localtime(record['ts']))
+            name = f" {record['project']}" if record['project'] else ''
+            print(f"{when}  {record['command']}{name}  {record['duration']:.2f}s  "
+                  f"exit {record['status']}  {record['subprocesses']} subprocesses")
+        return True
+
+    def shell_hook(self, shell: str) -> Optional[str]:
+        """Generate a shell snippet that auto-activates registered projects on directory change"""
+        # Hooks run on every directory change, so they call the standalone lookup with
+        # site disabled instead of starting the full manager
+        if not self.path_index.index_file.exists():
+            self.refresh_path_index()
+        which = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'venv_which.py')
+        invoke = f"{shlex.quote(sys.executable)} -I -S {shlex.quote(which)}"
+        index = shlex.quote(str(self.path_index.index_file))
+        if shell in ('bash', 'zsh'):
+            register = {
+                'bash': 'case ";$PROMPT_COMMAND;" in\n'
+                        '    *";_venv_manager_hook;"*) ;;\n'
+                        '    *) PROMPT_COMMAND="_venv_manager_hook${PROMPT_COMMAND:+;$PROMPT_COMMAND}" ;;\n'
+                        'esac',
+                'zsh': 'autoload -U add-zsh-hook\nadd-zsh-hook chpwd _venv_manager_hook\n_venv_manager_hook',
+            }[shell]
+            return f"""# venv_manager auto-activation ({shell})
+_venv_manager_hook() {{
+    [ "$PWD" = "$_VENV_MANAGER_LAST_PWD" ] && return
+    _VENV_MANAGER_LAST_PWD="$PWD"
+    local venv
+    venv="$({invoke} "$PWD" {index} 2>/dev/null)"
+    if [ -n "$venv" ]; then
+        if [ "$VIRTUAL_ENV" != "$venv" ] && [ -f "$venv/bin/activate" ]; then
+            source "$venv/bin/activate"
+            _VENV_MANAGER_ACTIVE="$venv"
+        fi
+    elif [ -n "$_VENV_MANAGER_ACTIVE" ] && [ "$VIRTUAL_ENV" = "$_VENV_MANAGER_ACTIVE" ]; then
+        deactivate
+        unset _VENV_MANAGER_ACTIVE
+    fi
+}}
+{register}
+"""
+        if shell == 'fish':
+            return f"""# venv_manager auto-activation (fish)
+function __venv_manager_hook --on-variable PWD
+    set -l venv ({invoke} "$PWD" {index} 2>/dev/null)
+    if test -n "$venv"
+        if test "$VIRTUAL_ENV" != "$venv"; and test -f "$venv/bin/activate.fish"
+            source "$venv/bin/activate.fish"
+            set -g __venv_manager_active "$venv"
+        end
+    else if set -q __venv_manager_active; and test "$VIRTUAL_ENV" = "$__venv_manager_active"
+        deactivate
+        set -e __venv_manager_active
+    end
+end
+__venv_manager_hook
+"""
+        return None
+
+    @property
+    def index(self) -> ProjectIndex:
+        """Project registry index, built on first use and kept current by register/unregister"""
+        if self._index is None:
+            self._index = ProjectIndex(self.config['projects'])
+        return self._index
+
+    def register_project(self, name: str, project: Union[Project, Dict], save: bool = True):
+        """Add or replace a project in the registry and save it"""
+        if not isinstance(project, Project):
+            project = Project.from_dict(project)
+        with self._lock:
+            self.unregister_project(name, save=False)
+            self.config['projects'][name] = project
+            if self._index is not None:
+                self._index.add(name, project)
+            if save:
+                self.save_config()
+
+    def unregister_project(self, name: str, save: bool = True):
+        """Remove a project from the registry"""
+        with self._lock:
+            project = self.config['projects'].pop(name, None)
+            if project is not None and self._index is not None:
+                self._index.remove(name, project)
+            if save:
+                self.save_config()
+
+    def tag_project(self, name: str, tags: List[str]) -> bool:
+        """Add tags to a project"""
+        if name not in self.config['projects']:
+            print(f"Project '{name}' not found!")
+            return False
+        project = self.config['projects'][name].copy()
+        project.tags = sorted(set(project.tags or ()) | set(tags))
+        self.register_project(name, project)
+        print(f"[OK] Tags for '{name}': {', '.join(project.tags)}")
+        return True
     
-    def check_tool_installed(self, tool: str) -> bool:
-        """Check if a tool is installed"""
+    def _run(self, cmd, **kwargs) -> subprocess.CompletedProcess:
+        """Run a child process; while profiling, add its wait to every VenvManager method on the stack.
+
+        Inside job() the output is streamed instead of inherited, unless the
+        caller captures or redirects it.
+        """
+        with self._lock:
+            self.subprocess_count += 1
+        label = getattr(self._jobs, 'label', None)
+        if label is not None and not self.STREAM_EXCLUSIVE.intersection(kwargs):
+            run = functools.partial(self._stream, label=label)
+        else:
+            run = subprocess.run
+        waits = VenvManager.child_wait
+        if waits is None:
+            return run(cmd, **kwargs)
+        started = time.perf_counter()
         try:
-            if tool == 'virtualenv':
-                subprocess.run([sys.executable, '-m', 'virtualenv', '--version'], 
-                             capture_output=True, check=True)
-            elif tool == 'pipenv':
-                subprocess.run(['pipenv', '--version'], 
-                             capture_output=True, check=True)
-            elif tool == 'poetry':
-                subprocess.run(['poetry', '--version'], 
-                             capture_output=True, check=True)
+            return run(cmd, **kwargs)
+        finally:
+            elapsed = time.perf_counter() - started
+            methods = self._stack_methods(sys._getframe())
+            if threading.current_thread() is not threading.main_thread():
+                # Pool workers count towards the methods the main thread is waiting in
+                methods |= self._stack_methods(sys._current_frames().get(threading.main_thread().ident))
+            with self._lock:
+                for method in methods:
+                    waits[method] = waits.get(method, 0.0) + elapsed
+
+    OUTPUT_TAIL_BYTES = 64 * 1024
+    LOG_RUNS = 20
+    STREAM_EXCLUSIVE = frozenset(('capture_output', 'stdout', 'stderr', 'input', 'timeout'))
+
+    @contextlib.contextmanager
+    def job(self, label: str):
+        """Stream the output of child processes this thread starts with a [label] prefix"""
+        previous = getattr(self._jobs, 'label', None)
+        self._jobs.label = label
+        try:
+            yield
+        finally:
+            self._jobs.label = previous
+
+    @property
+    def log_dir(self) -> Path:
+        """Directory for this run's job logs; only the newest log_runs run directories are kept"""
+        with self._lock:
+            if self._log_dir is None:
+                root = self.data_dir / 'logs'
+                root.mkdir(parents=True, exist_ok=True)
+                runs = sorted(path for path in root.iterdir() if path.is_dir())
+                for old in runs[:max(0, len(runs) - self.config.get('log_runs', self.LOG_RUNS) + 1)]:
+                    shutil.rmtree(old, ignore_errors=True)
+                self._log_dir = root / f"{time.strftime('%Y%m%d-%H%M%S')}-{os.getpid()}"
+                self._log_dir.mkdir(exist_ok=True)
+            return self._log_dir
+
+    def _stream(self, cmd, label: str, check: bool = False, **kwargs) -> subprocess.CompletedProcess:
+        """Run a child process, echoing each output line with a [label] prefix.
+
+        The full output is appended to <log_dir>/<label>.log and only its last
+        output_tail_bytes are kept in memory, as the returned stdout.
+        """
+        kwargs.pop('text', None)
+        log_file = self.log_dir / (re.sub(r'[^\w.-]+', '_', label) + '.log')
+        tail = OutputTail(self.config.get('output_tail_bytes', self.OUTPUT_TAIL_BYTES))
+        prefix = f'[{label}] '
+        with open(log_file, 'ab') as log:
+            log.write(f"$ {cmd if isinstance(cmd, str) else shlex.join(map(str, cmd))}\n".encode('utf-8'))
+            with subprocess.Popen(cmd, stdin=subprocess.DEVNULL, stdout=subprocess.PIPE,
+                                  stderr=subprocess.STDOUT, **kwargs) as proc:
+                # Reads are bounded so a child that never prints a newline cannot grow a line without limit
+                for line in iter(lambda: proc.stdout.readline(self.OUTPUT_TAIL_BYTES), b''):
+                    log.write(line)
+                    tail.add(line)
+                    text = line.decode('utf-8', 'replace').rstrip('\r\n')
+                    with self._output_lock:
+                        sys.stdout.write(f'{prefix}{text}\n')
+                returncode = proc.wait()
+        if returncode != 0:
+            with self._output_lock:
+                print(f"{prefix}exited with {returncode}; full log: {log_file}")
+        if check and returncode != 0:
+            raise subprocess.CalledProcessError(returncode, cmd, output=tail.text())
+        return subprocess.CompletedProcess(cmd, returncode, stdout=tail.text(), stderr='')
+
+    _method_codes: Optional[Dict[object, str]] = None
+
+    @classmethod
+    def method_codes(cls) -> Dict[object, str]:
+        """Map the code object of every VenvManager method and property to its name"""
+        if cls._method_codes is None:
+            codes = {}
+            for name, member in vars(cls).items():
+                function = member.fget if isinstance(member, property) else getattr(member, '__func__', member)
+                # Operation wrappers share one code object, so the wrapped method is mapped instead
+                function = inspect.unwrap(function) if callable(function) else function
+                code = getattr(function, '__code__', None)
+                if code is not None:
+                    codes[code] = name
+            cls._method_codes = codes
+        return cls._method_codes
+
+    @classmethod
+    def _stack_methods(cls, frame) -> Set[str]:
+        codes = cls.method_codes()
+        methods = set()
+        while frame is not None:
+            name = codes.get(frame.f_code)
+            if name is not None:
+                methods.add(name)
+            frame = frame.f_back
+        return methods
+
+    TOOLS = ('virtualenv', 'pipenv', 'poetry')
+    # Versions installed into isolated tool environments unless tool_versions in the config overrides them
+    TOOL_VERSIONS = {'virtualenv': '20.26.6', 'pipenv': '2024.4.0', 'poetry': '1.8.5'}
+
+    @property
+    def tools_dir(self) -> Path:
+        return self.data_dir / 'tools'
+
+    def tool_version(self, tool: str) -> str:
+        """Get the pinned version of a tool"""
+        return self.config.get('tool_versions', {}).get(tool) or self.TOOL_VERSIONS[tool]
+
+    def tool_env(self, tool: str, version: Optional[str] = None) -> Path:
+        """Get the isolated environment of a tool version (default: the pinned one)"""
+        return self.tools_dir / f'{tool}-{version or self.tool_version(tool)}'
+
+    def tool_executable(self, tool: str, version: Optional[str] = None) -> Path:
+        """Get the absolute path of a tool inside its isolated environment for a version (default: the pinned one)"""
+        env_path = self.tool_env(tool, version)
+        return self.get_venv_python(env_path).with_name(tool + ('.exe' if self.is_windows else ''))
+
+    def tool_command(self, tool: str) -> List[str]:
+        """Get the command that runs a tool.
+
+        The pinned isolated installation wins, then an absolute path cached
+        from an earlier PATH probe. Both are checked with a single stat.
+        """
+        isolated = self.tool_executable(tool)
+        if isolated.is_file():
+            return [str(isolated)]
+        cached = self.config.get('tool_paths', {}).get(tool)
+        if cached and os.path.isfile(cached):
+            return [cached]
+        if tool == 'virtualenv':
+            return [sys.executable, '-m', 'virtualenv']
+        return [tool]
+
+    def check_tool_installed(self, tool: str) -> bool:
+        """Check if a tool is installed; a version pinned in tool_versions must be installed in isolation"""
+        if tool in self.config.get('tool_versions', {}):
+            return self.tool_executable(tool).is_file()
+        command = self.tool_command(tool)
+        if os.path.isabs(command[0]) and command[0] != sys.executable:
             return True
+        try:
+            self._run(command + ['--version'], capture_output=True, check=True)
         except (subprocess.CalledProcessError, FileNotFoundError):
             return False
+        found = shutil.which(command[0]) if command == [tool] else None
+        if found:
+            with self._lock:
+                self.config.setdefault('tool_paths', {})[tool] = os.path.abspath(found)
+                self.save_config()
+        return True
     
     def install_tool(self, tool: str) -> bool:
         """Install a tool if not present"""
         if self.check_tool_installed(tool):
             return True
             
-        print(f"Installing {tool}...")
+        print(f"Installing {tool} {self.tool_version(tool)}...")
+        error = self.install_tool_isolated(tool)
+        if error is not None:
+            print(f"Failed to install {tool}: {error}")
+            return False
+        return True
+
+    def pin_tool(self, tool: str, version: str):
+        """Pin the tool version venv_manager runs; other installed versions stay side by side"""
+        with self._lock:
+            self.config.setdefault('tool_versions', {})[tool] = version
+            self.save_config()
+
+    @operation('install_tool', target=lambda self, arguments: [self.tool_env(arguments['tool'], arguments['version'])],
+               succeeded=lambda error: error is None)
+    def install_tool_isolated(self, tool: str, wheelhouse: Optional[str] = None,
+                              version: Optional[str] = None) -> Optional[str]:
+        """Install a pinned tool version into its own environment under the data directory.
+
+        Returns an error message on failure.
+        """
+        version = version or self.tool_version(tool)
+        env_path = self.tool_env(tool, version)
+        python = self.get_venv_python(env_path)
+        pip = [str(python), '-m', 'pip', 'install', '--disable-pip-version-check', '--quiet']
+        if wheelhouse:
+            pip += ['--no-index', '--find-links', str(wheelhouse)]
         try:
-            if tool == 'virtualenv':
-                subprocess.run([sys.executable, '-m', 'pip', 'install', 'virtualenv'], 
-                             check=True)
-            elif tool == 'pipenv':
-                subprocess.run([sys.executable, '-m', 'pip', 'install', 'pipenv'], 
-                             check=True)
-            elif tool == 'poetry':
-                # Install poetry using the official installer
-                if self.is_windows:
-                    subprocess.run([
-                        'powershell', '-Command', 
-                        '(Invoke-WebRequest -Uri https://install.python-poetry.org -UseBasicParsing).Content | python -'
-                    ], check=True)
-                else:
-                    # For Linux and macOS
-                    subprocess.run([
-                        'curl', '-sSL', 'https://install.python-poetry.org', '|', 'python3', '-'
-                    ], shell=True, check=True)
-            return True
+            if not python.exists():
+                self._run([sys.executable, '-m', 'venv', str(env_path)], capture_output=True, text=True, check=True)
+            with self.job(tool):
+                self._run(pip + [f'{tool}=={version}'], check=True)
         except subprocess.CalledProcessError as e:
-            print(f"Failed to install {tool}: {e}")
+            # A half-installed environment would shadow a working tool on PATH
+            self._remove_tree(env_path)
+            output = (e.stderr or e.stdout or '').strip().splitlines()
+            return output[-1] if output else str(e)
+        except OSError as e:
+            self._remove_tree(env_path)
+            return str(e)
+        return None
+
+    def installed_tool_versions(self, tool: str) -> List[str]:
+        """Get the versions of a tool installed side by side in isolated environments"""
+        versions = []
+        for env_path in sorted(self.tools_dir.glob(f'{tool}-*')):
+            version = env_path.name[len(tool) + 1:]
+            if self.tool_executable(tool, version).is_file():
+                versions.append(version)
+        return versions
+
+    def list_tools(self):
+        """Show the pinned version, isolated installs and resolved command of every tool"""
+        print("\n[LIST] Tools:")
+        print("-" * 50)
+        for tool in self.TOOLS:
+            pinned = self.tool_version(tool)
+            installed = self.installed_tool_versions(tool)
+            others = [version for version in installed if version != pinned]
+            state = "installed" if pinned in installed else "not installed"
+            print(f"[TOOL] {tool} {pinned} ({state})")
+            if others:
+                print(f"   Also installed: {', '.join(others)}")
+            print(f"   Runs: {' '.join(self.tool_command(tool))}")
+
+    def bootstrap_tools(self, tools: Optional[List[str]] = None, wheelhouse: Optional[str] = None,
+                        jobs: Optional[int] = None) -> bool:
+        """Probe tools concurrently and install the missing ones side by side into isolated environments.
+
+        A TOOL==VERSION spec installs that version even when another version of
+        the tool is already available, and pins it once it is installed.
+        """
+        specs = [spec.partition('==') for spec in (tools or self.TOOLS)]
+        tools = [tool for tool, _, _ in specs]
+        if wheelhouse and not Path(wheelhouse).is_dir():
+            print(f"[ERROR] Wheelhouse not found: {wheelhouse}")
             return False
+        requested = {tool: version for tool, _, version in specs if version}
+
+        def probe(tool: str) -> bool:
+            if tool in requested:
+                return self.tool_executable(tool, requested[tool]).is_file()
+            return self.check_tool_installed(tool)
+
+        def timed(function, tool: str) -> Tuple[object, float]:
+            started = time.perf_counter()
+            return function(tool), time.perf_counter() - started
+
+        started = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=jobs or len(tools)) as pool:
+            probes = dict(zip(tools, pool.map(lambda tool: timed(probe, tool), tools)))
+            missing = [tool for tool in tools if not probes[tool][0]]
+            if missing:
+                source = f"wheelhouse {wheelhouse}" if wheelhouse else "the package index"
+                print(f"Installing {', '.join(missing)} from {source} into {self.tools_dir}...")
+            installs = dict(zip(missing, pool.map(
+                lambda tool: timed(lambda name: self.install_tool_isolated(name, wheelhouse, requested.get(name)),
+                                   tool), missing)))
+        # Pins are only recorded for versions that are actually installed
+        for tool, version in requested.items():
+            if installs.get(tool, (None,))[0] is None:
+                self.pin_tool(tool, version)
+
+        print("\n[LIST] Tools:")
+        print("-" * 50)
+        for tool in tools:
+            probe_time = probes[tool][1]
+            if tool not in installs:
+                print(f"[OK] {tool} already installed (probe {probe_time:.1f}s)")
+                continue
+            error, install_time = installs[tool]
+            if error is None:
+                print(f"[OK] {tool} {requested.get(tool) or self.tool_version(tool)} installed "
+                      f"(probe {probe_time:.1f}s, install {install_time:.1f}s)")
+            else:
+                print(f"[ERROR] {tool} failed after {install_time:.1f}s: {error}")
+        failed = sum(1 for error, _ in installs.values() if error is not None)
+        print(f"{len(tools) - failed}/{len(tools)} tools ready in {time.perf_counter() - started:.1f}s")
+        return failed == 0
     
     def get_activation_script(self, venv_path: Path, tool: str) -> str:
         """Get the activation script path for different tools"""
@@ -104,118 +1445,569 @@ class VenvManager:
             return f"poetry shell"
         return ""
     
-    def create_virtualenv(self, name: str, python_version: Optional[str] = None) -> bool:
+    CREATE_STEPS = ('directory', 'interpreter', 'seed', 'dependencies', 'register')
+
+    def _already_registered(self, name: str) -> bool:
+        """Report a name that already belongs to a registered project, even one whose directory is gone"""
+        existing = self.config['projects'].get(name)
+        if existing is not None:
+            print(f"[ERROR] Project '{name}' is already registered at {existing.path}!")
+        return existing is not None
+
+    def _start_create(self, name: str, tool: str, path: Path, created: Path,
+                      python_version: Optional[str]) -> Optional[Project]:
+        """Get the project to create, resuming an interrupted creation when one is registered"""
+        existing = self.config['projects'].get(name)
+        if existing is not None and existing.status == 'creating':
+            if existing.tool != tool:
+                print(f"[ERROR] '{name}' was being created with {existing.tool}; "
+                      f"resume it with --tool {existing.tool} or remove it with gc")
+                return None
+            print(f"[RESUME] Resuming '{name}' after: {', '.join(existing.steps or []) or 'nothing'}")
+            if ProjectIndex.normalize_path(existing.path) != ProjectIndex.normalize_path(path):
+                # The remaining steps must finish the directory the earlier ones started
+                print(f"[RESUME] Continuing in {existing.path}")
+            return existing.copy()
+        if self._already_registered(name):
+            return None
+        if path.exists():
+            label = "Virtual environment" if tool == 'virtualenv' else "Project"
+            print(f"{label} '{name}' already exists!")
+            return None
+        return Project(tool, str(path), created=str(created), python=python_version,
+                       status='creating', steps=[])
+
+    def _create_directory(self, path: Path):
+        path.mkdir(exist_ok=True)
+        self._mark_partial(path)
+
+    def _run_create_pipeline(self, name: str, project: Project, actions: Dict) -> bool:
+        """Run the creation steps in order, checkpointing each completed step in the registry.
+
+        Steps without an action for the tool are recorded as done. A rerun of the
+        same create command skips every step already recorded.
+        """
+        # Registered before the first step, so even a failed first step can be resumed
+        if not project.steps:
+            self.register_project(name, project)
+        for step in self.CREATE_STEPS:
+            if step in (project.steps or []):
+                continue
+            if step == 'register':
+                self._clear_partial(Path(project.path))
+                project.status, project.steps = None, None
+                self.register_project(name, project)
+                break
+            action = actions.get(step)
+            if action is not None:
+                print(f"[STEP] {step}...")
+                try:
+                    action()
+                except (subprocess.CalledProcessError, OSError) as e:
+                    print(f"[ERROR] Step '{step}' failed: {e}")
+                    print(f"Run the same create command again to resume from '{step}'.")
+                    return False
+            project.steps = list(project.steps or []) + [step]
+            self.register_project(name, project)
+        return True
+
+    @operation('create_virtualenv', target=_created_project)
+    def create_virtualenv(self, name: str, python_version: Optional[str] = None,
+                          base_dir: Optional[Path] = None) -> bool:
         """Create a virtual environment using virtualenv"""
         if not self.install_tool('virtualenv'):
             return False
             
-        venv_path = Path.cwd() / name
-        if venv_path.exists():
-            print(f"Virtual environment '{name}' already exists!")
+        base_dir = base_dir or Path.cwd()
+        venv_path = base_dir / name
+        project = self._start_create(name, 'virtualenv', venv_path, base_dir, python_version)
+        if project is None:
             return False
+        venv_path = Path(project.path)
         
-        try:
-            cmd = [sys.executable, '-m', 'virtualenv', str(venv_path)]
-            if python_version:
-                cmd.extend(['-p', python_version])
-            
-            subprocess.run(cmd, check=True)
-            
-            # Save project info
-            self.config['projects'][name] = {
-                'tool': 'virtualenv',
-                'path': str(venv_path),
-                'created': str(Path.cwd())
-            }
-            self.save_config()
-            
-            print(f"Virtual environment '{name}' created successfully!")
-            print(f"Location: {venv_path}")
-            print(f"To activate: {self.get_activation_script(venv_path, 'virtualenv')}")
-            return True
-            
-        except subprocess.CalledProcessError as e:
-            print(f"Failed to create virtual environment: {e}")
+        cmd = self.tool_command('virtualenv') + [str(venv_path)]
+        if python_version:
+            cmd.extend(['-p', python_version])
+        
+        # The bare interpreter comes first; seeding reruns virtualenv over it, which keeps the
+        # interpreter and installs pip, setuptools and wheel without relying on ensurepip
+        if not self._run_create_pipeline(name, project, {
+            'directory': lambda: self._create_directory(venv_path),
+            'interpreter': lambda: self._run(cmd + ['--no-seed'], check=True),
+            'seed': lambda: self._run(cmd, check=True),
+        }):
+            print("Failed to create virtual environment")
             return False
+        
+        print(f"Virtual environment '{name}' created successfully!")
+        print(f"Location: {venv_path}")
+        print(f"To activate: {self.get_activation_script(venv_path, 'virtualenv')}")
+        return True
     
+    @operation('create_pipenv', target=_created_project)
     def create_pipenv(self, name: str, python_version: Optional[str] = None) -> bool:
         """Create a project using pipenv"""
         if not self.install_tool('pipenv'):
             return False
             
         project_path = Path.cwd() / name
-        if project_path.exists():
-            print(f"Project '{name}' already exists!")
+        project = self._start_create(name, 'pipenv', project_path, project_path, python_version)
+        if project is None:
             return False
+        project_path = Path(project.path)
         
-        try:
-            project_path.mkdir()
-            os.chdir(project_path)
-            
-            cmd = ['pipenv', 'install']
-            if python_version:
-                cmd.extend(['--python', python_version])
-            
-            subprocess.run(cmd, check=True)
-            
-            # Save project info
-            self.config['projects'][name] = {
-                'tool': 'pipenv',
-                'path': str(project_path),
-                'created': str(project_path)
-            }
-            self.save_config()
-            
-            print(f"[OK] Pipenv project '{name}' created successfully!")
-            print(f"[FOLDER] Location: {project_path}")
-            print(f"[TOOL] To activate: cd {name} && pipenv shell")
-            return True
-            
-        except subprocess.CalledProcessError as e:
-            print(f"[ERROR] Failed to create pipenv project: {e}")
+        python = python_version or self.config.get('python_path') or sys.executable
+        pipenv = self.tool_command('pipenv')
+        if not self._run_create_pipeline(name, project, {
+            'directory': lambda: self._create_directory(project_path),
+            'interpreter': lambda: self._run(pipenv + ['--python', python], cwd=project_path, check=True),
+            'dependencies': lambda: self._run(pipenv + ['install'], cwd=project_path, check=True),
+        }):
+            print("[ERROR] Failed to create pipenv project")
             return False
+        
+        self.get_env_path(name, refresh=True)
+        print(f"[OK] Pipenv project '{name}' created successfully!")
+        print(f"[FOLDER] Location: {project_path}")
+        print(f"[TOOL] To activate: cd {name} && pipenv shell")
+        return True
     
+    @operation('create_poetry', target=_created_project)
     def create_poetry(self, name: str, python_version: Optional[str] = None) -> bool:
         """Create a project using poetry"""
         if not self.install_tool('poetry'):
             return False
             
-        try:
-            cmd = ['poetry', 'new', name]
-            subprocess.run(cmd, check=True)
-            
-            # Save project info
-            project_path = Path.cwd() / name
-            self.config['projects'][name] = {
-                'tool': 'poetry',
-                'path': str(project_path),
-                'created': str(project_path)
-            }
-            self.save_config()
-            
-            print(f"[OK] Poetry project '{name}' created successfully!")
-            print(f"[FOLDER] Location: {project_path}")
-            print(f"[TOOL] To activate: cd {name} && poetry shell")
-            return True
-            
-        except subprocess.CalledProcessError as e:
-            print(f"[ERROR] Failed to create poetry project: {e}")
+        project_path = Path.cwd() / name
+        project = self._start_create(name, 'poetry', project_path, project_path, python_version)
+        if project is None:
             return False
-    
-    def list_projects(self):
-        """List all created projects"""
-        if not self.config['projects']:
+        project_path = Path(project.path)
+        
+        poetry = self.tool_command('poetry')
+        
+        def scaffold():
+            # poetry init works inside an existing directory, so a resumed step can run it again
+            self._create_directory(project_path)
+            if not (project_path / 'pyproject.toml').exists():
+                self._run(poetry + ['init', '--no-interaction', '--name', name], cwd=project_path, check=True)
+            package = project_path / name.replace('-', '_').lower()
+            package.mkdir(exist_ok=True)
+            (package / '__init__.py').touch()
+        
+        actions = {'directory': scaffold}
+        if python_version:
+            actions['interpreter'] = lambda: self._run(poetry + ['env', 'use', python_version],
+                                                            cwd=project_path, check=True)
+        if not self._run_create_pipeline(name, project, actions):
+            print("[ERROR] Failed to create poetry project")
+            return False
+        
+        self.get_env_path(name, refresh=True)
+        print(f"[OK] Poetry project '{name}' created successfully!")
+        print(f"[FOLDER] Location: {project_path}")
+        print(f"[TOOL] To activate: cd {name} && poetry shell")
+        return True
+
+    @operation('create_matrix', target=_created_project)
+    def create_matrix(self, name: str, python_versions: List[str], jobs: Optional[int] = None) -> bool:
+        """Create sibling virtualenvs for several Python versions and register them as one project"""
+        if not self.install_tool('virtualenv'):
+            return False
+
+        root = Path.cwd() / name
+        if self._already_registered(name):
+            return False
+        if root.exists():
+            print(f"Project '{name}' already exists!")
+            return False
+
+        root.mkdir()
+        envs = {f'py{version}': root / f'py{version}' for version in python_versions}
+        commands = {
+            label: self.tool_command('virtualenv') + [str(path), '-p', version]
+            for (label, path), version in zip(envs.items(), python_versions)
+        }
+
+        print(f"Creating {len(commands)} virtual environments for '{name}'...")
+        results = self._run_matrix(commands, jobs=jobs)
+        self._print_matrix_results(name, results)
+
+        matrix = {
+            version: str(envs[label])
+            for label, version in zip(envs, python_versions)
+            if results[label]['returncode'] == 0
+        }
+        if not matrix:
+            shutil.rmtree(root, ignore_errors=True)
+            print(f"[ERROR] Failed to create any environment for '{name}'")
+            return False
+
+        # Save project info
+        self.register_project(name, {
+            'tool': 'virtualenv',
+            'path': str(root),
+            'created': str(Path.cwd()),
+            'matrix': matrix
+        })
+
+        print(f"[OK] Matrix project '{name}' created with {len(matrix)} interpreters")
+        print(f"[FOLDER] Location: {root}")
+        for version, path in matrix.items():
+            print(f"[TOOL] {version}: {self.get_activation_script(Path(path), 'virtualenv')}")
+        return len(matrix) == len(commands)
+
+    EPHEMERAL_TTL = 3600
+
+    @property
+    def ephemeral_root(self) -> Path:
+        """Directory for ephemeral venvs: ephemeral_root from the config, else a per-user one on /dev/shm when writable"""
+        configured = self.config.get('ephemeral_root')
+        if configured:
+            return Path(configured).expanduser()
+        shm = Path('/dev/shm')
+        base = shm if shm.is_dir() and os.access(shm, os.W_OK) else Path(tempfile.gettempdir())
+        # /dev/shm and the temp directory are shared by every user, so each gets a private subdirectory
+        user = os.getuid() if hasattr(os, 'getuid') else getpass.getuser()
+        return base / f'venv_manager-{user}'
+
+    def _make_ephemeral_root(self) -> Optional[Path]:
+        """Create the ephemeral root readable only by this user; refuse one another user owns"""
+        root = self.ephemeral_root
+        try:
+            root.mkdir(mode=0o700, parents=True, exist_ok=True)
+            if hasattr(os, 'getuid') and root.stat().st_uid != os.getuid():
+                print(f"[ERROR] Ephemeral root {root} belongs to another user; set ephemeral_root in the config")
+                return None
+        except OSError as e:
+            print(f"[ERROR] Cannot create ephemeral root {root}: {e}")
+            return None
+        return root
+
+    def _clone_venv(self, source: Path, target: Path, location: Optional[Path] = None):
+        """Copy a virtual environment and re-point the absolute paths embedded in its scripts.
+
+        location is the path the scripts should name when target is only a
+        temporary name that will be renamed there.
+        """
+        shutil.copytree(source, target, symlinks=True, dirs_exist_ok=True)
+        old, new = os.fsencode(str(source)), os.fsencode(str(location or target))
+        # Only whole path components match, so /x/app never rewrites a sibling such as /x/app2
+        pattern = re.compile(re.escape(old) + rb'(?![\w.\-])')
+        scripts = target / ('Scripts' if self.is_windows else 'bin')
+        candidates = [path for path in scripts.iterdir() if path.is_file() and not path.is_symlink()]
+        cfg = self.read_pyvenv_cfg(target)
+        if cfg is not None:
+            candidates.append(target / 'pyvenv.cfg')
+            candidates.extend(self._site_packages(target, cfg).glob('*.pth'))
+        for path in candidates:
+            data = path.read_bytes()
+            # Binaries are left alone; only text files such as shebangs and activate scripts are rewritten
+            if old in data and b'\0' not in data:
+                path.write_bytes(pattern.sub(lambda match: new, data))
+
+    @operation('create_ephemeral', target=_created_project)
+    def create_ephemeral(self, name: str, python_version: Optional[str] = None, template: Optional[str] = None,
+                         ttl: Optional[int] = None, teardown_at_exit: bool = False) -> bool:
+        """Create a throwaway virtualenv on tmpfs, optionally cloned from a registered template project.
+
+        The registration expires after ttl seconds, after which gc removes it.
+        With teardown_at_exit it is also destroyed when this process exits.
+        """
+        projects = self.config['projects']
+        root = self._make_ephemeral_root()
+        if root is None:
+            return False
+        venv_path = root / name
+        ttl = ttl if ttl is not None else self.config.get('ephemeral_ttl', self.EPHEMERAL_TTL)
+        expires = time.time() + ttl
+
+        if template:
+            source = projects.get(template)
+            shared = self.cache.root / 'templates' / template
+            if source is None and (shared / 'pyvenv.cfg').exists():
+                source_path, python = shared, self._cfg_version(self.read_pyvenv_cfg(shared) or {}) or None
+            elif source is None or source.tool != 'virtualenv' or source.matrix:
+                print(f"[ERROR] Template '{template}' must be a registered single-interpreter virtualenv project "
+                      f"or a published template")
+                return False
+            else:
+                source_path, python = Path(source.path), source.python
+            if name in projects or venv_path.exists():
+                print(f"Virtual environment '{name}' already exists!")
+                return False
+            started = time.perf_counter()
+            try:
+                # A shared lock keeps a template from being replaced while it is copied
+                with self.cache.lock(source_path, shared=True):
+                    self._clone_venv(source_path, venv_path)
+            except OSError as e:
+                self._remove_tree(venv_path)
+                print(f"[ERROR] Failed to clone '{template}': {e}")
+                return False
+            self.register_project(name, Project('virtualenv', str(venv_path), created=str(root),
+                                                python=python, expires=expires))
+            print(f"[OK] Cloned '{template}' to {venv_path} in {time.perf_counter() - started:.1f}s")
+        else:
+            if not self.create_virtualenv(name, python_version, base_dir=root):
+                return False
+            project = projects[name].copy()
+            project.expires = expires
+            self.register_project(name, project)
+
+        if teardown_at_exit:
+            atexit.register(self.destroy_ephemeral, name)
+        print(f"[EPHEMERAL] '{name}' expires at {time.strftime('%Y-%m-%d %H:%M:%S', time.localtime(expires))}")
+        return True
+
+    def publish_template(self, name: str) -> bool:
+        """Copy a registered virtualenv project into the cache's templates for create --ephemeral --template"""
+        project = self.config['projects'].get(name)
+        if project is None or project.tool != 'virtualenv' or project.matrix:
+            print(f"[ERROR] '{name}' must be a registered single-interpreter virtualenv project")
+            return False
+        target = self.cache.section('templates') / name
+        started = time.perf_counter()
+        try:
+            with self.cache.lock(target):
+                self.cache.publish_dir(target, lambda temp: self._clone_venv(Path(project.path), temp, location=target))
+        except OSError as e:
+            print(f"[ERROR] Failed to publish template '{name}': {e}")
+            return False
+        print(f"[OK] Published template '{name}' to {target} in {time.perf_counter() - started:.1f}s")
+        return True
+
+    def show_cache(self):
+        """Show the cache root and the size of each section"""
+        cache = self.cache
+        kind = "shared" if cache.shared else "per-user"
+        print(f"\n[LIST] Cache ({kind}): {cache.root}")
+        print("-" * 50)
+        for section in ('wheels', 'built', 'templates', 'interpreters'):
+            path = cache.root / section
+            entries = [entry for entry in path.iterdir() if not entry.name.startswith('.')] if path.is_dir() else []
+            size = self._dir_size(path) if path.is_dir() else 0
+            print(f"{section:<14} {len(entries):>6} entries  {size / 1024 / 1024:8.1f} MiB")
+
+    def destroy_ephemeral(self, name: str) -> bool:
+        """Remove an ephemeral project's environment and registration"""
+        project = self.config['projects'].get(name)
+        if project is None or not project.expires:
+            return False
+        error = self._remove_tree(Path(project.path)) if os.path.exists(project.path) else None
+        self.unregister_project(name)
+        if error:
+            print(f"[ERROR] Could not remove {project.path}: {error}")
+        return error is None
+
+    def run_ephemeral(self, command: List[str], python_version: Optional[str] = None,
+                      template: Optional[str] = None, name: Optional[str] = None) -> bool:
+        """Create an ephemeral venv, run a command in it and destroy it again"""
+        if not command:
+            print("[ERROR] No command given! Use: run --ephemeral -- COMMAND")
+            return False
+        name = name or f'ephemeral-{os.getpid()}-{int(time.time())}'
+        venv_path = self.ephemeral_root / name
+        existed = name in self.config['projects'] or venv_path.exists()
+        if not self.create_ephemeral(name, python_version, template):
+            # A name that was already taken belongs to someone else (e.g. a concurrent CI job); leave it alone
+            if not existed:
+                project = self.config['projects'].get(name)
+                if project is not None and Path(project.path) == venv_path:
+                    self.unregister_project(name)
+                if venv_path.exists():
+                    self._remove_tree(venv_path)
+                self._clear_partial(venv_path)
+            return False
+        try:
+            return self.run_in_project(name, command)
+        finally:
+            self.destroy_ephemeral(name)
+
+    def get_venv_python(self, venv_path: Path) -> Path:
+        """Get the interpreter path inside a virtual environment"""
+        if self.is_windows:
+            return venv_path / 'Scripts' / 'python.exe'
+        return venv_path / 'bin' / 'python'
+
+    def get_project_envs(self, name: str) -> Dict[str, Path]:
+        """Get the virtual environments of a project, keyed by label"""
+        project = self.config['projects'][name]
+        if project.matrix:
+            return {f'py{version}': Path(path) for version, path in project.matrix.items()}
+        if project.tool != 'virtualenv':
+            env_path = self.get_env_path(name)
+            return {name: env_path} if env_path else {}
+        return {name: Path(project.path)}
+
+    def _venv_environ(self, venv_path: Path) -> Dict[str, str]:
+        """Build the environment variables of an activated virtual environment"""
+        env = os.environ.copy()
+        env.pop('PYTHONHOME', None)
+        env['VIRTUAL_ENV'] = str(venv_path)
+        env['PATH'] = os.pathsep.join([str(self.get_venv_python(venv_path).parent), env.get('PATH', '')])
+        return env
+
+    def _run_matrix(self, commands: Dict[str, List[str]], jobs: Optional[int] = None,
+                    cwd: Optional[str] = None, envs: Optional[Dict[str, Dict[str, str]]] = None) -> Dict[str, Dict]:
+        """Run one command per label concurrently and collect exit codes, timings and output"""
+        jobs = jobs or min(len(commands), os.cpu_count() or 1)
+        # A single command inherits the terminal, several stream prefixed lines and keep a tail
+        parallel = len(commands) > 1
+
+        def run(label: str) -> Dict:
+            start = time.perf_counter()
+            try:
+                with self.job(label) if parallel else contextlib.nullcontext():
+                    proc = self._run(commands[label], cwd=cwd, env=(envs or {}).get(label), text=True)
+                returncode, output = proc.returncode, (proc.stdout or '') + (proc.stderr or '')
+            except OSError as e:
+                returncode, output = 127, str(e)
+            return {'returncode': returncode, 'duration': time.perf_counter() - start, 'output': output}
+
+        with ThreadPoolExecutor(max_workers=max(1, jobs)) as pool:
+            return dict(zip(commands, pool.map(run, commands)))
+
+    def _print_matrix_results(self, name: str, results: Dict[str, Dict]):
+        """Print aggregated results of a matrix run"""
+        print(f"\n[LIST] Results for '{name}':")
+        print("-" * 50)
+        for label, result in results.items():
+            if result['returncode'] == 0:
+                print(f"[OK] {label} ({result['duration']:.1f}s)")
+            else:
+                print(f"[ERROR] {label} exited with {result['returncode']} ({result['duration']:.1f}s)")
+                for line in result['output'].strip().splitlines()[-5:]:
+                    print(f"   {line}")
+        passed = sum(1 for result in results.values() if result['returncode'] == 0)
+        print(f"{passed}/{len(results)} environments succeeded")
+
+    def run_in_project(self, name: str, command: List[str], jobs: Optional[int] = None) -> bool:
+        """Run a command inside every environment of a project"""
+        if name not in self.config['projects']:
+            print(f"Project '{name}' not found!")
+            return False
+        if not command:
+            print("[ERROR] No command given! Use: run --name NAME -- COMMAND")
+            return False
+
+        project = self.config['projects'][name]
+        tool = project.tool
+
+        project_envs = self.get_project_envs(name)
+        if not project_envs:
+            # The environment could not be resolved, so let the tool find it
+            results = self._run_matrix({name: self.tool_command(tool) + ['run'] + command}, cwd=project.path)
+        else:
+            commands, envs = {}, {}
+            for label, venv_path in project_envs.items():
+                envs[label] = self._venv_environ(venv_path)
+                executable = shutil.which(command[0], path=envs[label]['PATH']) or command[0]
+                commands[label] = [executable] + command[1:]
+            cwd = project.path if tool != 'virtualenv' else None
+            results = self._run_matrix(commands, jobs=jobs, cwd=cwd, envs=envs)
+
+        self._print_matrix_results(name, results)
+        return all(result['returncode'] == 0 for result in results.values())
+
+    LIST_FORMATS = ('text', 'jsonl', 'csv', 'table')
+    LIST_FIELDS = ('name', 'tool', 'path', 'interpreter', 'tags', 'created')
+
+    def iter_projects(self, prefix: Optional[str] = None, filters: Optional[Dict[str, Union[str, List[str]]]] = None,
+                      tags: Optional[List[str]] = None, limit: Optional[int] = None,
+                      offset: int = 0, fields: Optional[List[str]] = None) -> Iterator[Dict]:
+        """Yield one flat record per matching project with only the requested fields"""
+        fields = list(fields or self.LIST_FIELDS)
+        unknown = [field for field in fields if field not in self.LIST_FIELDS]
+        if unknown:
+            raise ValueError(f"Unknown field: {', '.join(unknown)}")
+        for name in self.index.query(prefix=prefix, filters=filters, tags=tags, limit=limit, offset=offset):
+            project = self.config['projects'][name]
+            values = {
+                'name': lambda: name,
+                'tool': lambda: project.tool,
+                'path': lambda: project.path,
+                'interpreter': lambda: ProjectIndex.interpreters(project),
+                'tags': lambda: list(project.tags or ()),
+                'created': lambda: project.created,
+            }
+            yield {field: values[field]() for field in fields}
+
+    def list_projects(self, prefix: Optional[str] = None, filters: Optional[Dict[str, Union[str, List[str]]]] = None,
+                      tags: Optional[List[str]] = None, limit: Optional[int] = None,
+                      page: Optional[int] = None, output_format: str = 'text',
+                      fields: Optional[List[str]] = None):
+        """List created projects, optionally filtered, paginated and in a machine-readable format"""
+        if not self.config['projects'] and output_format == 'text':
             print("No projects found.")
             return
         
+        offset = 0
+        if page:
+            limit = limit or self.SELECT_LIMIT
+            offset = (page - 1) * limit
+        if output_format == 'text':
+            fields = None
+        try:
+            records = self.iter_projects(prefix=prefix, filters=filters, tags=tags,
+                                         limit=limit, offset=offset, fields=fields)
+            first = next(records, None)
+        except ValueError as e:
+            print(f"[ERROR] {e}")
+            return
+        
+        if output_format == 'jsonl':
+            self._write_jsonl(first, records)
+            return
+        if output_format in ('csv', 'table'):
+            self._write_columns(first, records, fields or list(self.LIST_FIELDS), output_format)
+            return
+        
+        if first is None:
+            print("No matching projects found.")
+            return
         print("\n[LIST] Your Projects:")
         print("-" * 50)
-        for name, info in self.config['projects'].items():
-            tool = info['tool']
-            path = info['path']
-            print(f"[TOOL] {name} ({tool})")
-            print(f"   [FOLDER] {path}")
+        for record in self._chain(first, records):
+            print(f"[TOOL] {record['name']} ({record['tool']})")
+            print(f"   [FOLDER] {record['path']}")
+            if record['interpreter'] != ['default']:
+                print(f"   [PYTHON] {', '.join(record['interpreter'])}")
+            if record['tags']:
+                print(f"   [TAGS] {', '.join(record['tags'])}")
             print()
+
+    @staticmethod
+    def _chain(first: Optional[Dict], records: Iterator[Dict]) -> Iterator[Dict]:
+        if first is not None:
+            yield first
+            yield from records
+
+    def _write_jsonl(self, first: Optional[Dict], records: Iterator[Dict]):
+        for record in self._chain(first, records):
+            sys.stdout.write(json.dumps(record) + '\n')
+
+    def _write_columns(self, first: Optional[Dict], records: Iterator[Dict], fields: List[str], output_format: str):
+        def flatten(record: Dict) -> List[str]:
+            return [';'.join(value) if isinstance(value, list) else str(value) for value in record.values()]
+
+        if output_format == 'csv':
+            writer = csv.writer(sys.stdout, lineterminator='\n')
+            writer.writerow(fields)
+            for record in self._chain(first, records):
+                writer.writerow(flatten(record))
+            return
+
+        # Fixed column widths keep the table streamable without buffering every row
+        widths = [{'name': 24, 'tool': 10, 'interpreter': 14, 'tags': 20}.get(field, 40) for field in fields]
+        def row(values: List[str]) -> str:
+            cells = [value if len(value) <= width else value[:width - 3] + '...' for value, width in zip(values, widths)]
+            return '  '.join(cell.ljust(width) for cell, width in zip(cells, widths)).rstrip()
+
+        sys.stdout.write(row([field.upper() for field in fields]) + '\n')
+        sys.stdout.write(row(['-' * width for width in widths]) + '\n')
+        for record in self._chain(first, records):
+            sys.stdout.write(row(flatten(record)) + '\n')
     
     def activate_project(self, name: str):
         """Show activation instructions for a project"""
@@ -223,14 +2015,18 @@ class VenvManager:
             print(f"Project '{name}' not found!")
             return
         
-        info = self.config['projects'][name]
-        tool = info['tool']
-        path = info['path']
+        project = self.config['projects'][name]
+        tool = project.tool
+        path = project.path
         
         print(f"\n[TOOL] Activating project '{name}' ({tool}):")
         print("-" * 40)
         
-        if tool == 'virtualenv':
+        if project.matrix:
+            for version, venv_path in project.matrix.items():
+                print(f"Python {version}:")
+                print(f"  {self.get_activation_script(Path(venv_path), tool)}")
+        elif tool == 'virtualenv':
             if self.is_windows:
                 print(f"Windows Command Prompt:")
                 print(f"  {path}\\Scripts\\activate.bat")
@@ -251,85 +2047,1951 @@ class VenvManager:
             print(f"  cd {Path(path).name}")
             print(f"  poetry shell")
     
-    def update_dependencies(self, name: str):
+    @operation('update', target=_updated_project)
+    def update_dependencies(self, name: str, jobs: Optional[int] = None) -> bool:
         """Update dependencies for a project"""
         if name not in self.config['projects']:
             print(f"Project '{name}' not found!")
-            return
+            return False
         
-        info = self.config['projects'][name]
-        tool = info['tool']
-        path = info['path']
+        project = self.config['projects'][name]
+        tool = project.tool
+        path = project.path
         
         print(f"Updating dependencies for '{name}' ({tool})...")
+
+        if project.matrix:
+            envs = self.get_project_envs(name)
+            results = self._run_matrix({
+                label: [str(self.get_venv_python(venv_path)), '-m', 'pip', 'install', '--upgrade', 'pip']
+                for label, venv_path in envs.items()
+            }, jobs=jobs)
+            self._print_matrix_results(name, results)
+            if not all(result['returncode'] == 0 for result in results.values()):
+                return False
+            self._auto_slim(name)
+            self._check_startup(name)
+            return True
+
+        try:
+            if tool == 'virtualenv':
+                # For virtualenv, we need to activate and update
+                if self.is_windows:
+                    activate_script = Path(path) / 'Scripts' / 'activate.bat'
+                    self._run(f'"{activate_script}" && pip install --upgrade pip', 
+                                 shell=True, check=True)
+                else:
+                    # For Linux and macOS
+                    activate_script = Path(path) / 'bin' / 'activate'
+                    if self.is_linux:
+                        self._run(f'source "{activate_script}" && pip install --upgrade pip', 
+                                     shell=True, executable='/bin/bash', check=True)
+                    else:  # macOS
+                        self._run(f'source "{activate_script}" && pip install --upgrade pip', 
+                                     shell=True, executable='/bin/zsh', check=True)
+                requirements = Path(path) / 'requirements.txt'
+                if requirements.exists():
+                    # Pinned sdist-only packages are built once per host and ABI, then installed from the cache
+                    python = self.get_venv_python(Path(path))
+                    self.build_wheels(python, self.pinned_requirements(
+                        requirements.read_text(encoding='utf-8').splitlines()), jobs=jobs)
+                    self._run([str(python), '-m', 'pip', 'install', '--disable-pip-version-check',
+                               '-r', str(requirements)], env=self.pip_environ(python), check=True)
+            elif tool == 'pipenv':
+                env_path = self.get_env_path(name)
+                env = self.pip_environ(self.get_venv_python(env_path)) if env_path else None
+                self._run(self.tool_command('pipenv') + ['update'], cwd=path, env=env, check=True)
+            elif tool == 'poetry':
+                self._run(self.tool_command('poetry') + ['update'], cwd=path, check=True)
+            if tool != 'virtualenv':
+                self.get_env_path(name, refresh=True)
+            
+            print(f"[OK] Dependencies updated for '{name}'!")
+            self._auto_slim(name)
+            self._check_startup(name)
+            return True
+            
+        except subprocess.CalledProcessError as e:
+            print(f"[ERROR] Failed to update dependencies: {e}")
+            return False
+    
+    MIGRATE_SKIP = ('pip', 'setuptools', 'wheel', 'distribute')
+
+    def get_env_path(self, name: str, refresh: bool = False) -> Optional[Path]:
+        """Get the virtual environment a project runs in (the newest one for a matrix).
+
+        pipenv and poetry environments are resolved once and cached in the
+        registry. The cache is trusted while its pyvenv.cfg and interpreter still exist.
+        """
+        project = self.config['projects'][name]
+        if project.tool == 'virtualenv':
+            return Path(project.newest_env())
+        if not refresh and project.env and project.interpreter and os.path.isfile(project.interpreter) \
+                and os.path.isfile(os.path.join(project.env, 'pyvenv.cfg')):
+            return Path(project.env)
+        env_path = self._resolve_env_path(project)
+        self._set_env(name, env_path)
+        return env_path
+
+    def _resolve_env_path(self, project: Project) -> Optional[Path]:
+        """Ask pipenv or poetry where a project's environment is (slow: starts the tool)"""
+        args = ['--venv'] if project.tool == 'pipenv' else ['env', 'info', '--path']
+        cmd = self.tool_command(project.tool) + args
+        try:
+            result = self._run(cmd, cwd=project.path, capture_output=True, text=True, check=True)
+        except (subprocess.CalledProcessError, OSError):
+            return None
+        lines = result.stdout.strip().splitlines()
+        return Path(lines[-1].strip()) if lines else None
+
+    def _set_env(self, name: str, env_path: Optional[Path], save: bool = True):
+        """Record a project's resolved environment and interpreter if they changed"""
+        project = self.config['projects'][name]
+        env = str(env_path) if env_path else None
+        interpreter = str(self.get_venv_python(env_path)) if env_path else None
+        if (project.env, project.interpreter) != (env, interpreter):
+            project = project.copy()
+            project.env, project.interpreter = env, interpreter
+            self.register_project(name, project, save=save)
+
+    def refresh_envs(self, names: Optional[List[str]] = None, jobs: Optional[int] = None) -> bool:
+        """Resolve the environments of pipenv and poetry projects concurrently and cache them"""
+        projects = self.config['projects']
+        if names is None:
+            tools = self.index.facets['tool']
+            names = sorted(tools.get('pipenv', set()) | tools.get('poetry', set()))
+        names = [name for name in names if name in projects and projects[name].tool != 'virtualenv']
+        if not names:
+            print("No pipenv or poetry projects to refresh.")
+            return True
+
+        started = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=jobs) as pool:
+            resolved = list(pool.map(lambda name: self._resolve_env_path(projects[name]), names))
+        with self._lock:
+            for name, env_path in zip(names, resolved):
+                self._set_env(name, env_path, save=False)
+            self.save_config()
+
+        for name, env_path in zip(names, resolved):
+            if env_path is not None:
+                print(f"[OK] {name}: {env_path}")
+            else:
+                print(f"[ERROR] {name}: no environment found")
+        found = sum(1 for env_path in resolved if env_path is not None)
+        print(f"{found}/{len(names)} environments resolved in {time.perf_counter() - started:.1f}s")
+        return found == len(names)
+
+    @staticmethod
+    def canonical_name(name: str) -> str:
+        return re.sub(r'[-_.]+', '-', name).lower()
+
+    def export_installed(self, site_packages: Path) -> List[Dict]:
+        """Read the name and version of every distribution installed in site-packages from its dist-info"""
+        dists = []
+        for dist_info in sorted(site_packages.glob('*.dist-info')):
+            metadata = {}
+            try:
+                with open(dist_info / 'METADATA', encoding='utf-8') as f:
+                    for line in f:
+                        if not line.strip():
+                            break
+                        key, sep, value = line.partition(':')
+                        if sep and key in ('Name', 'Version'):
+                            metadata[key.lower()] = value.strip()
+            except (OSError, UnicodeDecodeError):
+                continue
+            if len(metadata) == 2 and self.canonical_name(metadata['name']) not in self.MIGRATE_SKIP:
+                dists.append({'name': metadata['name'], 'version': metadata['version'], 'dist_info': dist_info})
+        return dists
+
+    @staticmethod
+    def _toml_key(name: str) -> str:
+        return name if re.fullmatch(r'[A-Za-z0-9_-]+', name) else f'"{name}"'
+
+    @staticmethod
+    def _insert_into_section(text: str, header: str, lines: List[str]) -> Optional[str]:
+        """Append lines to the end of a TOML section, or return None if the section is missing"""
+        source = text.splitlines()
+        if header not in source:
+            return None
+        at = source.index(header) + 1
+        while at < len(source) and source[at].strip() and not source[at].startswith('['):
+            at += 1
+        return '\n'.join(source[:at] + lines + source[at:]) + '\n'
+
+    def write_manifest(self, project: Project, dists: List[Dict], python_version: Optional[str] = None) -> Path:
+        """Write exported distributions into the project's native dependency file"""
+        project_dir = Path(project.path)
+        if project.tool == 'virtualenv':
+            manifest = project_dir / 'requirements.txt'
+            manifest.write_text(''.join(f"{dist['name']}=={dist['version']}\n" for dist in dists), encoding='utf-8')
+            return manifest
+
+        if project.tool == 'pipenv':
+            manifest = project_dir / 'Pipfile'
+            lines = [f"{self._toml_key(dist['name'])} = \"=={dist['version']}\"" for dist in dists]
+            text = manifest.read_text(encoding='utf-8') if manifest.exists() else ''
+            updated = self._insert_into_section(text, '[packages]', lines)
+            if updated is None:
+                python_version = python_version or '.'.join(platform.python_version_tuple()[:2])
+                updated = '\n'.join([
+                    '[[source]]', 'url = "https://pypi.org/simple"', 'verify_ssl = true', 'name = "pypi"', '',
+                    '[packages]', *lines, '', '[dev-packages]', '',
+                    '[requires]', f'python_version = "{python_version}"',
+                ]) + '\n'
+            manifest.write_text(updated, encoding='utf-8')
+            return manifest
+
+        manifest = project_dir / 'pyproject.toml'
+        text = manifest.read_text(encoding='utf-8')
+        updated = self._insert_into_section(
+            text, '[tool.poetry.dependencies]',
+            [f"{self._toml_key(dist['name'])} = \"{dist['version']}\"" for dist in dists])
+        if updated is None:
+            # Poetry 2 scaffolds PEP 621 metadata with a [project] dependencies array
+            entries = ''.join(f"    \"{dist['name']}=={dist['version']}\",\n" for dist in dists)
+            updated = re.sub(r'(?m)^dependencies = \[\s*\]$', lambda _: f'dependencies = [\n{entries}]', text, count=1)
+            if updated == text:
+                updated = re.sub(r'(?m)^dependencies = \[\n', lambda m: m.group(0) + entries, text, count=1)
+        manifest.write_text(updated, encoding='utf-8')
+        return manifest
+
+    @staticmethod
+    def _entry_point_scripts(dist_info: Path) -> Set[str]:
+        """Get the script names pip generates from entry_points.txt when installing a wheel"""
+        names, section = set(), None
+        try:
+            lines = (dist_info / 'entry_points.txt').read_text(encoding='utf-8').splitlines()
+        except (OSError, UnicodeDecodeError):
+            return names
+        for line in lines:
+            line = line.strip()
+            if line.startswith('['):
+                section = line
+            elif section in ('[console_scripts]', '[gui_scripts]') and '=' in line:
+                names.add(line.split('=', 1)[0].strip())
+        return names
+
+    def repack_wheel(self, prefix: Path, site_packages: Path, dist: Dict, wheel_dir: Path) -> Optional[Path]:
+        """Rebuild a wheel from an installed distribution using the files listed in its RECORD.
+
+        Returns None for installs that cannot be repacked, such as legacy installs
+        without WHEEL metadata or ones with files missing from disk.
+        """
+        dist_info = dist['dist_info']
+        try:
+            wheel_metadata = (dist_info / 'WHEEL').read_text(encoding='utf-8')
+            with open(dist_info / 'RECORD', newline='', encoding='utf-8') as f:
+                record = [row[0] for row in csv.reader(f) if row]
+        except (OSError, UnicodeDecodeError):
+            return None
+        tags = [line.split(':', 1)[1].strip() for line in wheel_metadata.splitlines() if line.startswith('Tag:')]
+        if not tags:
+            return None
+        tag = '-'.join('.'.join(dict.fromkeys(t.split('-')[i] for t in tags)) for i in range(3))
+        escaped = re.sub(r'[-_.]+', '_', dist['name'])
+        version = dist['version'].replace('-', '_')
+        wheel = wheel_dir / f'{escaped}-{version}-{tag}.whl'
+        if wheel.exists():
+            return wheel
+
+        data_dir = f"{escaped}-{dist['version']}.data"
+        entry_points = self._entry_point_scripts(dist_info)
+        members = []
+        for rel in record:
+            if rel.endswith('.pyc') or '__pycache__/' in rel:
+                continue
+            if rel.startswith(f'{dist_info.name}/') and rel.split('/', 1)[1] in ('RECORD', 'INSTALLER', 'REQUESTED', 'direct_url.json'):
+                continue
+            source = Path(os.path.normpath(site_packages / rel))
+            if not rel.startswith('..'):
+                members.append((rel, source, False))
+                continue
+            # Files installed outside site-packages came from the wheel's .data directory
+            parts = Path(os.path.relpath(source, prefix)).parts
+            if parts[0] in ('bin', 'Scripts') and len(parts) == 2:
+                script = parts[1][:-4] if parts[1].endswith('.exe') else parts[1]
+                if script in entry_points or script.endswith('-script.py'):
+                    continue
+                members.append((f'{data_dir}/scripts/{parts[1]}', source, True))
+            else:
+                members.append((f'{data_dir}/data/{"/".join(parts)}', source, False))
+        # Metadata goes last, as wheel builders write it
+        members.sort(key=lambda member: member[0].startswith(f'{dist_info.name}/'))
+
+        def write(f):
+            rows = []
+            with zipfile.ZipFile(f, 'w', zipfile.ZIP_DEFLATED) as archive:
+                for arcname, source, is_script in members:
+                    data = source.read_bytes()
+                    first_line, newline, rest = data.partition(b'\n')
+                    if is_script and first_line.startswith(b'#!') and b'python' in first_line:
+                        # pip rewrites a bare '#!python' to the target interpreter
+                        data = b'#!python' + newline + rest
+                    digest = base64.urlsafe_b64encode(hashlib.sha256(data).digest()).rstrip(b'=').decode()
+                    rows.append(f'{arcname},sha256={digest},{len(data)}')
+                    archive.writestr(arcname, data)
+                rows.append(f'{dist_info.name}/RECORD,,')
+                archive.writestr(f'{dist_info.name}/RECORD', '\n'.join(rows) + '\n')
+
+        try:
+            # Another process may have published the wheel while this one waited for the lock
+            with self.cache.lock(wheel):
+                if not wheel.exists():
+                    self.cache.publish_file(wheel, write)
+        except OSError:
+            return None
+        return wheel
+
+    WHEEL_TAG_PROBE = ("import sys, sysconfig; print('-'.join([sys.implementation.cache_tag, "
+                       "sysconfig.get_config_var('SOABI') or sysconfig.get_config_var('EXT_SUFFIX') or 'none', "
+                       "sysconfig.get_platform()]))")
+
+    def wheel_cache_dir(self, python: Path) -> Optional[Path]:
+        """Directory of the wheels built for an interpreter's implementation, ABI and platform"""
+        tag = self.probe_interpreter(python, self.WHEEL_TAG_PROBE)
+        if not tag:
+            return None
+        return self.cache.section(os.path.join('built', re.sub(r'[^\w.-]+', '_', tag)))
+
+    def pip_environ(self, python: Path, env: Optional[Dict[str, str]] = None) -> Dict[str, str]:
+        """Environment variables that point pip at the wheel cache of python's ABI and platform"""
+        env = dict(os.environ if env is None else env)
+        wheel_dir = self.wheel_cache_dir(python)
+        if wheel_dir is not None:
+            # pip splits list options given through the environment on whitespace
+            env['PIP_FIND_LINKS'] = ' '.join(filter(None, [env.get('PIP_FIND_LINKS'), str(wheel_dir)]))
+        return env
+
+    @staticmethod
+    def pinned_requirements(lines: Iterable[str]) -> List[str]:
+        """Get the name==version requirements from requirement lines, skipping options, markers and ranges"""
+        pinned = []
+        for line in lines:
+            match = re.fullmatch(r'([A-Za-z0-9][A-Za-z0-9._-]*)\s*==\s*([^\s;,*]+)', line.split('#', 1)[0].strip())
+            if match:
+                pinned.append(f'{match.group(1)}=={match.group(2)}')
+        return pinned
+
+    def _cached_wheel(self, wheel_dir: Path, name: str, version: str) -> Optional[Path]:
+        name, version = self.canonical_name(name), version.replace('-', '_')
+        try:
+            entries = list(os.scandir(wheel_dir))
+        except OSError:
+            return None
+        for entry in entries:
+            parts = entry.name.split('-')
+            if entry.name.endswith('.whl') and len(parts) >= 5 and parts[1] == version \
+                    and self.canonical_name(parts[0]) == name:
+                return Path(entry.path)
+        return None
+
+    def build_wheels(self, python: Path, requirements: List[str],
+                     jobs: Optional[int] = None) -> Dict[str, Optional[Path]]:
+        """Make sure the wheel cache of python's ABI and platform has a wheel for each name==version requirement.
+
+        Missing wheels are built in parallel with pip wheel, each under a cache
+        lock so concurrent processes build it once, and published by rename.
+        Returns the cached wheel of each requirement, or None where none could be built.
+        """
+        wheel_dir = self.wheel_cache_dir(python)
+        if wheel_dir is None:
+            return dict.fromkeys(requirements)
+        wheels = {requirement: self._cached_wheel(wheel_dir, *requirement.split('==', 1))
+                  for requirement in requirements}
+        missing = [requirement for requirement, wheel in wheels.items() if wheel is None]
+        if not missing:
+            return wheels
+
+        def build(requirement: str) -> Optional[Path]:
+            name, version = requirement.split('==', 1)
+            with self.cache.lock(wheel_dir / f'{self.canonical_name(name)}-{version}'):
+                wheel = self._cached_wheel(wheel_dir, name, version)
+                if wheel is not None:
+                    return wheel
+                temp = Path(tempfile.mkdtemp(dir=wheel_dir, prefix='.build-'))
+                try:
+                    with self.job(name):
+                        proc = self._run([str(python), '-m', 'pip', 'wheel', '--no-deps', '--disable-pip-version-check',
+                                          '--wheel-dir', str(temp), requirement])
+                    if proc.returncode != 0:
+                        return None
+                    for built in temp.glob('*.whl'):
+                        os.chmod(built, self.cache.file_mode)
+                        os.replace(built, wheel_dir / built.name)
+                except OSError:
+                    return None
+                finally:
+                    shutil.rmtree(temp, ignore_errors=True)
+                return self._cached_wheel(wheel_dir, name, version)
+
+        print(f"[CACHE] {len(requirements) - len(missing)} of {len(requirements)} wheels cached in {wheel_dir}; "
+              f"building {len(missing)}...")
+        started = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=jobs or min(len(missing), os.cpu_count() or 1)) as pool:
+            wheels.update(zip(missing, pool.map(build, missing)))
+        failed = [requirement for requirement in missing if wheels[requirement] is None]
+        print(f"[CACHE] Built {len(missing) - len(failed)} wheels in {time.perf_counter() - started:.1f}s")
+        if failed:
+            print(f"[WARNING] Could not build wheels for: {', '.join(failed)}")
+        return wheels
+
+    @staticmethod
+    def parse_lock(text: str) -> List[Dict]:
+        """Parse a hash-pinned requirements lock, as written by pip-compile --generate-hashes.
+
+        Raises ValueError for a requirement that is not pinned with == or has no hash,
+        since pip's hash-checking mode would reject it too.
+        """
+        entries = []
+        for line in re.sub(r'\\[ \t]*\r?\n', ' ', text).splitlines():
+            line = re.sub(r'(^|\s)#.*$', '', line).strip()
+            if not line or line.startswith('-'):
+                continue
+            requirement, _, options = line.partition('--hash')
+            requirement, _, marker = requirement.partition(';')
+            match = re.fullmatch(r'([A-Za-z0-9][A-Za-z0-9._-]*)(\[[^\]]*\])?\s*==\s*(\S+)', requirement.strip())
+            if match is None:
+                raise ValueError(f"requirement is not pinned with ==: {line}")
+            hashes: Dict[str, Set[str]] = {}
+            for algorithm, digest in re.findall(r'--hash[=\s]+(\w+):([0-9a-fA-F]+)', '--hash' + options):
+                hashes.setdefault(algorithm, set()).add(digest.lower())
+            if not hashes:
+                raise ValueError(f"requirement has no --hash: {line}")
+            entries.append({'name': match.group(1), 'version': match.group(3), 'marker': marker.strip() or None,
+                            'hashes': hashes, 'line': line})
+        return entries
+
+    # Falls back to the running interpreter's pip when the target environment has none
+    TAGS_PROBE = ("import sys; sys.path.append({pip_path!r}); "
+                  "from pip._vendor.packaging.tags import sys_tags; print(' '.join(map(str, sys_tags())))")
+
+    def supported_tags(self, python: Path) -> Set[str]:
+        """Get the wheel tags an interpreter accepts, most specific first"""
+        spec = importlib.util.find_spec('pip')
+        pip_path = str(Path(spec.origin).parent.parent) if spec and spec.origin else ''
+        output = self.probe_interpreter(python, self.TAGS_PROBE.format(pip_path=pip_path))
+        return set(output.split()) if output else set()
+
+    @staticmethod
+    def wheel_tags(filename: str) -> Set[str]:
+        """Expand the compressed tag sets in a wheel filename"""
+        parts = filename[:-len('.whl')].split('-')
+        if len(parts) < 5:
+            return set()
+        pythons, abis, platforms = (part.split('.') for part in parts[-3:])
+        return {f'{py}-{abi}-{plat}' for py in pythons for abi in abis for plat in platforms}
+
+    def _lock_candidates(self, python: Path) -> Dict[Tuple[str, str], List[Path]]:
+        """Index cached wheels compatible with python by (canonical name, version)"""
+        supported = self.supported_tags(python)
+        dirs = [self.cache.root / 'downloads', self.cache.root / 'wheels']
+        built = self.wheel_cache_dir(python)
+        if built is not None:
+            dirs.insert(1, built)
+        candidates: Dict[Tuple[str, str], List[Path]] = {}
+        for directory in dirs:
+            try:
+                entries = list(os.scandir(directory))
+            except OSError:
+                continue
+            for entry in entries:
+                parts = entry.name.split('-')
+                if entry.name.endswith('.whl') and len(parts) >= 5 and self.wheel_tags(entry.name) & supported:
+                    key = (self.canonical_name(parts[0]), parts[1])
+                    candidates.setdefault(key, []).append(Path(entry.path))
+        return candidates
+
+    @staticmethod
+    def _file_digest(path: Path, algorithm: str) -> str:
+        digest = hashlib.new(algorithm)
+        with open(path, 'rb') as f:
+            for block in iter(lambda: f.read(1024 * 1024), b''):
+                digest.update(block)
+        return digest.hexdigest()
+
+    def _verified_wheel(self, entry: Dict, candidates: Dict[Tuple[str, str], List[Path]]) -> Optional[Path]:
+        """Get a cached wheel for a lock entry whose hash is one the lock allows"""
+        key = (self.canonical_name(entry['name']), entry['version'].replace('-', '_'))
+        for wheel in candidates.get(key, []):
+            for algorithm, digests in entry['hashes'].items():
+                try:
+                    if self._file_digest(wheel, algorithm) in digests:
+                        return wheel
+                except (OSError, ValueError):
+                    break
+        return None
+
+    @staticmethod
+    def _installed_versions(site_packages: Path) -> Dict[str, Tuple[str, Path]]:
+        """Map the canonical name of every installed distribution to its version and dist-info"""
+        installed = {}
+        for dist_info in site_packages.glob('*.dist-info'):
+            name, _, version = dist_info.name[:-len('.dist-info')].partition('-')
+            installed[VenvManager.canonical_name(name)] = (version, dist_info)
+        return installed
+
+    def _uninstall_dist(self, site_packages: Path, dist_info: Path):
+        """Remove the files an installed distribution lists in its RECORD"""
+        try:
+            with open(dist_info / 'RECORD', newline='', encoding='utf-8') as f:
+                paths = [Path(os.path.normpath(site_packages / row[0])) for row in csv.reader(f) if row]
+        except OSError:
+            paths = []
+        parents = set()
+        for path in paths:
+            path.unlink(missing_ok=True)
+            parents.add(path.parent)
+        shutil.rmtree(dist_info, ignore_errors=True)
+        for parent in sorted(parents, key=lambda path: len(path.parts), reverse=True):
+            shutil.rmtree(parent / '__pycache__', ignore_errors=True)
+            if parent != site_packages and site_packages in parent.parents:
+                try:
+                    parent.rmdir()
+                except OSError:
+                    pass
+
+    SCRIPT_TEMPLATE = """#!{python}
+# -*- coding: utf-8 -*-
+import re
+import sys
+from {module} import {attribute}
+if __name__ == '__main__':
+    sys.argv[0] = re.sub(r'(-script\\.pyw|\\.exe)?$', '', sys.argv[0])
+    sys.exit({call}())
+"""
+
+    def unpack_wheel(self, wheel: Path, venv_path: Path, site_packages: Path, python: Path) -> str:
+        """Install a wheel by unpacking it, writing RECORD, INSTALLER and REQUESTED like pip.
+
+        Files go to their install scheme, '#!python' shebangs and console
+        scripts point at the environment's interpreter. Bytecode is not
+        compiled; Python writes it on first import. Returns the dist-info name.
+        """
+        scripts_dir = venv_path / ('Scripts' if self.is_windows else 'bin')
+        written: List[Tuple[Path, bytes]] = []
+
+        def install(target: Path, data: bytes, executable: bool = False):
+            target.parent.mkdir(parents=True, exist_ok=True)
+            target.unlink(missing_ok=True)
+            target.write_bytes(data)
+            if executable:
+                target.chmod(0o755)
+            written.append((target, data))
+
+        with zipfile.ZipFile(wheel) as archive:
+            members = [info for info in archive.infolist() if not info.is_dir()]
+            dist_info = next(info.filename.split('/')[0] for info in members
+                             if info.filename.count('/') == 1 and info.filename.endswith('.dist-info/WHEEL'))
+            data_dir = dist_info[:-len('.dist-info')] + '.data'
+            schemes = {
+                'purelib': site_packages, 'platlib': site_packages, 'scripts': scripts_dir, 'data': venv_path,
+                'headers': venv_path / 'include' / 'site' / site_packages.parent.name / dist_info.split('-')[0],
+            }
+            for info in members:
+                name = info.filename
+                if name in (f'{dist_info}/RECORD', f'{dist_info}/INSTALLER', f'{dist_info}/REQUESTED'):
+                    continue
+                scheme = 'purelib'
+                if name.startswith(data_dir + '/'):
+                    scheme, _, name = name[len(data_dir) + 1:].partition('/')
+                base = schemes.get(scheme)
+                target = Path(os.path.normpath(base / name)) if base is not None else None
+                if target is None or base not in target.parents:
+                    raise ValueError(f"{wheel.name}: unsafe path {info.filename}")
+                data = archive.read(info)
+                if scheme == 'scripts' and data.startswith(b'#!python'):
+                    data = b'#!' + os.fsencode(str(python)) + data[len(b'#!python'):]
+                install(target, data, scheme == 'scripts' or bool((info.external_attr >> 16) & 0o111))
+
+        for script, target_spec in self._console_scripts(site_packages / dist_info).items():
+            module, _, attribute = target_spec.partition(':')
+            attribute = attribute.split('[')[0].strip()
+            text = self.SCRIPT_TEMPLATE.format(python=python, module=module.strip(),
+                                               attribute=attribute.split('.')[0], call=attribute)
+            install(scripts_dir / script, text.encode('utf-8'), executable=True)
+        install(site_packages / dist_info / 'INSTALLER', b'venv_manager\n')
+        install(site_packages / dist_info / 'REQUESTED', b'')
+
+        rows = []
+        for target, data in written:
+            digest = base64.urlsafe_b64encode(hashlib.sha256(data).digest()).rstrip(b'=').decode()
+            rows.append([Path(os.path.relpath(target, site_packages)).as_posix(), f'sha256={digest}', len(data)])
+        rows.append([f'{dist_info}/RECORD', '', ''])
+        with open(site_packages / dist_info / 'RECORD', 'w', newline='', encoding='utf-8') as f:
+            csv.writer(f, lineterminator='\n').writerows(rows)
+        return dist_info
+
+    @staticmethod
+    def _console_scripts(dist_info: Path) -> Dict[str, str]:
+        """Get the console and GUI scripts an installed distribution declares"""
+        scripts, section = {}, None
+        try:
+            lines = (dist_info / 'entry_points.txt').read_text(encoding='utf-8').splitlines()
+        except (OSError, UnicodeDecodeError):
+            return scripts
+        for line in lines:
+            line = line.strip()
+            if line.startswith('['):
+                section = line
+            elif section in ('[console_scripts]', '[gui_scripts]') and '=' in line:
+                name, _, target = line.partition('=')
+                scripts[name.strip()] = target.strip()
+        return scripts
+
+    @operation('install_lock', target=lambda self, arguments: _project_dirs(self, arguments['name']))
+    def install_lock(self, name: str, lock_file: str, jobs: Optional[int] = None) -> bool:
+        """Install a hash-pinned lock into a project's environment.
+
+        Cached wheels whose hashes the lock allows are verified and unpacked
+        concurrently. The rest are downloaded into the cache by pip with hash
+        checking and unpacked too; requirements with markers, sdists and
+        anything else that is still not a cached wheel are installed by pip.
+        """
+        if name not in self.config['projects']:
+            print(f"Project '{name}' not found!")
+            return False
+        envs = self.get_project_envs(name)
+        if len(envs) != 1:
+            print(f"[ERROR] '{name}' needs exactly one environment for install --lock")
+            return False
+        venv_path = next(iter(envs.values()))
+        cfg = self.read_pyvenv_cfg(venv_path)
+        python = self.get_venv_python(venv_path)
+        if cfg is None or not python.exists():
+            print(f"[ERROR] Could not find the environment of '{name}'")
+            return False
+        try:
+            entries = self.parse_lock(Path(lock_file).read_text(encoding='utf-8'))
+        except (OSError, UnicodeDecodeError, ValueError) as e:
+            print(f"[ERROR] Invalid lock file {lock_file}: {e}")
+            return False
+        site_packages = self._site_packages(venv_path, cfg)
+        started = time.perf_counter()
+        workers = jobs or min(32, (os.cpu_count() or 1) * 2)
+
+        installed = self._installed_versions(site_packages)
+        pending = [entry for entry in entries
+                   if installed.get(self.canonical_name(entry['name']), (None,))[0] != entry['version']]
+        present = len(entries) - len(pending)
+        # pip evaluates environment markers; Windows console scripts need pip's .exe launchers
+        direct = [entry for entry in pending if entry['marker'] is None]
+        via_pip = [entry for entry in pending if entry['marker'] is not None]
+
+        candidates = self._lock_candidates(python)
+        with ThreadPoolExecutor(max_workers=workers) as pool:
+            wheels = dict(zip(map(id, direct), pool.map(lambda entry: self._verified_wheel(entry, candidates), direct)))
+        uncached = [entry for entry in direct if wheels[id(entry)] is None]
+        if uncached:
+            downloads = self.cache.section('downloads')
+            print(f"[CACHE] {len(direct) - len(uncached)} of {len(direct)} wheels cached; "
+                  f"downloading {len(uncached)} into {downloads}...")
+            with tempfile.TemporaryDirectory() as temp_dir:
+                partial = Path(temp_dir) / 'requirements.lock'
+                partial.write_text(''.join(entry['line'] + '\n' for entry in uncached), encoding='utf-8')
+                fetched = Path(temp_dir) / 'downloads'
+                self._run([str(python), '-m', 'pip', 'download', '--no-deps', '--require-hashes',
+                           '--disable-pip-version-check', '--dest', str(fetched), '-r', str(partial)],
+                          env=self.pip_environ(python))
+                for file in fetched.glob('*'):
+                    # pip checked the hashes, so the files can be published to every user of the cache
+                    os.chmod(file, self.cache.file_mode)
+                    os.replace(file, downloads / file.name)
+            candidates = self._lock_candidates(python)
+            for entry in uncached:
+                wheels[id(entry)] = self._verified_wheel(entry, candidates)
+        unpack = []
+        for entry in direct:
+            wheel = wheels[id(entry)]
+            if wheel is None or (self.is_windows and self._wheel_has_scripts(wheel)):
+                via_pip.append(entry)
+            else:
+                unpack.append(entry)
+
+        def install(entry: Dict) -> Optional[str]:
+            try:
+                previous = installed.get(self.canonical_name(entry['name']))
+                if previous is not None:
+                    self._uninstall_dist(site_packages, previous[1])
+                self.unpack_wheel(wheels[id(entry)], venv_path, site_packages, python)
+            except (OSError, ValueError, StopIteration, zipfile.BadZipFile) as e:
+                return f"{entry['name']}=={entry['version']}: {e or 'no dist-info in wheel'}"
+            return None
+
+        unpack_started = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=workers) as pool:
+            errors = [error for error in pool.map(install, unpack) if error]
+        unpack_time = time.perf_counter() - unpack_started
+        for error in errors:
+            print(f"[ERROR] {error}")
+
+        ok = not errors
+        if via_pip:
+            print(f"[INSTALL] Installing {len(via_pip)} requirements with pip...")
+            with tempfile.NamedTemporaryFile('w', suffix='.lock', delete=False, encoding='utf-8') as f:
+                f.write(''.join(entry['line'] + '\n' for entry in via_pip))
+            try:
+                proc = self._run([str(python), '-m', 'pip', 'install', '--no-deps', '--require-hashes',
+                                  '--disable-pip-version-check', '-r', f.name], env=self.pip_environ(python))
+            finally:
+                os.unlink(f.name)
+            if proc.returncode != 0:
+                ok = False
+                print(f"[ERROR] pip failed to install: {', '.join(entry['name'] for entry in via_pip)}")
+
+        print(f"[{'OK' if ok else 'ERROR'}] {len(unpack) - len(errors)} wheels unpacked in {unpack_time:.2f}s "
+              f"({workers} jobs), {len(via_pip)} via pip, {present} already installed; "
+              f"{time.perf_counter() - started:.2f}s total")
+        if ok:
+            self._auto_slim(name)
+            self._check_startup(name)
+        return ok
+
+    @staticmethod
+    def _wheel_has_scripts(wheel: Path) -> bool:
+        try:
+            with zipfile.ZipFile(wheel) as archive:
+                return any(name.endswith('.dist-info/entry_points.txt') for name in archive.namelist())
+        except (OSError, zipfile.BadZipFile):
+            return True
+
+    def populate_environment(self, name: str, dists: List[Dict], prefix: Path, site_packages: Path,
+                             jobs: Optional[int] = None) -> bool:
+        """Install exported distributions into a project's environment from wheels repacked from the source"""
+        env_path = self.get_env_path(name)
+        if env_path is None or not self.get_venv_python(env_path).exists():
+            print(f"[ERROR] Could not find the environment of '{name}'")
+            return False
+        if not dists:
+            return True
+
+        wheel_dir = self.cache.section('wheels')
+        with ThreadPoolExecutor(max_workers=jobs) as pool:
+            wheels = list(pool.map(lambda dist: self.repack_wheel(prefix, site_packages, dist, wheel_dir), dists))
+        cached = [f"{dist['name']}=={dist['version']}" for dist, wheel in zip(dists, wheels) if wheel]
+        missing = [f"{dist['name']}=={dist['version']}" for dist, wheel in zip(dists, wheels) if not wheel]
+        print(f"[CACHE] {len(cached)} of {len(dists)} packages repacked into {wheel_dir}")
+
+        # Every dependency is pinned in the exported set, so no resolution is needed
+        python = self.get_venv_python(env_path)
+        pip = [str(python), '-m', 'pip', 'install', '--no-deps', '--disable-pip-version-check']
+        try:
+            if cached:
+                self._run(pip + ['--no-index', '--find-links', str(wheel_dir)] + cached, check=True)
+            if missing:
+                # Packages that could not be repacked go through the host's wheel build cache
+                built = self.build_wheels(python, missing, jobs=jobs)
+                offline = [requirement for requirement in missing if built[requirement] is not None]
+                online = [requirement for requirement in missing if built[requirement] is None]
+                if offline:
+                    links = ['--find-links', str(built[offline[0]].parent)]
+                    self._run(pip + ['--no-index'] + links + offline, check=True)
+                if online:
+                    print(f"[WARNING] Downloading packages that could not be repacked or built: {', '.join(online)}")
+                    self._run(pip + online, check=True)
+        except (subprocess.CalledProcessError, OSError) as e:
+            print(f"[ERROR] Failed to install dependencies into '{name}': {e}")
+            return False
+        return True
+
+    def _migration_name(self, name: str, new_tool: str, taken: Iterable[str] = ()) -> str:
+        """Default name for a migrated project: name-tool, numbered when registered, taken or ./name-tool exists.
+
+        The source's own name is never reused, as registering the new project
+        under it would orphan the source environment.
+        """
+        taken = set(taken)
+        candidate, number = f'{name}-{new_tool}', 2
+        while candidate in self.config['projects'] or candidate in taken or (Path.cwd() / candidate).exists():
+            candidate, number = f'{name}-{new_tool}-{number}', number + 1
+        return candidate
+
+    @operation('migrate', target=lambda self, arguments: _project_dirs(self, arguments['new_name']),
+               succeeded=lambda error: error is None)
+    def _migrate(self, name: str, new_tool: str, new_name: str, jobs: Optional[int] = None) -> Optional[str]:
+        """Create new_name with new_tool from the packages installed for name; return an error message on failure"""
+        source_env = self.get_env_path(name)
+        cfg = self.read_pyvenv_cfg(source_env) if source_env else None
+        if cfg is None:
+            return f"could not find the environment of '{name}'"
+        site_packages = self._site_packages(source_env, cfg)
+        dists = self.export_installed(site_packages)
+        print(f"[LIST] Exported {len(dists)} installed packages from {source_env}")
+
+        # Keep the interpreter's minor version so binary wheels stay installable
+        python_version = '.'.join(self._cfg_version(cfg).split('.')[:2]) or None
+        create = {'virtualenv': self.create_virtualenv, 'pipenv': self.create_pipenv,
+                  'poetry': self.create_poetry}[new_tool]
+        if not create(new_name, python_version):
+            return f"could not create {new_tool} project '{new_name}'"
+
+        manifest = self.write_manifest(self.config['projects'][new_name], dists, python_version)
+        print(f"[FILE] Dependencies written to {manifest}")
+        if not self.populate_environment(new_name, dists, source_env, site_packages, jobs=jobs):
+            return f"could not install dependencies into '{new_name}'"
+        return None
+
+    def migrate_project(self, name: str, new_tool: str, assume_yes: bool = False,
+                        new_name: Optional[str] = None, jobs: Optional[int] = None) -> bool:
+        """Migrate a project to another tool, carrying its installed packages over without a network"""
+        if name not in self.config['projects']:
+            print(f"Project '{name}' not found!")
+            return False
         
+        current_tool = self.config['projects'][name].tool
+        
+        if current_tool == new_tool:
+            print(f"Project '{name}' is already using {new_tool}!")
+            return False
+        if new_tool not in ('virtualenv', 'pipenv', 'poetry'):
+            print(f"Unknown tool: {new_tool}")
+            return False
+        
+        print(f"Migrating '{name}' from {current_tool} to {new_tool}...")
+        print("[WARNING]  This will create a new project structure. Your code will be preserved.")
+        
+        default_name = self._migration_name(name, new_tool)
+        if not assume_yes:
+            confirm = input("Continue? (y/N): ").lower().strip()
+            if confirm != 'y':
+                print("Migration cancelled.")
+                return False
+            new_name = new_name or input(f"Enter new project name (default: {default_name}): ").strip()
+        new_name = new_name or default_name
+        if new_name == name or new_name in self.config['projects']:
+            print(f"[ERROR] '{new_name}' is already registered; choose a new project name")
+            return False
+
+        error = self._migrate(name, new_tool, new_name, jobs=jobs)
+        if error:
+            print(f"[ERROR] Migration failed: {error}")
+            return False
+        
+        print(f"[OK] Migration completed! New project: {new_name}")
+        if new_tool != 'virtualenv':
+            print(f"[TIP] Run '{new_tool} lock' to refresh the lock file from the migrated dependencies.")
+        print("📝 Don't forget to copy your source code to the new project directory.")
+        return True
+
+    def _rollback_migration(self, new_name: str, new_tool: str, new_path: Path,
+                            path_existed: bool, previous: Optional[Project]):
+        """Remove what a failed migration created and restore the registry entry it replaced"""
+        project = self.config['projects'].get(new_name)
+        if not path_existed:
+            if project is not None and project.tool == new_tool and new_tool != 'virtualenv':
+                # pipenv and poetry may have created a central environment outside the project
+                env_path = self.get_env_path(new_name)
+                if env_path is not None and new_path not in env_path.parents:
+                    self._remove_tree(env_path)
+            self._remove_tree(new_path)
+            self._clear_partial(new_path)
+        if previous is not None:
+            self.register_project(new_name, previous)
+        else:
+            self.unregister_project(new_name)
+
+    def migrate_projects(self, new_tool: str, names: Optional[List[str]] = None, tags: Optional[List[str]] = None,
+                         jobs: Optional[int] = None, report_file: Optional[str] = None,
+                         rollback: bool = True) -> bool:
+        """Migrate many projects concurrently without prompting and write a JSON report.
+
+        Every migration fills the same wheel cache, so packages shared between
+        projects are repacked once. Failed migrations are rolled back unless
+        rollback is False.
+        """
+        if new_tool not in ('virtualenv', 'pipenv', 'poetry'):
+            print(f"Unknown tool: {new_tool}")
+            return False
+        projects = self.config['projects']
+        if names is None:
+            names = list(self.index.query(tags=tags))
+        unknown = [name for name in names if name not in projects]
+        if unknown:
+            print(f"[ERROR] Projects not found: {', '.join(unknown)}")
+            return False
+
+        results, pending = [], []
+        for name in names:
+            project = projects[name]
+            if project.tool == new_tool or project.status == 'creating':
+                reason = f"already uses {new_tool}" if project.tool == new_tool else "creation not finished"
+                results.append({'name': name, 'new_name': None, 'from': project.tool, 'to': new_tool,
+                                'status': 'skipped', 'duration': 0.0, 'error': reason})
+            else:
+                pending.append(name)
+        # Names are chosen up front so concurrent migrations never race for the same directory
+        targets, taken = {}, set()
+        for name in pending:
+            new_name = self._migration_name(name, new_tool, taken)
+            taken.add(new_name)
+            targets[name] = new_name
+
+        def migrate(name: str) -> Dict:
+            new_name = targets[name]
+            source_tool = projects[name].tool
+            new_path = Path.cwd() / new_name
+            path_existed = new_path.exists()
+            previous = projects[new_name].copy() if new_name in projects else None
+            started = time.perf_counter()
+            try:
+                with self.job(name):
+                    error = self._migrate(name, new_tool, new_name)
+            except (OSError, subprocess.SubprocessError) as e:
+                error = str(e)
+            status = 'migrated' if error is None else 'failed'
+            if error is not None and rollback:
+                self._rollback_migration(new_name, new_tool, new_path, path_existed, previous)
+                status = 'rolled_back'
+            return {'name': name, 'new_name': new_name, 'from': source_tool, 'to': new_tool, 'status': status,
+                    'duration': round(time.perf_counter() - started, 3), 'error': error}
+
+        print(f"Migrating {len(pending)} projects to {new_tool}...")
+        started_at = time.strftime('%Y-%m-%dT%H:%M:%S')
+        started = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=jobs) as pool:
+            results.extend(pool.map(migrate, pending))
+        duration = time.perf_counter() - started
+
+        counts = {status: sum(1 for result in results if result['status'] == status)
+                  for status in ('migrated', 'failed', 'rolled_back', 'skipped')}
+        report = {'tool': new_tool, 'started': started_at, 'duration': round(duration, 3), **counts, 'projects': results}
+        if report_file is None:
+            report_path = self.data_dir / 'migrations' / f"{time.strftime('%Y%m%d-%H%M%S')}-{new_tool}.json"
+        else:
+            report_path = Path(report_file)
+        report_path.parent.mkdir(parents=True, exist_ok=True)
+        report_path.write_text(json.dumps(report, indent=2), encoding='utf-8')
+
+        print(f"\n[LIST] Migration to {new_tool}:")
+        print("-" * 50)
+        for result in results:
+            if result['status'] == 'migrated':
+                print(f"[OK] {result['name']} -> {result['new_name']} ({result['duration']:.1f}s)")
+            elif result['status'] == 'skipped':
+                print(f"[SKIP] {result['name']}: {result['error']}")
+            else:
+                undone = ', rolled back' if result['status'] == 'rolled_back' else ''
+                print(f"[ERROR] {result['name']}: {result['error']} ({result['duration']:.1f}s{undone})")
+        print(f"{counts['migrated']}/{len(pending)} projects migrated in {duration:.1f}s")
+        print(f"[FILE] Report written to {report_path}")
+        return counts['migrated'] == len(pending)
+    
+    @staticmethod
+    def read_pyvenv_cfg(venv_path: Path) -> Optional[Dict[str, str]]:
+        """Parse a virtual environment's pyvenv.cfg, or return None if it is missing or unreadable"""
+        try:
+            text = (venv_path / 'pyvenv.cfg').read_text(encoding='utf-8')
+        except (OSError, UnicodeDecodeError):
+            return None
+        cfg = {}
+        for line in text.splitlines():
+            key, sep, value = line.partition('=')
+            if sep:
+                cfg[key.strip().lower()] = value.strip()
+        return cfg
+
+    @staticmethod
+    def _cfg_version(cfg: Dict[str, str]) -> str:
+        """Get the major.minor.micro version recorded in pyvenv.cfg"""
+        return '.'.join((cfg.get('version_info') or cfg.get('version') or '').split('.')[:3])
+
+    def _base_interpreter(self, cfg: Dict[str, str]) -> Path:
+        """Get the base interpreter a virtual environment was created from"""
+        home = Path(cfg.get('home', ''))
+        major_minor = '.'.join(self._cfg_version(cfg).split('.')[:2])
+        if self.is_windows:
+            candidates = [home / 'python.exe']
+        else:
+            candidates = [home / f'python{major_minor}', home / 'python3', home / 'python']
+        # 'executable' is recorded resolved, so it only counts when home has no interpreter
+        if cfg.get('executable'):
+            candidates.append(Path(cfg['executable']))
+        return next((candidate for candidate in candidates if candidate.exists()), candidates[0])
+
+    def _site_packages(self, venv_path: Path, cfg: Dict[str, str]) -> Path:
+        if self.is_windows:
+            return venv_path / 'Lib' / 'site-packages'
+        major_minor = '.'.join(self._cfg_version(cfg).split('.')[:2])
+        return venv_path / 'lib' / f'python{major_minor}' / 'site-packages'
+
+    def _check_venv(self, venv_path: Path) -> Dict:
+        """Check one virtual environment with stat calls only"""
+        result = {'venv': venv_path, 'problems': [], 'base': None, 'version': '', 'relink': False}
+        if not venv_path.is_dir():
+            result['problems'].append(f"missing directory {venv_path}")
+            return result
+        cfg = self.read_pyvenv_cfg(venv_path)
+        if cfg is None or 'home' not in cfg:
+            result['problems'].append("pyvenv.cfg is missing or invalid")
+            return result
+
+        result['version'] = self._cfg_version(cfg)
+        result['base'] = self._base_interpreter(cfg)
+        if not result['base'].exists():
+            result['problems'].append(f"base interpreter {result['base']} is missing")
+            result['relink'] = True
+        # exists() follows symlinks, so a dangling interpreter link reports False
+        if not self.get_venv_python(venv_path).exists():
+            result['problems'].append("interpreter link does not resolve")
+            result['relink'] = True
+        if not (self._site_packages(venv_path, cfg) / 'pip' / '__init__.py').exists():
+            result['problems'].append("pip is not importable")
+        return result
+
+    def _check_project(self, name: str) -> Dict:
+        project = self.config['projects'][name]
+        report = {'name': name, 'tool': project.tool, 'problems': [], 'venvs': []}
+        if project.status == 'creating':
+            report['problems'].append(f"creation incomplete after: {', '.join(project.steps or []) or 'nothing'} "
+                                      f"(rerun create to resume)")
+            return report
+        if not Path(project.path).exists():
+            report['problems'].append(f"project path {project.path} does not exist")
+        elif project.tool == 'pipenv' and not (Path(project.path) / 'Pipfile').exists():
+            report['problems'].append("Pipfile is missing")
+        elif project.tool == 'poetry' and not (Path(project.path) / 'pyproject.toml').exists():
+            report['problems'].append("pyproject.toml is missing")
+        if project.tool == 'virtualenv' and Path(project.path).exists():
+            report['venvs'] = [self._check_venv(venv_path) for venv_path in self.get_project_envs(name).values()]
+        elif project.env:
+            # Only the cached location is checked; resolving it would start the tool
+            report['venvs'] = [self._check_venv(Path(project.env))]
+        return report
+
+    VERSION_PROBE = "import sys; print('.'.join(map(str, sys.version_info[:3])))"
+
+    def probe_interpreter(self, interpreter: Path, script: str) -> Optional[str]:
+        """Run a script with an interpreter and return its output, cached in the interpreter probe cache.
+
+        Results are keyed by the real binary's identity, so an upgraded
+        interpreter is probed again, and shared by every venv built on it.
+        """
+        try:
+            real = interpreter.resolve()
+            st = real.stat()
+        except (OSError, RuntimeError):
+            return None
+        identity = [str(real), st.st_dev, st.st_ino, st.st_size, st.st_mtime_ns, script]
+        entry = self.cache.section('interpreters') / (hashlib.sha1(str(identity).encode('utf-8')).hexdigest() + '.json')
+        cached = self.cache.read_json(entry)
+        if cached is not None and cached.get('identity') == identity:
+            return cached.get('output')
+        try:
+            proc = self._run([str(interpreter), '-c', script], capture_output=True, text=True, timeout=30)
+        except (OSError, subprocess.TimeoutExpired):
+            return None
+        if proc.returncode != 0:
+            return None
+        output = proc.stdout.strip()
+        try:
+            self.cache.write_json(entry, {'identity': identity, 'output': output})
+        except OSError:
+            pass
+        return output
+
+    def _probe_interpreters(self, interpreters: Iterable[Path], jobs: Optional[int] = None) -> Dict[Path, Optional[str]]:
+        """Get the version of each distinct interpreter, starting only those missing from the probe cache"""
+        interpreters = list(dict.fromkeys(interpreters))
+        if not interpreters:
+            return {}
+        with ThreadPoolExecutor(max_workers=jobs or min(len(interpreters), 8)) as pool:
+            return dict(zip(interpreters, pool.map(
+                lambda interpreter: self.probe_interpreter(interpreter, self.VERSION_PROBE), interpreters)))
+
+    def _find_interpreter(self, version: str, probes: Dict[Path, Optional[str]]) -> Optional[Path]:
+        """Find an installed interpreter with the same major.minor version"""
+        major_minor = '.'.join(version.split('.')[:2])
+        for interpreter, probed in probes.items():
+            if probed and probed.startswith(major_minor + '.') and interpreter.exists():
+                return interpreter
+        return None
+
+    def _relink_venv(self, venv_path: Path, interpreter: Path, version: str) -> bool:
+        """Point an existing virtual environment at a new base interpreter without recreating it"""
+        if self.is_windows:
+            # venv copies the interpreter on Windows; --upgrade replaces it in place
+            proc = self._run([str(interpreter), '-m', 'venv', '--upgrade', str(venv_path)],
+                                  capture_output=True, text=True)
+            return proc.returncode == 0
+
+        bin_dir = venv_path / 'bin'
+        major, minor = version.split('.')[:2]
+        # The versioned link is fixed first so relative python/python3 links resolve through it
+        for link_name in (f'python{major}.{minor}', f'python{major}', 'python'):
+            link = bin_dir / link_name
+            if not link.exists():
+                if link.is_symlink():
+                    link.unlink()
+                link.symlink_to(interpreter)
+
+        cfg_file = venv_path / 'pyvenv.cfg'
+        lines = []
+        for line in cfg_file.read_text(encoding='utf-8').splitlines():
+            key = line.partition('=')[0].strip().lower()
+            if key == 'home':
+                line = f"home = {interpreter.parent}"
+            elif key in ('executable', 'base-executable'):
+                line = f"{key} = {interpreter}"
+            elif key in ('version', 'version_info'):
+                line = f"{key} = {version}"
+            lines.append(line)
+        cfg_file.write_text('\n'.join(lines) + '\n', encoding='utf-8')
+        return self.get_venv_python(venv_path).exists()
+
+    def doctor(self, names: Optional[List[str]] = None, repair: bool = False, jobs: Optional[int] = None) -> bool:
+        """Check registered projects concurrently and optionally re-link broken interpreters"""
+        names = names or list(self.config['projects'])
+        missing = [name for name in names if name not in self.config['projects']]
+        if missing:
+            print(f"Project '{missing[0]}' not found!")
+            return False
+        if not names:
+            print("No projects found.")
+            return True
+
+        print(f"Checking {len(names)} projects...")
+        with ThreadPoolExecutor(max_workers=jobs or min(32, len(names))) as pool:
+            reports = list(pool.map(self._check_project, names))
+
+        # One version probe per distinct base interpreter instead of one per venv
+        checks = [check for report in reports for check in report['venvs']]
+        probes = self._probe_interpreters(
+            [check['base'] for check in checks if check['base'] is not None and check['base'].exists()], jobs)
+        for check in checks:
+            probed = probes.get(check['base'])
+            if probed and check['version'] and probed.split('.')[:2] != check['version'].split('.')[:2]:
+                check['problems'].append(f"interpreter version {probed} does not match {check['version']}")
+
+        if repair and any(check['relink'] for check in checks):
+            candidates = [Path(path) for path in (shutil.which(f"python{'.'.join(check['version'].split('.')[:2])}")
+                                                  for check in checks if check['relink'] and check['version'])
+                          if path]
+            candidates.append(Path(self.config.get('python_path') or sys.executable))
+            probes.update(self._probe_interpreters(candidates, jobs))
+            for check in checks:
+                if not check['relink']:
+                    continue
+                interpreter = self._find_interpreter(check['version'], probes)
+                if interpreter is None:
+                    check['problems'].append(f"no Python {check['version']} found to re-link; recreate the environment")
+                elif self._relink_venv(check['venv'], interpreter, probes[interpreter]):
+                    check.update(self._check_venv(check['venv']), repaired=interpreter)
+
+        healthy = 0
+        print("\n[LIST] Health report:")
+        print("-" * 50)
+        for report in reports:
+            problems = report['problems'] + [
+                f"{check['venv'].name}: {problem}" for check in report['venvs'] for problem in check['problems']
+            ]
+            repaired = [check for check in report['venvs'] if check.get('repaired')]
+            if problems:
+                print(f"[ERROR] {report['name']} ({report['tool']})")
+                for problem in problems:
+                    print(f"   - {problem}")
+            else:
+                healthy += 1
+                print(f"[OK] {report['name']} ({report['tool']})")
+            for check in repaired:
+                print(f"   [FIXED] {check['venv'].name} re-linked to {check['repaired']}")
+        print(f"\n{healthy}/{len(reports)} projects healthy")
+        return healthy == len(reports)
+
+    PARTIAL_MARKER = '.venv_manager_partial'
+    GC_SCAN_DEPTH = 3
+
+    def _mark_partial(self, path: Path):
+        """Mark a directory as an unfinished creation so gc can find it after a crash"""
+        (path / self.PARTIAL_MARKER).write_text(json.dumps({'pid': os.getpid(), 'started': time.time()}))
+        with self._lock:
+            partial = self.config.setdefault('partial_creates', [])
+            if str(path) not in partial:
+                partial.append(str(path))
+                self.save_config()
+
+    def _clear_partial(self, path: Path):
         try:
-            if tool == 'virtualenv':
-                # For virtualenv, we need to activate and update
-                if self.is_windows:
-                    activate_script = Path(path) / 'Scripts' / 'activate.bat'
-                    subprocess.run(f'"{activate_script}" && pip install --upgrade pip', 
-                                 shell=True, check=True)
+            (path / self.PARTIAL_MARKER).unlink()
+        except FileNotFoundError:
+            pass
+        with self._lock:
+            if str(path) in self.config.get('partial_creates', []):
+                self.config['partial_creates'].remove(str(path))
+
+    def _creation_in_progress(self, path: Path) -> bool:
+        """Check whether the process that started a partial creation is still running"""
+        try:
+            marker = json.loads((path / self.PARTIAL_MARKER).read_text())
+            pid = int(marker['pid'])
+        except (OSError, ValueError, KeyError, TypeError):
+            return False
+        return pid != os.getpid() and self._process_alive(pid)
+
+    def _process_alive(self, pid: int) -> bool:
+        if self.is_windows:
+            # Signal 0 is CTRL_C_EVENT on Windows, so ask for the process's exit code instead
+            import ctypes
+            kernel32 = ctypes.WinDLL('kernel32', use_last_error=True)
+            handle = kernel32.OpenProcess(0x1000, False, pid)  # PROCESS_QUERY_LIMITED_INFORMATION
+            if not handle:
+                return ctypes.get_last_error() == 5  # ERROR_ACCESS_DENIED: it exists but isn't ours
+            try:
+                exit_code = ctypes.c_ulong()
+                return bool(kernel32.GetExitCodeProcess(handle, ctypes.byref(exit_code))) \
+                    and exit_code.value == 259  # STILL_ACTIVE
+            finally:
+                kernel32.CloseHandle(handle)
+        try:
+            os.kill(pid, 0)
+        except PermissionError:
+            return True
+        except OSError:
+            return False
+        return True
+
+    @staticmethod
+    def _dir_size(path: Path) -> int:
+        total = 0
+        stack = [str(path)]
+        while stack:
+            try:
+                with os.scandir(stack.pop()) as entries:
+                    for entry in entries:
+                        if entry.is_dir(follow_symlinks=False):
+                            stack.append(entry.path)
+                        elif entry.is_file(follow_symlinks=False):
+                            total += entry.stat(follow_symlinks=False).st_size
+            except OSError:
+                pass
+        return total
+
+    def _gc_excluded(self) -> Set[str]:
+        """Normalized directories gc never scans: the manager's own data and cache, with tool envs and templates"""
+        return {ProjectIndex.normalize_path(self.data_dir), ProjectIndex.normalize_path(self.cache.root)}
+
+    def _scan_root(self, root: Path, excluded: Set[str] = frozenset()) -> Tuple[List[Path], List[Path]]:
+        """Find virtual environments and partial creations below root without following symlinks"""
+        venvs, partial = [], []
+        root = ProjectIndex.normalize_path(root)
+        if any(root == path or root.startswith(path.rstrip(os.sep) + os.sep) for path in excluded):
+            return venvs, partial
+        stack = [(root, 0)]
+        while stack:
+            directory, depth = stack.pop()
+            if depth and ProjectIndex.normalize_path(directory) in excluded:
+                continue
+            try:
+                with os.scandir(directory) as entries:
+                    names = {entry.name: entry for entry in entries}
+            except OSError:
+                continue
+            if 'pyvenv.cfg' in names:
+                venvs.append(Path(directory))
+                continue
+            if self.PARTIAL_MARKER in names:
+                partial.append(Path(directory))
+                continue
+            if depth < self.GC_SCAN_DEPTH:
+                stack.extend((entry.path, depth + 1) for entry in names.values()
+                             if entry.is_dir(follow_symlinks=False) and not entry.name.startswith('.git'))
+        return venvs, partial
+
+    def _is_owned_venv(self, venv_path: Path) -> bool:
+        """Check whether a virtual environment belongs to a registered project"""
+        if self.index.find_by_path(venv_path) or ProjectIndex.normalize_path(venv_path) in self.index.envs:
+            return True
+        # pipenv keeps central environments and records the owning project in .project
+        try:
+            owner = (venv_path / '.project').read_text().strip()
+        except OSError:
+            return False
+        return bool(owner) and self.index.find_by_path(owner) is not None
+
+    def _resolve_unknown_envs(self, names: List[str], stale: List[str], workers: int) -> Tuple[str, ...]:
+        """Resolve and cache the environments of pipenv/poetry projects that have none cached.
+
+        Returns the lowercased directory names of projects whose environment
+        still could not be resolved. Both tools name central environments after
+        the project directory, so gc spares environments starting with one.
+        """
+        projects = self.config['projects']
+        pending = [name for name in names if name not in stale and projects[name].tool != 'virtualenv'
+                   and not (projects[name].env and os.path.isdir(projects[name].env))]
+        if not pending:
+            return ()
+        with ThreadPoolExecutor(max_workers=workers) as pool:
+            resolved = list(pool.map(lambda name: self._resolve_env_path(projects[name]), pending))
+        with self._lock:
+            for name, env_path in zip(pending, resolved):
+                if env_path is not None:
+                    self._set_env(name, env_path, save=False)
+        return tuple(Path(projects[name].path).name.lower()[:42]
+                     for name, env_path in zip(pending, resolved) if env_path is None)
+
+    def gc(self, roots: Optional[List[str]] = None, dry_run: bool = False,
+           assume_yes: bool = False, jobs: Optional[int] = None) -> bool:
+        """Reconcile the registry with the filesystem and remove orphans in bulk"""
+        roots = [Path(root).expanduser() for root in (roots or self.config.get('gc_roots', []))]
+        names = list(self.config['projects'])
+        workers = jobs or 16
+
+        print(f"Scanning {len(names)} registered projects and {len(roots)} roots...")
+        excluded = self._gc_excluded()
+        with ThreadPoolExecutor(max_workers=workers) as pool:
+            exists = pool.map(lambda name: os.path.exists(self.config['projects'][name].path), names)
+            scans = list(pool.map(lambda root: self._scan_root(root, excluded), roots))
+            stale = [name for name, found in zip(names, exists) if not found]
+        # Creations still running are left alone; interrupted ones are cleaned up through their partial marker
+        creating = {name for name in names if self.config['projects'][name].status == 'creating'}
+        stale = [name for name in stale if name not in creating]
+        now = time.time()
+        expired = [name for name in names if name not in stale and name not in creating
+                   and (self.config['projects'][name].expires or now) < now]
+
+        candidates = {venv for venvs, _ in scans for venv in venvs if not self._is_owned_venv(venv)}
+        if candidates:
+            # Central pipenv/poetry environments are only recognisable once their project's env is resolved
+            unresolved = self._resolve_unknown_envs(names, stale, workers)
+            orphans = sorted(venv for venv in candidates if not self._is_owned_venv(venv)
+                             and not venv.name.lower().startswith(unresolved))
+        else:
+            orphans = []
+        partial = {path for _, paths in scans for path in paths}
+        partial.update(Path(path) for path in self.config.get('partial_creates', [])
+                       if (Path(path) / self.PARTIAL_MARKER).exists())
+        partial = sorted(path for path in partial if not self._creation_in_progress(path))
+
+        expired_paths = [Path(self.config['projects'][name].path) for name in expired]
+        if not (stale or orphans or partial or expired):
+            print("[OK] Nothing to clean up")
+            return True
+
+        with ThreadPoolExecutor(max_workers=workers) as pool:
+            directories = orphans + partial + expired_paths
+            sizes = dict(zip(directories, pool.map(self._dir_size, directories)))
+
+        print("\n[LIST] Garbage collection:")
+        print("-" * 50)
+        for name in stale:
+            print(f"[STALE] {name} -> {self.config['projects'][name].path}")
+        for path in orphans:
+            print(f"[ORPHAN] {path} ({sizes[path] / 1024 / 1024:.1f} MB)")
+        for path in partial:
+            print(f"[PARTIAL] {path} ({sizes[path] / 1024 / 1024:.1f} MB)")
+        for name, path in zip(expired, expired_paths):
+            print(f"[EXPIRED] {name} -> {path} ({sizes[path] / 1024 / 1024:.1f} MB)")
+        print(f"\n{len(stale)} stale entries, {len(directories)} directories, "
+              f"{sum(sizes.values()) / 1024 / 1024:.1f} MB reclaimable")
+
+        if dry_run:
+            print("Dry run: nothing was removed.")
+            return True
+        if not assume_yes:
+            confirm = input("Remove all of the above? (y/N): ").lower().strip()
+            if confirm != 'y':
+                print("Garbage collection cancelled.")
+                return False
+
+        with ThreadPoolExecutor(max_workers=workers) as pool:
+            failures = [path for path, error in zip(directories, pool.map(self._remove_tree, directories))
+                        if error]
+        for name in stale:
+            self.unregister_project(name, save=False)
+        for name, path in zip(expired, expired_paths):
+            if path not in failures:
+                self.unregister_project(name, save=False)
+        for path in partial:
+            self._clear_partial(path)
+            owner = self.index.paths.get(ProjectIndex.normalize_path(path))
+            if owner and self.config['projects'][owner].status == 'creating':
+                self.unregister_project(owner, save=False)
+        self.save_config()
+
+        removed = len(directories) - len(failures)
+        print(f"[OK] Removed {len(stale)} stale entries and {removed} directories")
+        for path in failures:
+            print(f"[ERROR] Could not remove {path}")
+        return not failures
+
+    @staticmethod
+    def _remove_tree(path: Path) -> Optional[str]:
+        try:
+            shutil.rmtree(path)
+        except OSError as e:
+            return str(e)
+        return None
+
+    # What each slim profile removes; every profile keeps the .py sources and dist-info metadata pip needs
+    SLIM_PROFILES = {
+        'safe': ('optimized-bytecode', 'headers'),
+        'standard': ('optimized-bytecode', 'headers', 'tests', 'docs'),
+        'aggressive': ('optimized-bytecode', 'headers', 'tests', 'docs', 'test-packages', 'examples',
+                       'bytecode', 'sources'),
+    }
+    # Directory names each category removes from inside packages. 'test' is often a public
+    # subpackage (django.test), so only the aggressive profile considers it
+    SLIM_DIRECTORIES = {'tests': ('tests',), 'docs': ('docs', 'doc'), 'test-packages': ('test',),
+                        'examples': ('examples',)}
+    SLIM_TAGS = ('production',)
+
+    def _slim_candidates(self, venv_path: Path, site_packages: Path, categories: Tuple[str, ...]) -> Dict[str, List[Path]]:
+        """Find what the categories of a slim profile would remove from a virtual environment"""
+        found: Dict[str, List[Path]] = {category: [] for category in categories}
+        directories = {name: category for category in categories for name in self.SLIM_DIRECTORIES.get(category, ())}
+        sources: Dict[Path, List[Tuple[Path, Set[str]]]] = {}
+        if 'headers' in categories and (venv_path / 'include').is_dir():
+            found['headers'].append(venv_path / 'include')
+        for directory, dirs, files in os.walk(site_packages):
+            current = Path(directory)
+            # Test and doc directories only count inside a package, never as a top-level distribution
+            nested = current != site_packages and not current.name.endswith(('.dist-info', '.data'))
+            for name in list(dirs):
+                if name == '__pycache__' and 'bytecode' in categories:
+                    found['bytecode'].append(current / name)
+                elif nested and name in directories and not self._imported_elsewhere(site_packages, current / name,
+                                                                                       sources):
+                    found[directories[name]].append(current / name)
                 else:
-                    # For Linux and macOS
-                    activate_script = Path(path) / 'bin' / 'activate'
-                    if self.is_linux:
-                        subprocess.run(f'source "{activate_script}" && pip install --upgrade pip', 
-                                     shell=True, executable='/bin/bash', check=True)
-                    else:  # macOS
-                        subprocess.run(f'source "{activate_script}" && pip install --upgrade pip', 
-                                     shell=True, executable='/bin/zsh', check=True)
-            elif tool == 'pipenv':
-                os.chdir(path)
-                subprocess.run(['pipenv', 'update'], check=True)
-            elif tool == 'poetry':
-                os.chdir(path)
-                subprocess.run(['poetry', 'update'], check=True)
-            
-            print(f"[OK] Dependencies updated for '{name}'!")
-            
-        except subprocess.CalledProcessError as e:
-            print(f"[ERROR] Failed to update dependencies: {e}")
-    
-    def migrate_project(self, name: str, new_tool: str):
-        """Migrate a project from one tool to another"""
+                    continue
+                dirs.remove(name)
+            for name in files:
+                if current.name == '__pycache__' and '.opt-' in name and 'optimized-bytecode' in categories:
+                    found['optimized-bytecode'].append(current / name)
+                elif nested and name.endswith(('.c', '.cpp', '.h', '.pyx', '.pxd')) and 'sources' in categories:
+                    found['sources'].append(current / name)
+        return found
+
+    IMPORT_STATEMENT = re.compile(r'^[ \t]*(?:from[ \t]+(\.*)([\w.]*)[ \t]+import[ \t]+(\([^)]*\)|[^#\n]+)'
+                                  r'|import[ \t]+([^#\n]+))', re.MULTILINE)
+
+    @classmethod
+    def _imported_modules(cls, package: Tuple[str, ...], text: str) -> Set[str]:
+        """Dotted names a module in package imports, with relative imports made absolute"""
+        modules = set()
+        for dots, module, names, plain in cls.IMPORT_STATEMENT.findall(text):
+            if plain:
+                modules.update(name.split()[0] for name in plain.split(',') if name.split())
+                continue
+            base = list(package[:len(package) - len(dots) + 1]) if dots else []
+            prefix = '.'.join(base + ([module] if module else []))
+            modules.add(prefix)
+            for name in names.strip('()').replace('\n', ',').split(','):
+                if name.split() and name.split()[0] != '*':
+                    modules.add(f"{prefix}.{name.split()[0]}")
+        return modules
+
+    def _imported_elsewhere(self, site_packages: Path, directory: Path,
+                            sources: Dict[Path, List[Tuple[Path, Set[str]]]]) -> bool:
+        """Check whether modules of the same top-level package outside test directories import directory.
+
+        sources caches the imports of each top-level package's non-test modules between calls.
+        """
+        parts = directory.relative_to(site_packages).parts
+        top = site_packages / parts[0]
+        if top not in sources:
+            sources[top] = []
+            for path in top.rglob('*.py'):
+                relative = path.relative_to(site_packages).parts
+                if set(relative[1:-1]) & {'tests', 'test'}:
+                    continue
+                package = relative[:-1]
+                try:
+                    text = path.read_text(encoding='utf-8', errors='replace')
+                except OSError:
+                    continue
+                sources[top].append((path, self._imported_modules(package, text)))
+        module = '.'.join(parts)
+        return any(name == module or name.startswith(module + '.')
+                   for path, imports in sources[top] if directory not in path.parents for name in imports)
+
+    def _rewrite_records(self, site_packages: Path, removed: Set[str]):
+        """Drop removed files from every RECORD so pip's view of each distribution stays accurate"""
+        for record in site_packages.glob('*.dist-info/RECORD'):
+            try:
+                with open(record, newline='', encoding='utf-8') as f:
+                    rows = [row for row in csv.reader(f) if row]
+            except (OSError, UnicodeDecodeError):
+                continue
+            kept = [row for row in rows if os.path.normpath(site_packages / row[0]) not in removed]
+            if len(kept) == len(rows):
+                continue
+            temp_file = record.with_name('RECORD.tmp')
+            with open(temp_file, 'w', newline='', encoding='utf-8') as f:
+                csv.writer(f, lineterminator='\n').writerows(kept)
+            os.replace(temp_file, record)
+
+    def slim_project(self, name: str, profile: str = 'standard', dry_run: bool = False) -> bool:
+        """Remove tests, docs, headers and unneeded bytecode from a project's environments and report bytes saved"""
         if name not in self.config['projects']:
             print(f"Project '{name}' not found!")
+            return False
+        categories = self.SLIM_PROFILES.get(profile)
+        if categories is None:
+            print(f"[ERROR] Unknown slim profile: {profile} (choose from {', '.join(self.SLIM_PROFILES)})")
+            return False
+        envs = self.get_project_envs(name)
+        if not envs:
+            print(f"[ERROR] Could not find the environment of '{name}'")
+            return False
+
+        saved, counts = {category: 0 for category in categories}, {category: 0 for category in categories}
+        for venv_path in envs.values():
+            cfg = self.read_pyvenv_cfg(venv_path)
+            if cfg is None:
+                print(f"[ERROR] {venv_path} is not a virtual environment")
+                return False
+            site_packages = self._site_packages(venv_path, cfg)
+            removed: Set[str] = set()
+            for category, paths in self._slim_candidates(venv_path, site_packages, categories).items():
+                for path in paths:
+                    files = [path] if path.is_file() else [Path(directory) / file
+                                                           for directory, _, names in os.walk(path) for file in names]
+                    for file in files:
+                        try:
+                            saved[category] += file.lstat().st_size
+                        except OSError:
+                            continue
+                        counts[category] += 1
+                        removed.add(os.path.normpath(file))
+                    if not dry_run:
+                        if path.is_dir():
+                            shutil.rmtree(path, ignore_errors=True)
+                        else:
+                            path.unlink(missing_ok=True)
+            if not dry_run:
+                self._rewrite_records(site_packages, removed)
+
+        total = sum(saved.values())
+        action = "Would remove" if dry_run else "Removed"
+        print(f"[SLIM] {action} {sum(counts.values())} files from '{name}' ({profile}), "
+              f"saving {total / 1024 / 1024:.1f} MiB")
+        for category in categories:
+            print(f"   {category:<20} {counts[category]:>7} files {saved[category] / 1024 / 1024:>9.1f} MiB")
+        return True
+
+    def _auto_slim(self, name: str):
+        """Slim a project after create or sync when it carries one of the slim_tags (default: production)"""
+        project = self.config['projects'].get(name)
+        tags = self.config.get('slim_tags', self.SLIM_TAGS)
+        if project is not None and set(project.tags or ()) & set(tags):
+            self.slim_project(name, self.config.get('slim_profile', 'standard'))
+
+    # Written to stderr between interpreter startup and the measured import, so site and encodings don't count
+    STARTUP_MARKER = '--venv-manager-startup--'
+    MODULE_NAME = re.compile(r'[A-Za-z_]\w*(\.[A-Za-z_]\w*)*')
+    # Modules whose timings a baseline keeps; the rest of the import tree is stored by name only
+    STARTUP_BASELINE_MODULES = 50
+
+    @classmethod
+    def parse_importtime(cls, stderr: str) -> List[Tuple[str, int, int, int]]:
+        """Parse ``-X importtime`` output after the marker into (module, depth, self us, cumulative us)"""
+        entries = []
+        lines = stderr.splitlines()
+        if cls.STARTUP_MARKER in lines:
+            lines = lines[lines.index(cls.STARTUP_MARKER) + 1:]
+        for line in lines:
+            if not line.startswith('import time:'):
+                continue
+            fields = line[len('import time:'):].split('|')
+            if len(fields) != 3 or not fields[0].strip().isdigit():
+                continue
+            module = fields[2].rstrip()
+            # importtime indents nested imports by two spaces after a single separator space
+            depth = (len(module) - len(module.lstrip()) - 1) // 2
+            entries.append((module.strip(), depth, int(fields[0]), int(fields[1])))
+        return entries
+
+    def measure_startup(self, python: Path, module: str, runs: int, cwd: Optional[str] = None) -> Optional[Dict]:
+        """Import a module in fresh interpreters with -X importtime and take the median of each timing.
+
+        Runs are sequential so they don't compete for CPU, after one untimed run
+        that writes any missing bytecode.
+        """
+        code = f"import sys; sys.stderr.write({self.STARTUP_MARKER!r} + '\\n'); import {module}"
+        cmd = [str(python), '-X', 'importtime', '-c', code]
+        walls, imports = [], []
+        modules: Dict[str, Dict[str, List[int]]] = {}
+        for run in range(runs + 1):
+            started = time.perf_counter()
+            result = self._run(cmd, cwd=cwd, capture_output=True, text=True)
+            wall = time.perf_counter() - started
+            if result.returncode != 0:
+                tail = result.stderr.strip().splitlines()[-1:] or ['no output']
+                print(f"[ERROR] Could not import {module}: {tail[0]}")
+                return None
+            if run == 0:
+                continue
+            entries = self.parse_importtime(result.stderr)
+            walls.append(wall)
+            imports.append(sum(cumulative for _, depth, _, cumulative in entries if depth == 0))
+            for name, _, self_us, cumulative in entries:
+                timings = modules.setdefault(name, {'self': [], 'cumulative': []})
+                timings['self'].append(self_us)
+                timings['cumulative'].append(cumulative)
+        return {
+            'runs': runs,
+            'wall': statistics.median(walls),
+            'import': statistics.median(imports),
+            'modules': {name: {'self': statistics.median(timings['self']),
+                               'cumulative': statistics.median(timings['cumulative'])}
+                        for name, timings in modules.items()},
+        }
+
+    def _startup_regressions(self, baseline: Dict, current: Dict) -> List[str]:
+        """Describe timings that grew past both the relative and absolute thresholds"""
+        percent = self.config.get('startup_regression_pct', 20) / 100
+        minimum = self.config.get('startup_regression_ms', 10) * 1000
+
+        def slower(before: float, after: float) -> bool:
+            return after - before >= minimum and after > before * (1 + percent)
+
+        found = []
+        if slower(baseline['import'], current['import']):
+            found.append(f"total import {baseline['import'] / 1000:.1f} ms -> {current['import'] / 1000:.1f} ms "
+                         f"(+{(current['import'] / max(baseline['import'], 1) - 1) * 100:.0f}%)")
+        # Modules below the baseline's cutoff are stored by name only; baselines from before
+        # the names were kept treat every unlisted module as one of them
+        cutoff = baseline.get('cutoff', min(baseline['modules'].values(), default=0))
+        others = set(baseline['imported']) if 'imported' in baseline else None
+        for name, timings in sorted(current['modules'].items(), key=lambda item: -item[1]['cumulative']):
+            before = baseline['modules'].get(name)
+            if before is None and (others is None or name in others):
+                if slower(cutoff, timings['cumulative']):
+                    found.append(f"{name} under {cutoff / 1000:.1f} ms -> {timings['cumulative'] / 1000:.1f} ms")
+            elif before is None:
+                # A module the baseline never imported, typically a new transitive dependency
+                if timings['cumulative'] >= minimum:
+                    found.append(f"{name} newly imported: {timings['cumulative'] / 1000:.1f} ms")
+            elif slower(before, timings['cumulative']):
+                found.append(f"{name} {before / 1000:.1f} ms -> {timings['cumulative'] / 1000:.1f} ms "
+                             f"(+{(timings['cumulative'] / max(before, 1) - 1) * 100:.0f}%)")
+        return found
+
+    def _save_startup_baseline(self, name: str, module: str, measured: Dict):
+        """Store a module's startup timings in the project's registry entry.
+
+        Timings are kept for the slowest modules; the rest are kept by name with
+        the slowest of them (the cutoff) as their upper bound.
+        """
+        kept = heapq.nlargest(self.STARTUP_BASELINE_MODULES, measured['modules'].items(),
+                              key=lambda item: item[1]['cumulative'])
+        timed = {module_name for module_name, _ in kept}
+        others = {module_name: timings['cumulative'] for module_name, timings in measured['modules'].items()
+                  if module_name not in timed}
+        project = self.config['projects'][name].copy()
+        extra = dict(project.extra or {})
+        extra['startup'] = dict(extra.get('startup') or {})
+        extra['startup'][module] = {
+            'wall': round(measured['wall'], 4),
+            'import': measured['import'],
+            'modules': {module_name: timings['cumulative'] for module_name, timings in kept},
+            'cutoff': max(others.values(), default=0),
+            'imported': sorted(others),
+            'recorded': time.strftime('%Y-%m-%dT%H:%M:%S'),
+        }
+        project.extra = extra
+        self.register_project(name, project)
+
+    @operation('startup')
+    def startup_profile(self, name: str, module: str, runs: Optional[int] = None, baseline: bool = False,
+                        top: int = 15) -> bool:
+        """Time a module's import in a project's interpreter, compare it with the stored baseline and report.
+
+        The first measurement of a module becomes its baseline; ``baseline=True``
+        replaces it. Returns False when the import fails or has regressed.
+        """
+        if name not in self.config['projects']:
+            print(f"Project '{name}' not found!")
+            return False
+        if not self.MODULE_NAME.fullmatch(module):
+            print(f"[ERROR] Not a module name: {module}")
+            return False
+        env_path = self.get_env_path(name)
+        if env_path is None:
+            print(f"[ERROR] Could not find the environment of '{name}'")
+            return False
+        project = self.config['projects'][name]
+        runs = max(1, runs or self.config.get('startup_runs', 5))
+        cwd = project.path if os.path.isdir(project.path) else None
+        measured = self.measure_startup(self.get_venv_python(env_path), module, runs, cwd=cwd)
+        if measured is None:
+            return False
+
+        print(f"[STARTUP] '{name}' {module}: {measured['wall'] * 1000:.1f} ms process, "
+              f"{measured['import'] / 1000:.1f} ms importing (median of {runs} runs)")
+        stored = (project.get('startup') or {}).get(module)
+        rows = heapq.nlargest(top, measured['modules'].items(), key=lambda item: item[1]['cumulative'])
+        print(f"   {'module':<40} {'self ms':>9} {'cumul ms':>9} {'baseline':>9}")
+        for module_name, timings in rows:
+            before = (stored or {}).get('modules', {}).get(module_name)
+            before_text = f"{before / 1000:.1f}" if before is not None else '-'
+            print(f"   {module_name:<40} {timings['self'] / 1000:>9.1f} {timings['cumulative'] / 1000:>9.1f} "
+                  f"{before_text:>9}")
+
+        if stored is None or baseline:
+            self._save_startup_baseline(name, module, measured)
+            print(f"[OK] Startup baseline for {module} saved")
+            return True
+        regressions = self._startup_regressions(stored, measured)
+        for regression in regressions:
+            print(f"[REGRESSION] {module}: {regression}")
+        if not regressions:
+            print(f"[OK] No startup regression against the baseline from {stored.get('recorded', 'unknown')}")
+        return not regressions
+
+    def _check_startup(self, name: str):
+        """Re-measure every baselined module after an update or sync and flag regressions"""
+        project = self.config['projects'].get(name)
+        if project is None:
             return
-        
-        current_info = self.config['projects'][name]
-        current_tool = current_info['tool']
-        
-        if current_tool == new_tool:
-            print(f"Project '{name}' is already using {new_tool}!")
-            return
-        
-        print(f"Migrating '{name}' from {current_tool} to {new_tool}...")
-        print("[WARNING]  This will create a new project structure. Your code will be preserved.")
-        
-        confirm = input("Continue? (y/N): ").lower().strip()
-        if confirm != 'y':
-            print("Migration cancelled.")
-            return
-        
-        # Get project name for new tool
-        new_name = input(f"Enter new project name (default: {name}): ").strip() or name
-        
-        # Create new project
-        if new_tool == 'virtualenv':
-            success = self.create_virtualenv(new_name)
-        elif new_tool == 'pipenv':
-            success = self.create_pipenv(new_name)
-        elif new_tool == 'poetry':
-            success = self.create_poetry(new_name)
+        for module in sorted(project.get('startup') or {}):
+            self.startup_profile(name, module, top=5)
+
+    VERSION_PATTERN = re.compile(
+        r'v?(?:(\d+)!)?(\d+(?:\.\d+)*)'
+        r'(?:[-_.]?(a|b|c|rc|alpha|beta|pre|preview)[-_.]?(\d*))?'
+        r'(?:-(\d+)|[-_.]?(post|rev|r)[-_.]?(\d*))?'
+        r'(?:[-_.]?(dev)[-_.]?(\d*))?(?:\+[a-z0-9.]*)?', re.IGNORECASE)
+    PRE_RELEASES = {'a': 0, 'alpha': 0, 'b': 1, 'beta': 1, 'c': 2, 'rc': 2, 'pre': 2, 'preview': 2}
+    SPECIFIER = re.compile(r'\s*(===|==|!=|~=|<=|>=|<|>)\s*([^\s,]+)\s*')
+
+    @classmethod
+    def version_key(cls, version: str) -> Optional[Tuple]:
+        """Sort key of a PEP 440 version (local labels ignored), or None when it doesn't parse"""
+        match = cls.VERSION_PATTERN.fullmatch(version.strip())
+        if match is None:
+            return None
+        epoch, release, pre, pre_n, post_implicit, post, post_n, dev, dev_n = match.groups()
+        parts = [int(part) for part in release.split('.')]
+        while len(parts) > 1 and parts[-1] == 0:
+            parts.pop()
+        if pre:
+            pre_key = (0, cls.PRE_RELEASES[pre.lower()], int(pre_n or 0))
+        elif dev and not (post or post_implicit):
+            pre_key = (-1, 0, 0)  # 1.0.dev1 sorts before 1.0a1
         else:
-            print(f"Unknown tool: {new_tool}")
-            return
-        
-        if success:
-            print(f"[OK] Migration completed! New project: {new_name}")
-            print("📝 Don't forget to copy your source code to the new project directory.")
-    
+            pre_key = (1, 0, 0)
+        post_number = int(post_implicit) if post_implicit else int(post_n or 0) if post else -1
+        dev_key = (0, int(dev_n or 0)) if dev else (1, 0)
+        return int(epoch or 0), tuple(parts), pre_key, post_number, dev_key
+
+    @classmethod
+    def _prefix_bounds(cls, operator: str, version: str) -> Optional[List[Tuple[str, Tuple]]]:
+        """Turn '~=2.2.1' or '==2.2.*' into lower and upper bound pairs, or None when they don't apply"""
+        match = cls.VERSION_PATTERN.fullmatch(version[:-2] if operator == '==' else version)
+        if match is None or (operator == '==' and any(match.groups()[2:])):
+            return None
+        epoch = f'{match.group(1)}!' if match.group(1) else ''
+        release = [int(part) for part in match.group(2).split('.')]
+        if operator == '~=':
+            if len(release) < 2:
+                return None
+            prefix, lower = release[:-1], version
+        else:
+            prefix = release
+            lower = epoch + '.'.join(map(str, release)) + '.dev0'
+        # Pre-releases of the next series sort after its .dev0, so the upper bound excludes them too
+        upper = epoch + '.'.join(map(str, prefix[:-1] + [prefix[-1] + 1])) + '.dev0'
+        return [('>=', cls.version_key(lower)), ('<', cls.version_key(upper))]
+
+    @classmethod
+    def _parse_specifiers(cls, text: str) -> List[Tuple[str, Tuple]]:
+        """Parse '>=2.0,<2.31', '~=2.2' or '==2.*' into (operator, version key) pairs; raises ValueError"""
+        clause = []
+        for part in text.split(','):
+            match = cls.SPECIFIER.fullmatch(part)
+            if match and (match.group(1) == '~=' or (match.group(1) == '==' and match.group(2).endswith('.*'))):
+                bounds = cls._prefix_bounds(match.group(1), match.group(2))
+                if bounds is None:
+                    raise ValueError(f"bad version specifier: {part.strip()!r}")
+                clause.extend(bounds)
+                continue
+            key = cls.version_key(match.group(2)) if match else None
+            if key is None:
+                raise ValueError(f"bad version specifier: {part.strip()!r}")
+            clause.append((match.group(1), key))
+        return clause
+
+    @staticmethod
+    def _osv_clauses(events: List[Dict]) -> Tuple[List[List[str]], List[str]]:
+        """Turn the events of an OSV ECOSYSTEM range into specifier clauses and fixed versions"""
+        clauses, fixed, current = [], [], None
+        for event in events:
+            if 'introduced' in event:
+                current = [] if event['introduced'] in ('0', '') else [f">={event['introduced']}"]
+                clauses.append(current)
+            elif current is not None and 'fixed' in event:
+                current.append(f"<{event['fixed']}")
+                fixed.append(event['fixed'])
+                current = None
+            elif current is not None and 'last_affected' in event:
+                current.append(f"<={event['last_affected']}")
+                current = None
+        return clauses, fixed
+
+    def load_advisories(self, feed_file: str) -> Dict[str, List[Dict]]:
+        """Index a local advisory feed by canonical package name; raises ValueError or OSError.
+
+        The feed is a list of advisories or an object holding one under
+        ``advisories`` or ``vulns``. Each advisory is either an OSV record
+        (``affected[].package.name`` with ECOSYSTEM ranges and/or ``versions``)
+        or ``{"id", "package", "affected": "<2.31" or [...], "fixed": [...]}``.
+        """
+        with open(feed_file, encoding='utf-8') as f:
+            feed = json.load(f)
+        if isinstance(feed, dict):
+            feed = feed.get('advisories', feed.get('vulns'))
+        if not isinstance(feed, list):
+            raise ValueError("expected a list of advisories")
+
+        index: Dict[str, List[Dict]] = {}
+        for advisory in feed:
+            if not isinstance(advisory, dict) or 'id' not in advisory:
+                raise ValueError(f"advisory without an id: {str(advisory)[:60]}")
+            try:
+                entries = self._advisory_entries(advisory)
+            except (ValueError, TypeError, AttributeError) as e:
+                # One malformed advisory must not hide the rest of the feed
+                print(f"[WARNING] Skipping advisory {advisory['id']}: {e}", file=sys.stderr)
+                continue
+            for name, entry in entries:
+                index.setdefault(name, []).append(entry)
+        return index
+
+    def _advisory_entries(self, advisory: Dict) -> List[Tuple[str, Dict]]:
+        """Parse one advisory into (canonical package name, index entry) pairs; raises ValueError"""
+        summary = advisory.get('summary') or (advisory.get('details') or '').split('\n')[0]
+        if 'package' in advisory and not isinstance(advisory['package'], dict):
+            affected = [{'name': advisory['package'], 'specifiers': advisory.get('affected', []),
+                         'versions': advisory.get('versions', []), 'fixed': advisory.get('fixed', [])}]
+        else:
+            affected = []
+            for entry in advisory.get('affected', []):
+                package = entry.get('package', {})
+                if package.get('ecosystem', 'PyPI') != 'PyPI' or 'name' not in package:
+                    continue
+                specifiers, fixed = [], []
+                for version_range in entry.get('ranges', []):
+                    if version_range.get('type') == 'ECOSYSTEM':
+                        clauses, range_fixed = self._osv_clauses(version_range.get('events', []))
+                        specifiers += [','.join(clause) for clause in clauses]
+                        fixed += range_fixed
+                affected.append({'name': package['name'], 'specifiers': specifiers,
+                                 'versions': entry.get('versions', []), 'fixed': fixed})
+        entries = []
+        for entry in affected:
+            specifiers, fixed = entry['specifiers'], entry['fixed']
+            specifiers = [specifiers] if isinstance(specifiers, str) else specifiers
+            fixed = [fixed] if isinstance(fixed, str) else fixed
+            entries.append((self.canonical_name(entry['name']), {
+                'id': advisory['id'],
+                'summary': summary,
+                # Empty clauses (introduced at 0 and never fixed) match every version
+                'clauses': [self._parse_specifiers(spec) if spec else [] for spec in specifiers],
+                'versions': {key for key in map(self.version_key, entry['versions']) if key is not None},
+                'fixed': sorted((version for version in fixed if self.version_key(version)), key=self.version_key),
+            }))
+        return entries
+
+    COMPARISONS = {
+        '==': lambda a, b: a == b, '===': lambda a, b: a == b, '!=': lambda a, b: a != b,
+        '<': lambda a, b: a < b, '<=': lambda a, b: a <= b, '>': lambda a, b: a > b, '>=': lambda a, b: a >= b,
+    }
+
+    def _affects(self, advisory: Dict, version: Tuple) -> bool:
+        if version in advisory['versions']:
+            return True
+        return any(all(self.COMPARISONS[op](version, bound) for op, bound in clause)
+                   for clause in advisory['clauses'])
+
+    def _audit_project(self, name: str, advisories: Dict[str, List[Dict]]) -> Dict:
+        """Match every distribution installed in a project's environments against the advisory index"""
+        report = {'name': name, 'packages': 0, 'findings': [], 'error': None}
+        try:
+            envs = self.get_project_envs(name)
+        except OSError as e:
+            envs, report['error'] = {}, str(e)
+        if not envs:
+            report['error'] = report['error'] or "no environment found"
+            return report
+        for label, venv_path in envs.items():
+            cfg = self.read_pyvenv_cfg(venv_path)
+            if cfg is None:
+                report['error'] = f"{venv_path} is not a virtual environment"
+                continue
+            installed = self._installed_versions(self._site_packages(venv_path, cfg))
+            report['packages'] += len(installed)
+            for package, (version, _) in installed.items():
+                if package not in advisories:
+                    continue
+                key = self.version_key(version)
+                if key is None:
+                    continue
+                for advisory in advisories[package]:
+                    if self._affects(advisory, key):
+                        fixes = [fixed for fixed in advisory['fixed'] if self.version_key(fixed) > key]
+                        report['findings'].append({
+                            'project': name, 'env': label, 'package': package, 'version': version,
+                            'id': advisory['id'], 'fixed': fixes[0] if fixes else None,
+                            'summary': advisory['summary'],
+                        })
+        return report
+
+    @operation('audit')
+    def audit_projects(self, feed_file: str, names: Optional[List[str]] = None, tags: Optional[List[str]] = None,
+                       jobs: Optional[int] = None, output_format: str = 'text') -> bool:
+        """Scan registered projects against a local advisory feed without a network or child processes.
+
+        Advisories are indexed by package name and each environment's dist-info
+        names are read once, so a scan costs one lookup per installed
+        distribution. Returns False when any project is affected or unreadable.
+        """
+        try:
+            advisories = self.load_advisories(feed_file)
+        except (OSError, ValueError) as e:
+            print(f"[ERROR] Could not read advisory feed {feed_file}: {e}")
+            return False
+        projects = self.config['projects']
+        if names is None:
+            names = list(self.index.query(tags=tags))
+        unknown = [name for name in names if name not in projects]
+        if unknown:
+            print(f"[ERROR] Projects not found: {', '.join(unknown)}")
+            return False
+        names = [name for name in names if projects[name].status != 'creating']
+
+        started = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=jobs or min(32, max(1, len(names)))) as pool:
+            reports = list(pool.map(lambda name: self._audit_project(name, advisories), names))
+        elapsed = time.perf_counter() - started
+        findings = [finding for report in reports for finding in report['findings']]
+        failed = [report for report in reports if report['error']]
+
+        if output_format == 'jsonl':
+            for finding in findings:
+                print(json.dumps(finding))
+            for report in failed:
+                print(json.dumps({'project': report['name'], 'error': report['error']}))
+            return not findings and not failed
+
+        print(f"[AUDIT] {sum(map(len, advisories.values()))} advisories for {len(advisories)} packages; "
+              f"scanned {sum(report['packages'] for report in reports)} packages in {len(reports)} projects "
+              f"in {elapsed:.2f}s")
+        for report in reports:
+            if report['findings']:
+                print(f"[VULNERABLE] {report['name']}")
+                for finding in sorted(report['findings'], key=lambda item: (item['env'], item['package'])):
+                    env = f"{finding['env']}: " if finding['env'] != report['name'] else ''
+                    fix = f"fix: {finding['fixed']}" if finding['fixed'] else "no fix"
+                    print(f"   {env}{finding['package']} {finding['version']}  {finding['id']}  {fix}"
+                          + (f"  {finding['summary']}" if finding['summary'] else ''))
+            if report['error']:
+                print(f"[ERROR] {report['name']}: {report['error']}")
+        affected = sum(1 for report in reports if report['findings'])
+        print(f"\n{affected}/{len(reports)} projects affected by {len(findings)} advisories")
+        return not findings and not failed
+
     def interactive_menu(self):
         """Display interactive menu"""
         while True:
@@ -409,77 +4071,65 @@ class VenvManager:
         
         self.create_poetry(name)
     
-    def activate_project_interactive(self):
-        """Interactive project activation"""
+    def select_project_interactive(self) -> Optional[str]:
+        """Let the user pick a project, narrowing large registries by name prefix"""
         if not self.config['projects']:
             print("No projects found.")
-            return
+            return None
+        
+        prefix = ''
+        if len(self.index.names) > self.SELECT_LIMIT:
+            prefix = input("Filter by name prefix (press Enter to show the first projects): ").strip()
+        project_names = list(self.index.query(prefix=prefix, limit=self.SELECT_LIMIT + 1))
+        if not project_names:
+            print("No matching projects found.")
+            return None
         
         print("\nAvailable projects:")
-        for i, name in enumerate(self.config['projects'].keys(), 1):
+        for i, name in enumerate(project_names[:self.SELECT_LIMIT], 1):
             print(f"{i}. {name}")
+        if len(project_names) > self.SELECT_LIMIT:
+            print(f"... more projects match, type a longer prefix to narrow the list")
         
         try:
             choice = int(input("Select project number: ")) - 1
-            project_names = list(self.config['projects'].keys())
-            if 0 <= choice < len(project_names):
-                self.activate_project(project_names[choice])
-            else:
-                print("[ERROR] Invalid selection!")
+            if 0 <= choice < min(len(project_names), self.SELECT_LIMIT):
+                return project_names[choice]
+            print("[ERROR] Invalid selection!")
         except ValueError:
             print("[ERROR] Please enter a valid number!")
+        return None
+    
+    def activate_project_interactive(self):
+        """Interactive project activation"""
+        project_name = self.select_project_interactive()
+        if project_name:
+            self.activate_project(project_name)
     
     def update_dependencies_interactive(self):
         """Interactive dependency update"""
-        if not self.config['projects']:
-            print("No projects found.")
-            return
-        
-        print("\nAvailable projects:")
-        for i, name in enumerate(self.config['projects'].keys(), 1):
-            print(f"{i}. {name}")
-        
-        try:
-            choice = int(input("Select project number: ")) - 1
-            project_names = list(self.config['projects'].keys())
-            if 0 <= choice < len(project_names):
-                self.update_dependencies(project_names[choice])
-            else:
-                print("[ERROR] Invalid selection!")
-        except ValueError:
-            print("[ERROR] Please enter a valid number!")
+        project_name = self.select_project_interactive()
+        if project_name:
+            self.update_dependencies(project_name)
     
     def migrate_project_interactive(self):
         """Interactive project migration"""
-        if not self.config['projects']:
-            print("No projects found.")
+        project_name = self.select_project_interactive()
+        if not project_name:
             return
         
-        print("\nAvailable projects:")
-        for i, name in enumerate(self.config['projects'].keys(), 1):
-            print(f"{i}. {name}")
+        print(f"\nMigrate '{project_name}' to:")
+        print("1. virtualenv")
+        print("2. pipenv")
+        print("3. poetry")
         
-        try:
-            choice = int(input("Select project number: ")) - 1
-            project_names = list(self.config['projects'].keys())
-            if 0 <= choice < len(project_names):
-                project_name = project_names[choice]
-                print(f"\nMigrate '{project_name}' to:")
-                print("1. virtualenv")
-                print("2. pipenv")
-                print("3. poetry")
-                
-                tool_choice = input("Select tool (1-3): ").strip()
-                tool_map = {'1': 'virtualenv', '2': 'pipenv', '3': 'poetry'}
-                
-                if tool_choice in tool_map:
-                    self.migrate_project(project_name, tool_map[tool_choice])
-                else:
-                    print("[ERROR] Invalid selection!")
-            else:
-                print("[ERROR] Invalid selection!")
-        except ValueError:
-            print("[ERROR] Please enter a valid number!")
+        tool_choice = input("Select tool (1-3): ").strip()
+        tool_map = {'1': 'virtualenv', '2': 'pipenv', '3': 'poetry'}
+        
+        if tool_choice in tool_map:
+            self.migrate_project(project_name, tool_map[tool_choice])
+        else:
+            print("[ERROR] Invalid selection!")
     
     def install_tools_interactive(self):
         """Interactive tool installation"""
@@ -498,8 +4148,7 @@ class VenvManager:
         elif choice == '3':
             self.install_tool('poetry')
         elif choice == '4':
-            for tool in ['virtualenv', 'pipenv', 'poetry']:
-                self.install_tool(tool)
+            self.bootstrap_tools()
         else:
             print("[ERROR] Invalid selection!")
     
@@ -550,26 +4199,481 @@ class VenvManager:
                     self.config = {
                         'default_tool': 'virtualenv',
                         'python_path': sys.executable,
-                        'projects': {}
+                        'schema_version': REGISTRY_SCHEMA_VERSION,
+                        'projects': ProjectStore()
                     }
+                    self._index = None
+                    self._registry_changed = True
                     self.save_config()
                     print("[OK] Configuration reset!")
             else:
                 print("[ERROR] Invalid option!")
 
-def main():
+@dataclass
+class ProcessResult:
+    """A child process run by AsyncVenvManager"""
+    args: List[str]
+    returncode: int
+    duration: float
+    # The last output_tail_bytes of its combined stdout and stderr
+    output: str = ''
+
+@dataclass
+class OperationResult:
+    """Outcome of an AsyncVenvManager operation"""
+    operation: str
+    name: str
+    ok: bool = False
+    duration: float = 0.0
+    path: Optional[str] = None
+    error: Optional[str] = None
+    processes: List[ProcessResult] = field(default_factory=list)
+
+    @property
+    def output(self) -> str:
+        """Output tail of the last child process"""
+        return self.processes[-1].output if self.processes else ''
+
+class AsyncVenvManager:
+    """Asyncio front end to VenvManager for services that drive many operations from one event loop.
+
+    Child processes are started with asyncio.create_subprocess_exec and at most
+    ``concurrency`` run at once. Nothing is printed: every operation returns an
+    OperationResult holding the output tails of its child processes. Cancelling
+    an operation kills its running child and removes what it had created.
+    The registry is shared with the wrapped VenvManager.
+    """
+
+    def __init__(self, manager: Optional[VenvManager] = None, concurrency: int = 16):
+        self.manager = manager or VenvManager()
+        self.concurrency = concurrency
+        # Created on first use so it belongs to the running loop
+        self._slots: Optional[asyncio.Semaphore] = None
+
+    @staticmethod
+    async def _in_thread(function, *args, **kwargs):
+        """Run blocking file work (registry saves, tree removal, wheel repacking) off the loop"""
+        return await asyncio.get_running_loop().run_in_executor(None, functools.partial(function, *args, **kwargs))
+
+    async def _exec(self, result: Optional[OperationResult], cmd: List, cwd=None, env=None) -> ProcessResult:
+        """Run a child process and keep the tail of its output; cancelling kills the child"""
+        if self._slots is None:
+            self._slots = asyncio.Semaphore(self.concurrency)
+        manager = self.manager
+        tail = OutputTail(manager.config.get('output_tail_bytes', VenvManager.OUTPUT_TAIL_BYTES))
+        async with self._slots:
+            with manager._lock:
+                manager.subprocess_count += 1
+            started = time.perf_counter()
+            try:
+                proc = await asyncio.create_subprocess_exec(
+                    *map(str, cmd), cwd=cwd, env=env, stdin=subprocess.DEVNULL,
+                    stdout=subprocess.PIPE, stderr=subprocess.STDOUT)
+            except OSError as e:
+                process = ProcessResult([str(arg) for arg in cmd], 127, time.perf_counter() - started, str(e))
+            else:
+                try:
+                    while True:
+                        chunk = await proc.stdout.read(VenvManager.OUTPUT_TAIL_BYTES)
+                        if not chunk:
+                            break
+                        tail.add(chunk)
+                    returncode = await proc.wait()
+                except asyncio.CancelledError:
+                    if proc.returncode is None:
+                        proc.kill()
+                        await proc.wait()
+                    raise
+                process = ProcessResult([str(arg) for arg in cmd], returncode,
+                                        time.perf_counter() - started, tail.text())
+        if result is not None:
+            result.processes.append(process)
+        return process
+
+    async def _check(self, result: OperationResult, cmd: List, cwd=None, env=None) -> bool:
+        """Run a child process; on failure set the result's error from its exit code and output"""
+        process = await self._exec(result, cmd, cwd=cwd, env=env)
+        if process.returncode != 0:
+            lines = process.output.strip().splitlines()
+            detail = f": {lines[-1]}" if lines else ''
+            result.error = f"{Path(process.args[0]).name} exited with {process.returncode}{detail}"
+        return process.returncode == 0
+
+    async def _finish(self, result: OperationResult, started: float, metric: str) -> OperationResult:
+        """Time the operation, record it in the history and metrics, and return its result.
+
+        Every return of an operation goes through here, refusals included.
+        """
+        result.duration = time.perf_counter() - started
+        metrics = self.manager.metrics
+        if metrics is not None:
+            written = 0
+            if result.ok:
+                dirs = _project_dirs(self.manager, result.name) if metric != 'install_tool' else [Path(result.path)]
+                written = sum([await self._in_thread(self.manager._dir_size, path) for path in dirs])
+            metrics.observe(metric, result.duration, result.ok, written)
+        await self._in_thread(self.manager.record_history, result.operation, result.name, result.duration,
+                              0 if result.ok else 1, len(result.processes))
+        return result
+
+    async def _tool_command(self, tool: str, result: OperationResult) -> Optional[List[str]]:
+        """Get the command for a tool, installing it in isolation when it is missing"""
+        command = self.manager.tool_command(tool)
+        if os.path.isabs(command[0]) and command[0] != sys.executable:
+            return command
+        if (await self._exec(None, command + ['--version'])).returncode == 0:
+            return command
+        installed = await self.install_tool(tool)
+        if not installed.ok:
+            result.error = f"could not install {tool}: {installed.error}"
+            return None
+        return self.manager.tool_command(tool)
+
+    async def _resolve_env(self, name: str) -> Optional[Path]:
+        """Locate a project's environment, asking pipenv or poetry only when the cached path is stale"""
+        project = self.manager.config['projects'][name]
+        if project.tool == 'virtualenv':
+            # The newest interpreter of a matrix, as in VenvManager.get_env_path
+            return Path(project.newest_env())
+        if project.env and self.manager.get_venv_python(Path(project.env)).exists():
+            return Path(project.env)
+        args = ['--venv'] if project.tool == 'pipenv' else ['env', 'info', '--path']
+        process = await self._exec(None, self.manager.tool_command(project.tool) + args, cwd=project.path)
+        lines = process.output.strip().splitlines()
+        env_path = Path(lines[-1].strip()) if process.returncode == 0 and lines else None
+        await self._in_thread(self.manager._set_env, name, env_path)
+        return env_path
+
+    async def create(self, name: str, tool: Optional[str] = None, python_version: Optional[str] = None,
+                     base_dir: Optional[Path] = None, tags: Optional[List[str]] = None) -> OperationResult:
+        """Create and register a virtualenv, pipenv or poetry project"""
+        manager = self.manager
+        tool = tool or manager.config['default_tool']
+        base_dir = Path(base_dir) if base_dir else Path.cwd()
+        path = base_dir / name
+        result = OperationResult('create', name, path=str(path))
+        started = time.perf_counter()
+        if tool not in VenvManager.TOOLS:
+            result.error = f"unknown tool: {tool}"
+            return await self._finish(result, started, 'create')
+        if name in manager.config['projects'] or path.exists():
+            result.error = f"'{name}' already exists"
+            return await self._finish(result, started, f'create_{tool}')
+
+        try:
+            command = await self._tool_command(tool, result)
+            if command is None:
+                return await self._finish(result, started, f'create_{tool}')
+            if tool == 'virtualenv':
+                ok = await self._check(result, command + [path] + (['-p', python_version] if python_version else []))
+            elif tool == 'pipenv':
+                await self._in_thread(manager._create_directory, path)
+                python = python_version or manager.config.get('python_path') or sys.executable
+                ok = (await self._check(result, command + ['--python', python], cwd=path)
+                      and await self._check(result, command + ['install'], cwd=path))
+            else:
+                ok = await self._check(result, command + ['new', path])
+                if ok:
+                    await self._in_thread(manager._mark_partial, path)
+                if ok and python_version:
+                    ok = await self._check(result, command + ['env', 'use', python_version], cwd=path)
+            if ok:
+                project = Project(tool, str(path), created=str(base_dir), python=python_version, tags=tags or None)
+                await self._in_thread(manager.register_project, name, project)
+                await self._in_thread(manager._clear_partial, path)
+                if tool != 'virtualenv':
+                    await self._resolve_env(name)
+                result.ok = True
+            else:
+                await self._in_thread(self._discard, path)
+        except asyncio.CancelledError:
+            # A cancelled creation leaves nothing behind
+            await asyncio.shield(self._in_thread(self._discard, path))
+            raise
+        return await self._finish(result, started, f'create_{tool}')
+
+    def _discard(self, path: Path):
+        self.manager._remove_tree(path)
+        self.manager._clear_partial(path)
+
+    async def update(self, name: str) -> OperationResult:
+        """Upgrade pip in a virtualenv (every environment of a matrix) or run pipenv/poetry update"""
+        manager = self.manager
+        result = OperationResult('update', name)
+        started = time.perf_counter()
+        project = manager.config['projects'].get(name)
+        if project is None:
+            result.error = f"project '{name}' not found"
+            return await self._finish(result, started, 'update')
+        result.path = project.path
+
+        if project.tool == 'virtualenv':
+            pythons = [manager.get_venv_python(path) for path in manager.get_project_envs(name).values()]
+            checks = await asyncio.gather(*(
+                self._check(result, [python, '-m', 'pip', 'install', '--upgrade', 'pip']) for python in pythons))
+            result.ok = all(checks)
+        else:
+            result.ok = await self._check(result, manager.tool_command(project.tool) + ['update'], cwd=project.path)
+            if result.ok:
+                await self._resolve_env(name)
+        return await self._finish(result, started, 'update')
+
+    async def install_tool(self, tool: str, wheelhouse: Optional[str] = None,
+                           version: Optional[str] = None) -> OperationResult:
+        """Install a pinned tool version into its own environment, like VenvManager.install_tool_isolated"""
+        manager = self.manager
+        version = version or manager.tool_version(tool)
+        env_path = manager.tool_env(tool, version)
+        result = OperationResult('install_tool', f'{tool}=={version}', path=str(env_path))
+        started = time.perf_counter()
+        python = manager.get_venv_python(env_path)
+        pip = [python, '-m', 'pip', 'install', '--disable-pip-version-check', '--quiet']
+        if wheelhouse:
+            pip += ['--no-index', '--find-links', str(wheelhouse)]
+        try:
+            result.ok = ((python.exists() or await self._check(result, [sys.executable, '-m', 'venv', env_path]))
+                         and await self._check(result, pip + [f'{tool}=={version}']))
+        except asyncio.CancelledError:
+            await asyncio.shield(self._in_thread(manager._remove_tree, env_path))
+            raise
+        if not result.ok:
+            # A half-installed environment would shadow a working tool on PATH
+            await self._in_thread(manager._remove_tree, env_path)
+        return await self._finish(result, started, 'install_tool')
+
+    async def migrate(self, name: str, new_tool: str, new_name: Optional[str] = None) -> OperationResult:
+        """Create new_name with new_tool from the packages installed for name.
+
+        Packages are installed offline from wheels repacked from the source
+        environment. A failed or cancelled migration is rolled back.
+        """
+        manager = self.manager
+        projects = manager.config['projects']
+        new_name = new_name or manager._migration_name(name, new_tool)
+        result = OperationResult('migrate', new_name)
+        started = time.perf_counter()
+        if name not in projects:
+            result.error = f"project '{name}' not found"
+            return await self._finish(result, started, 'migrate')
+        if projects[name].tool == new_tool:
+            result.error = f"'{name}' already uses {new_tool}"
+            return await self._finish(result, started, 'migrate')
+        if new_name in projects:
+            result.error = f"'{new_name}' is already registered; choose a new project name"
+            return await self._finish(result, started, 'migrate')
+
+        source_env = await self._resolve_env(name)
+        cfg = manager.read_pyvenv_cfg(source_env) if source_env else None
+        if cfg is None:
+            result.error = f"could not find the environment of '{name}'"
+            return await self._finish(result, started, 'migrate')
+        site_packages = manager._site_packages(source_env, cfg)
+        dists = await self._in_thread(manager.export_installed, site_packages)
+        python_version = '.'.join(manager._cfg_version(cfg).split('.')[:2]) or None
+
+        new_path = Path.cwd() / new_name
+        path_existed = new_path.exists()
+        previous = projects[new_name].copy() if new_name in projects else None
+        try:
+            created = await self.create(new_name, new_tool, python_version)
+            result.processes.extend(created.processes)
+            result.path = created.path
+            if not created.ok:
+                result.error = created.error
+                return await self._finish(result, started, 'migrate')
+            await self._in_thread(manager.write_manifest, projects[new_name], dists, python_version)
+            result.ok = await self._populate(result, new_name, dists, source_env, site_packages)
+        except asyncio.CancelledError:
+            await asyncio.shield(self._in_thread(
+                manager._rollback_migration, new_name, new_tool, new_path, path_existed, previous))
+            raise
+        if not result.ok:
+            await self._in_thread(manager._rollback_migration, new_name, new_tool, new_path, path_existed, previous)
+        return await self._finish(result, started, 'migrate')
+
+    async def _populate(self, result: OperationResult, name: str, dists: List[Dict], prefix: Path,
+                        site_packages: Path) -> bool:
+        env_path = await self._resolve_env(name)
+        if env_path is None:
+            result.error = f"could not find the environment of '{name}'"
+            return False
+        if not dists:
+            return True
+        manager = self.manager
+        wheel_dir = await self._in_thread(manager.cache.section, 'wheels')
+        wheels = await asyncio.gather(*(
+            self._in_thread(manager.repack_wheel, prefix, site_packages, dist, wheel_dir) for dist in dists))
+        cached = [f"{dist['name']}=={dist['version']}" for dist, wheel in zip(dists, wheels) if wheel]
+        missing = [f"{dist['name']}=={dist['version']}" for dist, wheel in zip(dists, wheels) if not wheel]
+        pip = [manager.get_venv_python(env_path), '-m', 'pip', 'install', '--no-deps', '--disable-pip-version-check']
+        if cached and not await self._check(result, pip + ['--no-index', '--find-links', wheel_dir] + cached):
+            return False
+        if not missing:
+            return True
+        # Wheels built earlier for this ABI and platform are reused through PIP_FIND_LINKS
+        env = await self._in_thread(manager.pip_environ, manager.get_venv_python(env_path))
+        return await self._check(result, pip + missing, env=env)
+
+def profile_command(function, command: str, output: Optional[str] = None, top: int = 25):
+    """Run a command under cProfile and write its pstats plus a text summary.
+
+    The summary splits each VenvManager method's wall time into time spent
+    waiting on child processes and time spent in this process.
+    """
+    if output:
+        stats_file = Path(output)
+    else:
+        profiles_dir = VenvManager.data_dir_for(DEFAULT_CONFIG_FILE) / 'profiles'
+        stats_file = profiles_dir / f"{command}-{time.strftime('%Y%m%d-%H%M%S')}.pstats"
+    summary_file = stats_file.with_suffix('.txt')
+
+    profiler = cProfile.Profile()
+    VenvManager.child_wait = {}
+    wall_started, cpu_started, times_started = time.perf_counter(), time.process_time(), os.times()
+    try:
+        profiler.runcall(function)
+    finally:
+        wall = time.perf_counter() - wall_started
+        cpu = time.process_time() - cpu_started
+        times = os.times()
+        children_cpu = (times.children_user - times_started.children_user) + \
+                       (times.children_system - times_started.children_system)
+        waits, VenvManager.child_wait = VenvManager.child_wait, None
+
+        stats_file.parent.mkdir(parents=True, exist_ok=True)
+        profiler.dump_stats(str(stats_file))
+        listing = io.StringIO()
+        stats = pstats.Stats(profiler, stream=listing)
+        stats.sort_stats('cumulative').print_stats(top)
+
+        # cProfile only sees the main thread, so worker-only methods show their child wait alone
+        locations = {(code.co_filename, code.co_firstlineno, code.co_name): name
+                     for code, name in VenvManager.method_codes().items()}
+        methods = {}
+        for location, (_, calls, _, cumulative, _) in stats.stats.items():
+            if location in locations:
+                methods[locations[location]] = (calls, cumulative)
+        rows = []
+        for method in set(methods) | set(waits):
+            calls, cumulative = methods.get(method, (0, None))
+            wait = waits.get(method, 0.0)
+            in_process = max(cumulative - wait, 0.0) if cumulative is not None else None
+            rows.append((cumulative if cumulative is not None else wait, method, calls, cumulative, wait, in_process))
+        rows.sort(reverse=True)
+        # Waits are inclusive, so the outermost method carries the command's total
+        total_wait = max(waits.values(), default=0.0)
+
+        lines = [
+            f"venv {command} profile",
+            f"Wall time:            {wall:8.3f}s",
+            f"In-process CPU:       {cpu:8.3f}s",
+            f"Child process CPU:    {children_cpu:8.3f}s",
+            f"Waiting on children:  {total_wait:8.3f}s (summed over parallel children)",
+            "",
+            f"{'VenvManager method':<32} {'calls':>6} {'wall':>9} {'child wait':>11} {'in-process':>11}",
+        ]
+        for _, method, calls, cumulative, wait, in_process in rows:
+            wall_text = f"{cumulative:.3f}" if cumulative is not None else '-'
+            in_process_text = f"{in_process:.3f}" if in_process is not None else '-'
+            lines.append(f"{method:<32} {calls:>6} {wall_text:>9} {wait:>11.3f} {in_process_text:>11}")
+        lines += ["", f"Top {top} functions by cumulative time:", listing.getvalue()]
+        summary_file.write_text('\n'.join(lines), encoding='utf-8')
+        print(f"[PROFILE] {wall:.2f}s wall; stats in {stats_file}, summary in {summary_file}", file=sys.stderr)
+
+def main(argv: Optional[List[str]] = None):
     parser = argparse.ArgumentParser(description='Python Virtual Environment Manager')
-    parser.add_argument('command', nargs='?', help='Command to run (create, list, activate, update, migrate)')
-    parser.add_argument('--name', '-n', help='Project/virtual environment name')
+    parser.add_argument('command', nargs='?', help='Command to run (create, list, activate, update, install, slim, startup, audit, migrate, run, tag, which, hook, doctor, gc, envs, tools, history, cache)')
+    parser.add_argument('args', nargs='*', help='Command arguments; for run, the command follows --')
+    parser.add_argument('--name', '-n', '--project', dest='name', help='Project/virtual environment name')
     parser.add_argument('--tool', '-t', choices=['virtualenv', 'pipenv', 'poetry'], 
                        help='Tool to use')
-    parser.add_argument('--python', '-p', help='Python version to use')
+    parser.add_argument('--python', '-p', help='Python version to use (comma-separated for a matrix)')
+    parser.add_argument('--jobs', '-j', type=int, help='Number of parallel jobs')
+    parser.add_argument('--tag', action='append', default=[],
+                       help='Tag to assign on create or to filter list by (repeatable)')
+    parser.add_argument('--filter', action='append', default=[], metavar='KEY=VALUE',
+                       help='Filter list by tool, interpreter, tag or path (repeatable)')
+    parser.add_argument('--limit', type=int, help='Maximum number of projects (list) or records (history) to show')
+    parser.add_argument('--slowest', type=int, metavar='N', help='Show the N slowest recorded commands (history)')
+    parser.add_argument('--page', type=int, help='Page of results to list (1-based, pages of --limit)')
+    parser.add_argument('--format', dest='output_format', choices=VenvManager.LIST_FORMATS, default='text',
+                       help='Output format for list')
+    parser.add_argument('--fields', help='Comma-separated fields to include in list output')
+    parser.add_argument('--ephemeral', action='store_true',
+                       help='Create on tmpfs with a TTL (create), or create, run and destroy in one go (run)')
+    parser.add_argument('--ttl', type=int, help='Seconds before an ephemeral venv may be removed by gc')
+    parser.add_argument('--template', help='Registered virtualenv project or published template to clone an ephemeral venv from')
+    parser.add_argument('--dry-run', action='store_true',
+                       help='Show what gc or slim would remove without removing anything')
+    parser.add_argument('--yes', '-y', action='store_true',
+                       help='Answer yes to confirmation prompts')
+    parser.add_argument('--all', action='store_true',
+                       help='Migrate every registered project (migrate) or install every tool (tools install)')
+    parser.add_argument('--module', '-m', help='Module whose import time to measure (startup)')
+    parser.add_argument('--runs', type=int, help='Interpreter runs to take the median of (startup)')
+    parser.add_argument('--baseline', action='store_true', help='Replace the stored startup baseline (startup)')
+    parser.add_argument('--advisories', metavar='FILE', help='Local JSON advisory feed to scan projects against (audit)')
+    parser.add_argument('--lock', metavar='FILE', help='Hash-pinned requirements lock to install (install)')
+    parser.add_argument('--wheelhouse', help='Install tools from this directory of wheels without a network')
+    parser.add_argument('--report', help='Where to write the JSON report of a bulk migration')
+    parser.add_argument('--no-rollback', action='store_true',
+                       help='Keep the partial results of failed bulk migrations')
+    parser.add_argument('--repair', action='store_true',
+                       help='Re-link broken interpreters in place (doctor)')
     parser.add_argument('--interactive', '-i', action='store_true', 
                        help='Run in interactive mode')
+    parser.add_argument('--metrics-file', metavar='FILE',
+                       help='Add operation metrics to this Prometheus textfile (e.g. node_exporter textfile dir)')
+    parser.add_argument('--profile', action='store_true',
+                       help='Profile the command and write pstats plus a text summary')
+    parser.add_argument('--profile-output', metavar='FILE',
+                       help='Where to write the profile (implies --profile; summary goes next to it as .txt)')
+    
+    argv = sys.argv[1:] if argv is None else list(argv)
+    child_command = []
+    if '--' in argv:
+        split = argv.index('--')
+        argv, child_command = argv[:split], argv[split + 1:]
+    args = parser.parse_intermixed_args(argv)
+    
+    if args.profile or args.profile_output:
+        profile_command(lambda: run_command(args, parser, child_command), args.command or 'interactive',
+                        args.profile_output)
+    else:
+        run_command(args, parser, child_command)
+
+def run_command(args: argparse.Namespace, parser: argparse.ArgumentParser, child_command: List[str]):
+    """Dispatch a parsed command line"""
+    if args.command == 'which':
+        # Answered from the path index alone so shell prompt hooks never load the registry
+        fields = [field.strip() for field in args.fields.split(',')] if args.fields else None
+        path = args.args[0] if args.args else os.getcwd()
+        sys.exit(0 if VenvManager.which(path, fields=fields, output_format=args.output_format) else 1)
     
-    args = parser.parse_args()
     manager = VenvManager()
+    metrics_file = args.metrics_file or manager.config.get('metrics_file')
+    if metrics_file:
+        manager.metrics = OperationMetrics()
+        # Written at exit so commands that end with sys.exit still report
+        atexit.register(manager.metrics.write, Path(metrics_file).expanduser())
+    if args.command == 'history':
+        manager.show_history(args.name, slowest=args.slowest, limit=args.limit, output_format=args.output_format)
+        return
     
+    started = time.perf_counter()
+    status = 1
+    try:
+        dispatch(manager, args, parser, child_command)
+        status = 0
+    except SystemExit as e:
+        status = e.code if isinstance(e.code, int) else (0 if e.code is None else 1)
+        raise
+    finally:
+        manager.record_history(args.command or 'interactive', args.name, time.perf_counter() - started, status)
+
+def dispatch(manager: VenvManager, args: argparse.Namespace, parser: argparse.ArgumentParser,
+             child_command: List[str]):
+    """Run a command against a manager"""
     if args.interactive or not args.command:
         manager.interactive_menu()
     elif args.command == 'create':
@@ -579,14 +4683,96 @@ def main():
         
         tool = args.tool or manager.config['default_tool']
         
-        if tool == 'virtualenv':
-            manager.create_virtualenv(args.name, args.python)
-        elif tool == 'pipenv':
-            manager.create_pipenv(args.name, args.python)
-        elif tool == 'poetry':
-            manager.create_poetry(args.name, args.python)
+        if args.ephemeral:
+            if args.tool and args.tool != 'virtualenv':
+                print("[ERROR] Ephemeral environments are only supported with virtualenv")
+                return
+            if not manager.create_ephemeral(args.name, args.python, template=args.template, ttl=args.ttl):
+                sys.exit(1)
+        elif args.python and ',' in args.python:
+            if tool != 'virtualenv':
+                print("[ERROR] Python version matrices are only supported with virtualenv")
+                return
+            versions = [version.strip() for version in args.python.split(',') if version.strip()]
+            if not manager.create_matrix(args.name, versions, jobs=args.jobs):
+                sys.exit(1)
+        else:
+            create = {'virtualenv': manager.create_virtualenv, 'pipenv': manager.create_pipenv,
+                      'poetry': manager.create_poetry}[tool]
+            if not create(args.name, args.python):
+                sys.exit(1)
+        if args.tag and args.name in manager.config['projects']:
+            manager.tag_project(args.name, args.tag)
+            manager._auto_slim(args.name)
     elif args.command == 'list':
-        manager.list_projects()
+        filters = {}
+        for item in args.filter:
+            key, sep, value = item.partition('=')
+            if not sep:
+                print(f"[ERROR] Invalid filter '{item}'! Use KEY=VALUE")
+                return
+            # Repeating a key matches any of its values
+            filters.setdefault(key.strip(), []).append(value.strip())
+        fields = [field.strip() for field in args.fields.split(',')] if args.fields else None
+        try:
+            manager.list_projects(prefix=args.name, filters=filters, tags=args.tag, limit=args.limit,
+                                  page=args.page, output_format=args.output_format, fields=fields)
+            sys.stdout.flush()
+        except BrokenPipeError:
+            # The reader went away (e.g. piped into head); silence the flush at interpreter exit
+            devnull = os.open(os.devnull, os.O_WRONLY)
+            os.dup2(devnull, sys.stdout.fileno())
+            sys.exit(1)
+    elif args.command == 'doctor':
+        names = [args.name] if args.name else None
+        if not manager.doctor(names, repair=args.repair, jobs=args.jobs):
+            sys.exit(1)
+    elif args.command == 'gc':
+        if not manager.gc(args.args, dry_run=args.dry_run, assume_yes=args.yes, jobs=args.jobs):
+            sys.exit(1)
+    elif args.command == 'tools':
+        if args.args[:1] == ['list']:
+            manager.list_tools()
+            return
+        if args.args[:1] != ['install'] or not (args.all or args.args[1:]):
+            print("[ERROR] Use: tools list | tools install --all | tools install TOOL[==VERSION]... "
+                  "[--wheelhouse DIR] [--jobs N]")
+            return
+        tools = list(manager.TOOLS) if args.all else args.args[1:]
+        unknown = [tool for tool in tools if tool.partition('==')[0] not in manager.TOOLS]
+        if unknown:
+            print(f"[ERROR] Unknown tools: {', '.join(unknown)} (choose from {', '.join(manager.TOOLS)})")
+            return
+        if not manager.bootstrap_tools(tools, wheelhouse=args.wheelhouse, jobs=args.jobs):
+            sys.exit(1)
+    elif args.command == 'envs':
+        if args.args[:1] != ['refresh']:
+            print("[ERROR] Unknown envs command! Use: envs refresh [--name NAME] [--jobs N]")
+            return
+        names = [args.name] if args.name else None
+        if not manager.refresh_envs(names, jobs=args.jobs):
+            sys.exit(1)
+    elif args.command == 'cache':
+        if not args.args or args.args == ['info']:
+            manager.show_cache()
+        elif args.args[0] == 'publish-template' and (args.name or args.args[1:]):
+            if not manager.publish_template(args.name or args.args[1]):
+                sys.exit(1)
+        else:
+            print("[ERROR] Use: cache [info] | cache publish-template --name NAME")
+    elif args.command == 'hook':
+        shell = args.args[0] if args.args else os.path.basename(os.environ.get('SHELL', 'bash'))
+        hook = manager.shell_hook(shell)
+        if hook is None:
+            print(f"[ERROR] Unsupported shell: {shell} (choose from {', '.join(manager.SHELL_HOOKS)})")
+            return
+        print(hook, end='')
+    elif args.command == 'tag':
+        if not args.name or not args.args:
+            print("[ERROR] Project name and tags are required! Use: tag --name NAME TAG...")
+            return
+        if not manager.tag_project(args.name, args.args):
+            sys.exit(1)
     elif args.command == 'activate':
         if not args.name:
             print("[ERROR] Project name is required! Use --name or -n")
@@ -596,12 +4782,59 @@ def main():
         if not args.name:
             print("[ERROR] Project name is required! Use --name or -n")
             return
-        manager.update_dependencies(args.name)
+        if not manager.update_dependencies(args.name, jobs=args.jobs):
+            sys.exit(1)
+    elif args.command == 'slim':
+        if not args.name:
+            print("[ERROR] Project name is required! Use: slim --name NAME [safe|standard|aggressive] [--dry-run]")
+            return
+        profile = args.args[0] if args.args else manager.config.get('slim_profile', 'standard')
+        if not manager.slim_project(args.name, profile, dry_run=args.dry_run):
+            sys.exit(1)
+    elif args.command == 'startup':
+        if not args.name or not args.module:
+            print("[ERROR] Project name and module are required! Use: startup --name NAME --module MODULE")
+            return
+        if not manager.startup_profile(args.name, args.module, runs=args.runs, baseline=args.baseline):
+            sys.exit(1)
+    elif args.command == 'audit':
+        if not args.advisories:
+            print("[ERROR] An advisory feed is required! Use: audit --advisories FEED.json [--name NAME | --tag TAG]")
+            return
+        if args.output_format not in ('text', 'jsonl'):
+            print("[ERROR] audit supports --format text or jsonl")
+            return
+        names = [args.name] if args.name else None
+        if not manager.audit_projects(args.advisories, names=names, tags=args.tag, jobs=args.jobs,
+                                      output_format=args.output_format):
+            sys.exit(1)
+    elif args.command == 'install':
+        if not args.name or not args.lock:
+            print("[ERROR] Project name and lock file are required! Use: install --name NAME --lock FILE")
+            return
+        if not manager.install_lock(args.name, args.lock, jobs=args.jobs):
+            sys.exit(1)
+    elif args.command == 'run' and args.ephemeral:
+        if not manager.run_ephemeral(args.args + child_command, args.python, template=args.template, name=args.name):
+            sys.exit(1)
+    elif args.command == 'run':
+        if not args.name:
+            print("[ERROR] Project name is required! Use --name or -n")
+            return
+        if not manager.run_in_project(args.name, args.args + child_command, jobs=args.jobs):
+            sys.exit(1)
     elif args.command == 'migrate':
+        if args.tool and (args.all or (args.tag and not args.name)):
+            if not manager.migrate_projects(args.tool, tags=args.tag, jobs=args.jobs, report_file=args.report,
+                                            rollback=not args.no_rollback):
+                sys.exit(1)
+            return
         if not args.name or not args.tool:
-            print("[ERROR] Project name and tool are required! Use --name and --tool")
+            print("[ERROR] Project name and tool are required! Use --name and --tool (or --all / --tag for many)")
             return
-        manager.migrate_project(args.name, args.tool)
+        new_name = args.args[0] if args.args else None
+        if not manager.migrate_project(args.name, args.tool, assume_yes=args.yes, new_name=new_name, jobs=args.jobs):
+            sys.exit(1)
     else:
         print(f"[ERROR] Unknown command: {args.command}")
         parser.print_help()
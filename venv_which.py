@@ -0,0 +1,71 @@
+#!/usr/bin/env python3
+"""
+Fast project lookup for shell auto-activation hooks
+Prints the virtual environment of the project owning a directory, read from
+the sorted path index (~/.venv_manager/paths.tsv). It imports nothing beyond
+os, sys and mmap so a hook can run it on every directory change.
+
+Usage: python -I -S venv_which.py [PATH [INDEX_FILE]]
+
+Developer: Khotso Tsoaela
+Repository: https://github.com/ktsoaela/venv_manager
+"""
+
+import mmap
+import os
+import sys
+
+FIELDS = ('path', 'name', 'tool', 'venv')
+DEFAULT_INDEX_FILE = os.path.join(os.path.expanduser('~'), '.venv_manager', 'paths.tsv')
+
+def normalize_path(path) -> str:
+    """Normalize a path for reverse lookups without touching the filesystem"""
+    return os.path.normcase(os.path.abspath(str(path)))
+
+def search(data, key: bytes):
+    """Binary search sorted index lines for the one whose path equals key"""
+    target = key + b'\t'
+    lo, hi = 0, len(data)
+    while lo < hi:
+        mid = (lo + hi) // 2
+        start = data.rfind(b'\n', 0, mid) + 1
+        end = data.find(b'\n', start)
+        end = len(data) if end == -1 else end
+        if data[start:end] < target:
+            lo = end + 1
+        else:
+            hi = start
+    end = data.find(b'\n', lo)
+    line = data[lo:len(data) if end == -1 else end]
+    return line if line.startswith(target) else None
+
+def lookup(index_file, path):
+    """Find the index row of the project owning path or its nearest registered parent directory"""
+    try:
+        with open(index_file, 'rb') as f:
+            if os.fstat(f.fileno()).st_size == 0:
+                return None
+            with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as data:
+                current = normalize_path(path)
+                while True:
+                    line = search(data, current.encode('utf-8'))
+                    if line is not None:
+                        return dict(zip(FIELDS, line.decode('utf-8').split('\t')))
+                    parent = os.path.dirname(current)
+                    if parent == current:
+                        return None
+                    current = parent
+    except FileNotFoundError:
+        return None
+
+def main(argv=None):
+    argv = sys.argv[1:] if argv is None else argv
+    index_file = argv[1] if len(argv) > 1 else DEFAULT_INDEX_FILE
+    record = lookup(index_file, argv[0] if argv else os.getcwd())
+    if record is None:
+        return 1
+    sys.stdout.write(record['venv'] + '\n')
+    return 0
+
+if __name__ == '__main__':
+    sys.exit(main())